@@ -17,7 +17,8 @@ from xldlib.onstart import main
 del main
 
 # load tests
-from . import chemical, exception, general, gui, onstart, qt, utils, xlpy
+from . import (chemical, exception, general, gui, objects, onstart, qt,
+               utils, xlpy)
 
 
 # TESTS
@@ -31,6 +32,7 @@ def add_tests(suite):
     exception.add_tests(suite)
     general.add_tests(suite)
     gui.add_tests(suite)
+    objects.add_tests(suite)
     onstart.add_tests(suite)
     qt.add_tests(suite)
     utils.add_tests(suite)
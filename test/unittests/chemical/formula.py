@@ -133,6 +133,46 @@ class MoleculeTest(unittest.TestCase):
         self.assertAlmostEquals(two.mass, item.conditions[1].mass, 5)
 
 
+class FormulaTest(unittest.TestCase):
+    '''Tests for the compact, interned chemical formulas'''
+
+    def test_interned(self):
+        '''Test equal compositions share a single instance'''
+
+        for item in FORMULAS + PEPTIDES:
+            condition = item.conditions[0]
+            one = formula.getformula(condition.formula)
+            two = formula.Formula.frommolecule(formula.Molecule(condition.formula))
+            self.assertIs(one, two)
+            self.assertIs(one * 2, formula.getformula(item.conditions[1].formula))
+            self.assertAlmostEquals(one.mass, condition.mass, 5)
+
+    def test_peptide(self):
+        '''Test memoized peptide formulas match the parsed molecules'''
+
+        for item in PEPTIDES:
+            one = formula.getformula(peptide=item.string, strict=False)
+            self.assertEquals(one.tostr(), item.conditions[0].formula)
+            self.assertAlmostEquals(one.mass, item.conditions[0].mass, 5)
+
+    def test_vector(self):
+        '''Test conversion to and from element-count vectors'''
+
+        one = formula.getformula('13C6 C2 H10 15N(2) O')
+        vector = one.tovector()
+        self.assertEquals(vector.sum(), 21)
+        self.assertIs(formula.Formula.fromvector(vector), one)
+        self.assertEquals(one.tomolecule().tostr(), one.tostr())
+
+    def test_immutable(self):
+        '''Test formulas cannot be modified in-place'''
+
+        one = formula.getformula('H2 O')
+        with self.assertRaises(AttributeError):
+            one.mass = 0.
+        self.assertAlmostEquals(one.average, 18.01528, 4)
+
+
 # TESTS
 # -----
 
@@ -144,3 +184,7 @@ def add_tests(suite):
     suite.addTest(MoleculeTest('test_formulas'))
     suite.addTest(MoleculeTest('test_peptide'))
     suite.addTest(MoleculeTest('test_properties'))
+    suite.addTest(FormulaTest('test_interned'))
+    suite.addTest(FormulaTest('test_peptide'))
+    suite.addTest(FormulaTest('test_vector'))
+    suite.addTest(FormulaTest('test_immutable'))
@@ -76,6 +76,32 @@ class OrderedRecursiveDictTest(unittest.TestCase):
         del self.dict
 
 
+class LruDictTest(unittest.TestCase):
+    '''Test for a least recently used cache'''
+
+    def setUp(self):
+        '''Set up unittests'''
+
+        self.dict = ordered.LruDict(2)
+
+    def test_evict(self):
+        '''Test the least recently used key is evicted'''
+
+        self.dict[1] = 1
+        self.dict[2] = 2
+        self.assertEquals(self.dict[1], 1)
+
+        self.dict[3] = 3
+        self.assertEquals(list(self.dict), [1, 3])
+        with self.assertRaises(KeyError):
+            self.dict[2]
+
+    def tearDown(self):
+        '''Tear down unittests'''
+
+        del self.dict
+
+
 # SUITE
 # -----
 
@@ -87,3 +113,4 @@ def add_tests(suite):
     suite.addTest(OrderedDefaultdictTest('test_missing'))
     suite.addTest(OrderedRecursiveDictTest('test_default'))
     suite.addTest(OrderedRecursiveDictTest('test_factory'))
+    suite.addTest(LruDictTest('test_evict'))
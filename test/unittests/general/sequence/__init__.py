@@ -9,7 +9,7 @@
 '''
 
 # load modules/submodules
-from . import defaultlist, extendable, functions, lookup, user
+from . import column, defaultlist, extendable, functions, lookup, user
 
 
 # SUITE
@@ -19,6 +19,7 @@ from . import defaultlist, extendable, functions, lookup, user
 def add_tests(suite):
     '''Add tests to the unittest suite'''
 
+    column.add_tests(suite)
     defaultlist.add_tests(suite)
     extendable.add_tests(suite)
     functions.add_tests(suite)
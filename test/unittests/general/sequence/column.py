@@ -0,0 +1,141 @@
+'''
+    Unittests/General/Sequence/column
+    _________________________________
+
+    Test suite for typed, NumPy-backed columns.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import unittest
+
+from xldlib.general.sequence import column
+
+
+# HELPERS
+# -------
+
+
+class Lookup(object):
+    '''Lazy lookup, which counts the queries and cannot be iterated'''
+
+    def __init__(self, keys):
+        self.keys = set(keys)
+        self.queries = 0
+
+    def __contains__(self, key):
+        self.queries += 1
+        return key in self.keys
+
+    def __iter__(self):
+        raise AssertionError("Lookup cannot be iterated")
+
+
+# CASES
+# -----
+
+
+class ColumnTest(unittest.TestCase):
+    '''Tests for typed storage and list-like access'''
+
+    def test_promotion(self):
+        '''Test the storage is promoted for heterogeneous values'''
+
+        inst = column.Column([1, 2])
+        self.assertEquals(inst.kind, 'int')
+
+        inst.append(2.5)
+        self.assertEquals(inst.kind, 'float')
+        self.assertEquals(inst, [1., 2., 2.5])
+
+        inst.append('A')
+        self.assertEquals(inst.kind, 'object')
+        self.assertEquals(inst[-1], 'A')
+
+    def test_missing(self):
+        '''Test NaN placeholders do not convert integers to floats'''
+
+        nan = float('nan')
+        for values in ([1, nan, 3], [nan, 1, 3]):
+            inst = column.Column(values)
+            self.assertEquals(inst.kind, 'object')
+            self.assertEquals([type(i) for i in inst],
+                [type(i) for i in values])
+
+        inst = column.Column([1, 2])
+        inst[1] = nan
+        inst.append(3)
+        self.assertEquals([type(i) for i in inst], [int, float, int])
+        self.assertEquals(str(inst[-1]), '3')
+
+        # missing floats keep the float storage
+        inst = column.Column([nan, nan])
+        inst.extend([2.5, nan])
+        self.assertEquals(inst.kind, 'float')
+        self.assertEquals(inst[2], 2.5)
+
+    def test_strings(self):
+        '''Test strings are stored as interned codes'''
+
+        inst = column.Column(['PEPTIDE', 'SAMPLER', 'PEPTIDE'])
+        self.assertEquals(inst.kind, 'str')
+        self.assertEquals(inst.values().tolist(), [0, 1, 0])
+        self.assertEquals(inst[1:], ['SAMPLER', 'PEPTIDE'])
+        self.assertEquals(inst.isin({'PEPTIDE', 'MISSING'}).tolist(),
+            [True, False, True])
+
+    def test_isin(self):
+        '''Test each distinct value is queried once from lazy lookups'''
+
+        inst = column.Column(['P02769', 'P68082', 'P02769', 'Q00001'])
+        lookup = Lookup({'P02769', 'Q00001', 'P00000'})
+        self.assertEquals(inst.isin(lookup).tolist(),
+            [True, False, True, True])
+        self.assertEquals(lookup.queries, 3)
+
+        inst = column.Column([4, 2, 4, 3])
+        lookup = Lookup({2, 3})
+        self.assertEquals(inst.isin(lookup).tolist(),
+            [False, True, False, True])
+        self.assertEquals(lookup.queries, 3)
+
+        inst = column.Column([1, float('nan'), 'A'])
+        self.assertEquals(inst.isin(Lookup({'A'})).tolist(),
+            [False, False, True])
+
+    def test_delete(self):
+        '''Test deleting single and multiple indexes'''
+
+        inst = column.Column(range(10))
+        del inst[0]
+        inst.delete([8, 4, 2])
+        self.assertEquals(inst, [1, 2, 4, 6, 7, 8])
+        self.assertEquals(inst.take([5, 0]), [8, 1])
+
+    def test_serialization(self):
+        '''Test data serialization via `__json__` and deserialization'''
+
+        inst = column.Column(['A', 'B'])
+        serialized = inst.__json__()
+        self.assertEquals(serialized, {
+            '__name__': 'column',
+            '__data__': ['A', 'B']})
+
+        self.assertEquals(inst.loadjson(serialized['__data__']), inst)
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(ColumnTest('test_promotion'))
+    suite.addTest(ColumnTest('test_missing'))
+    suite.addTest(ColumnTest('test_strings'))
+    suite.addTest(ColumnTest('test_isin'))
+    suite.addTest(ColumnTest('test_delete'))
+    suite.addTest(ColumnTest('test_serialization'))
@@ -0,0 +1,24 @@
+'''
+    Unittests/Objects
+    _________________
+
+    Test suite for the custom data objects.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+from . import matched, protein, run
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    matched.add_tests(suite)
+    protein.add_tests(suite)
+    run.add_tests(suite)
@@ -0,0 +1,164 @@
+'''
+    Unittests/Objects/matched
+    _________________________
+
+    Test suite for the vectorized columnar paths of the matched
+    DataTable, against the row-wise list storage.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import unittest
+
+from collections import defaultdict
+
+from xldlib.objects import matched
+
+# DATA
+# ----
+
+ROWS = [
+    {'id': 'P02769', 'num': 4, 'score': 12.5, 'start': 25},
+    {'id': 'P68082', 'num': 2, 'score': 30.},
+    {'id': 'P02769', 'num': 4, 'score': 8., 'start': 161},
+    {'id': 'Q00001', 'num': 1, 'score': 30., 'start': 7},
+    {'id': 'P68082', 'num': 2, 'score': 14., 'start': 90},
+    {'id': 'P02769', 'num': 3, 'score': 12.5, 'start': 25},
+]
+
+
+# HELPERS
+# -------
+
+
+def newtable(columns):
+    '''Returns a DataTable with the matched `columns` storage'''
+
+    table = matched.DataTable()
+    table['matched'] = columns
+    table.setfromdicts(ROWS)
+    return table
+
+
+def getmatched(table):
+    '''Returns the sorted columns, as lists'''
+
+    return sorted((k, list(v)) for k, v in table['matched'].items())
+
+
+def getitems(grouped):
+    '''Returns the ordered groups, with the type for each key'''
+
+    return [(key, type(key), value) for key, value in grouped.items()]
+
+
+# CASES
+# -----
+
+
+class DataTableTest(unittest.TestCase):
+    '''Test the columnar DataTable matches the list DataTable'''
+
+    def setUp(self):
+        '''Set up unittests'''
+
+        self.columns = newtable(matched.ColumnTable())
+        self.lists = newtable(defaultdict(list))
+
+    def test_storage(self):
+        '''Test the columnar storage holds the same values'''
+
+        columns = self.columns['matched']
+        self.assertTrue(all(matched.iscolumn(i) for i in columns.values()))
+        self.assertEquals(columns['num'].kind, 'int')
+        self.assertEquals(columns['id'].kind, 'str')
+
+        # the NaN placeholder does not convert the starts to float
+        self.assertEquals(columns['start'][0], 25)
+        self.assertIsInstance(columns['start'][0], int)
+        self.assertEquals(str(getmatched(self.columns)),
+            str(getmatched(self.lists)))
+
+    def test_groupby(self):
+        '''Test grouping with and without fields and for an index subset'''
+
+        for column in ('num', 'id', 'score', 'start'):
+            for indexes in (None, [5, 0, 3, 2], []):
+                for fields in (None, ['id', 'score']):
+                    grouped = self.columns.groupby(column, indexes, fields)
+                    expected = self.lists.groupby(column, indexes, fields)
+                    self.assertEquals(str(getitems(grouped)),
+                        str(getitems(expected)))
+
+        grouped = self.columns.groupby('id')
+        self.assertEquals(list(grouped), ['P02769', 'P68082', 'Q00001'])
+        self.assertEquals(grouped['P68082'], [1, 4])
+
+        grouped = self.columns.groupby('num', [5, 0, 3, 2], ['score'])
+        self.assertEquals(list(grouped), [3, 4, 1])
+        self.assertEquals(grouped[4], [(0, 12.5), (2, 8.)])
+
+    def test_findrows(self):
+        '''Test finding the rows with values within a lookup'''
+
+        for column, lookup in (('id', {'P68082', 'Q00001', 'P00000'}),
+                ('num', {2, 3}),
+                ('score', {30., 12.5}),
+                ('start', {25})):
+            rows = list(self.columns.findrows(column, lookup))
+            self.assertEquals(rows, list(self.lists.findrows(column, lookup)))
+
+        self.assertEquals(list(self.columns.findrows('id', {'P68082'})),
+            [1, 4])
+
+    def test_getcolumn(self):
+        '''Test extracting single and multiple columns'''
+
+        rows = [4, 0, 2]
+        for column in ('id', 'num', 'start'):
+            values = list(self.columns.getcolumn(rows, column))
+            self.assertEquals(values, list(self.lists.getcolumn(rows, column)))
+            self.assertEquals([type(i) for i in values],
+                [type(i) for i in self.lists.getcolumn(rows, column)])
+
+        columns = ['id', 'score']
+        for asdict in (False, True):
+            values = list(self.columns.getcolumn(rows, columns, asdict))
+            expected = list(self.lists.getcolumn(rows, columns, asdict))
+            self.assertEquals(values, expected)
+
+        self.assertEquals(list(self.columns.getcolumn(iter(rows), columns)),
+            [['P68082', 14.], ['P02769', 12.5], ['P02769', 8.]])
+
+    def test_deleterows(self):
+        '''Test deleting descending rows at once and other rows in order'''
+
+        # descending rows delete from each column at once
+        self.columns.deleterows([5, 3, 0])
+        self.lists.deleterows([5, 3, 0])
+        self.assertEquals(str(getmatched(self.columns)),
+            str(getmatched(self.lists)))
+        self.assertEquals(self.columns['matched']['num'], [2, 4, 2])
+
+        # other rows are deleted sequentially, shifting later rows
+        self.columns.deleterows([0, 1])
+        self.lists.deleterows([0, 1])
+        self.assertEquals(str(getmatched(self.columns)),
+            str(getmatched(self.lists)))
+        self.assertEquals(self.columns['matched']['id'], ['P02769'])
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(DataTableTest('test_storage'))
+    suite.addTest(DataTableTest('test_groupby'))
+    suite.addTest(DataTableTest('test_findrows'))
+    suite.addTest(DataTableTest('test_getcolumn'))
+    suite.addTest(DataTableTest('test_deleterows'))
@@ -0,0 +1,24 @@
+'''
+    Unittests/Objects/Protein
+    _________________________
+
+    Test suite for the protein datasets.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+from . import mowse, sequence, suffix_array
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    mowse.add_tests(suite)
+    sequence.add_tests(suite)
+    suffix_array.add_tests(suite)
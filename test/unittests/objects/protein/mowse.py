@@ -0,0 +1,248 @@
+'''
+    Unittests/Objects/Protein/mowse
+    _______________________________
+
+    Test suite for the bulk protein digestion and the binning of
+    peptides into the MOWSE protein x peptide mass grid.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from xldlib import chemical
+from xldlib.chemical import proteins
+from xldlib.chemical.proteins import sequence_tools
+from xldlib.objects.protein import mowse
+from xldlib.resources.parameters import defaults
+
+
+# DATA
+# ----
+
+SEQUENCES = [
+    'MKWVTFISLLLLFSSAYSRGVFRRDTHKSEIAHRFKDLGEEHFKGLVLIAFSQYLQQCPFDEHVK',
+    'MGLSDGEWQQVLNVWGKVEADIAGHGQEVLIRLFTGHPETLEKFDKFKHLK',
+    '',
+    'GHGKGHGKPR',
+    'KPKPRPRAK'
+]
+
+IDS = ['P02769', 'P68082', 'Q00001', 'Q00002', 'Q00003']
+
+
+# HELPERS
+# -------
+
+
+def getrecords(matrix):
+    '''Returns the raw records for each grid cell, in cell order'''
+
+    records = []
+    for proteinindex in matrix.index.proteinrows():
+        for peptideindex in matrix.index.peptiderows():
+            table = matrix.protein.gettable(proteinindex, peptideindex)
+            records.append(table.read().tobytes())
+
+    return records
+
+
+def getcodes(sequence):
+    return np.frombuffer(sequence.encode('ascii'), dtype=np.uint8)
+
+
+def cutsequences(sequences, protease, missed, lengths):
+    '''
+    Returns the (protein index, start, peptide) for the cleaved and
+    concatenated peptides, from `sequence_tools.cut_sequence`.
+    '''
+
+    peptides = []
+    for index, sequence in enumerate(sequences):
+        fragments = list(sequence_tools.cut_sequence(sequence, protease))
+        for position, (__, start, __) in enumerate(fragments):
+            for count in missed:
+                if position + count >= len(fragments):
+                    continue
+                peptide = ''.join(i[0] for i in
+                    fragments[position:position + count + 1])
+                if lengths[0] <= len(peptide) <= lengths[1]:
+                    peptides.append((index, start - 1, peptide))
+
+    return peptides
+
+
+# CASES
+# -----
+
+
+class DigestTest(unittest.TestCase):
+    '''Test the bulk digestion against the per-sequence cleavage'''
+
+    def test_cutsites(self):
+        '''Test the cleaved bonds for C- and N-terminal proteases'''
+
+        trypsin = proteins.ProteolyticEnzyme('Trypsin').enzyme
+        mask = mowse.getcutsites(getcodes('AKPRAKDR'), trypsin)
+        self.assertEquals(np.flatnonzero(mask).tolist(), [3, 5])
+
+        lysn = proteins.ProteolyticEnzyme('Lys-N').enzyme
+        mask = mowse.getcutsites(getcodes('AKPKRK'), lysn)
+        self.assertEquals(np.flatnonzero(mask).tolist(), [0, 2, 4])
+
+        # consecutive sequences are not cleaved across the separator
+        codes, __, __ = mowse.concatenate(['AK', 'PR'])
+        mask = mowse.getcutsites(codes, trypsin)
+        self.assertEquals(np.flatnonzero(mask).tolist(), [])
+
+    def test_digest(self):
+        '''Test the peptides, starts and masses for each protease'''
+
+        missed = range(0, 3)
+        lengths = (2, 30)
+        for name in ('Trypsin', 'Lys-N'):
+            protease = proteins.ProteolyticEnzyme(name)
+            digest = mowse.digestproteins(SEQUENCES, protease,
+                missed, lengths)
+
+            peptides = [i.decode('ascii') for i in digest.sequence]
+            expected = cutsequences(SEQUENCES, protease, missed, lengths)
+            self.assertEquals(list(zip(digest.protein.tolist(),
+                digest.start.tolist(), peptides)), expected)
+
+            self.assertEquals(digest.length.tolist(),
+                [len(i) for i in peptides])
+            masses = [chemical.Molecule(peptide=i).mass for i in peptides]
+            self.assertTrue(np.allclose(digest.mass, masses))
+
+    def test_unknown(self):
+        '''Test peptides with unknown residues are removed'''
+
+        protease = proteins.ProteolyticEnzyme('Trypsin')
+        digest = mowse.digestproteins(['PEPTIDEKAEXTIDEKLIGHTR'], protease,
+            range(0, 2), (1, 50))
+        self.assertEquals(digest.sequence, [b'PEPTIDEK', b'LIGHTR'])
+
+    def test_proteinmasses(self):
+        '''Test the protein masses match the molecular formulas'''
+
+        sequences = [i for i in SEQUENCES if i]
+        masses = mowse.getproteinmasses(sequences)
+        expected = [chemical.Molecule(peptide=i).mass for i in sequences]
+        self.assertTrue(np.allclose(masses, expected))
+
+
+class MowseMatrixTest(unittest.TestCase):
+    '''Test binning the digested peptides into the mass grid'''
+
+    def setUp(self):
+        '''Set up unittests'''
+
+        self.directory = tempfile.mkdtemp()
+        self.database = self.newdatabase('mowse.h5')
+        self.chunksize = mowse.CHUNK_SIZE
+        self.multiprocessing = defaults.DEFAULTS['use_multiprocessing']
+
+    def tearDown(self):
+        '''Tear down unittests'''
+
+        mowse.CHUNK_SIZE = self.chunksize
+        defaults.DEFAULTS['use_multiprocessing'] = self.multiprocessing
+        self.database.close()
+        shutil.rmtree(self.directory)
+
+    def newdatabase(self, name):
+        database = mowse.MowseDatabase()
+        database.new(0, 15000, path=os.path.join(self.directory, name))
+        return database
+
+    def test_addproteins(self):
+        '''Test the counts and cell tables, accumulated over chunks'''
+
+        # use multiple chunks, to accumulate the counts before writing
+        mowse.CHUNK_SIZE = 2
+        protease = proteins.ProteolyticEnzyme('Trypsin')
+        self.database.addproteins(IDS, SEQUENCES, protease)
+
+        matrix = self.database.mowsematrix
+        index = matrix.index
+        counts = matrix.getcounts().read()
+        self.assertEquals(counts.shape, (2, 98))
+
+        digest = mowse.digestproteins(SEQUENCES, protease)
+        peptiderows = (digest.mass // index.scale.peptide).astype(int)
+        inrange = (peptiderows >= index.min.peptide) & \
+            (peptiderows <= index.max.peptide)
+        self.assertEquals(counts.sum(), inrange.sum())
+        # all proteins are below 10 kDa
+        self.assertEquals(counts[1].sum(), 0)
+
+        for peptideindex in index.peptiderows():
+            table = matrix.protein.gettable(0, peptideindex)
+            count = counts[0, peptideindex - index.min.peptide]
+            self.assertEquals(table.nrows, count)
+            if count:
+                records = table.read()
+                rows = (records['mass'] // index.scale.peptide).astype(int)
+                self.assertTrue((rows == peptideindex).all())
+
+        records = np.concatenate([i.read() for i in
+            matrix.protein.getgroup('0')._f_iter_nodes()])
+        peptides = sorted(zip(records['id'].tolist(),
+            records['sequence'].tolist(), records['start'].tolist()))
+        expected = sorted((IDS[p].encode('ascii'), s, i + 1) for p, s, i, k
+            in zip(digest.protein.tolist(), digest.sequence,
+            digest.start.tolist(), inrange.tolist()) if k)
+        self.assertEquals(peptides, expected)
+
+        # adding proteins to an existing database adds to the counts
+        self.database.addproteins(IDS[:1], SEQUENCES[:1], protease)
+        added = matrix.getcounts().read() - counts
+        self.assertEquals(added.sum(), sum(p == 0 and k for p, k in
+            zip(digest.protein.tolist(), inrange.tolist())))
+
+
+    def test_multiprocessing(self):
+        '''Test digesting the chunks in worker processes is deterministic'''
+
+        mowse.CHUNK_SIZE = 2
+        protease = proteins.ProteolyticEnzyme('Lys-N')
+        defaults.DEFAULTS['use_multiprocessing'] = False
+        self.database.addproteins(IDS, SEQUENCES, protease)
+
+        defaults.DEFAULTS['use_multiprocessing'] = True
+        database = self.newdatabase('multiprocessing.h5')
+        try:
+            database.addproteins(IDS, SEQUENCES, protease)
+            self.assertFalse(hasattr(database, 'pool'))
+
+            serial = self.database.mowsematrix
+            matrix = database.mowsematrix
+            self.assertTrue(serial.getcounts().read().any())
+            self.assertEquals(matrix.getcounts().read().tolist(),
+                serial.getcounts().read().tolist())
+            self.assertEquals(getrecords(matrix), getrecords(serial))
+        finally:
+            database.close()
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(DigestTest('test_cutsites'))
+    suite.addTest(DigestTest('test_digest'))
+    suite.addTest(DigestTest('test_unknown'))
+    suite.addTest(DigestTest('test_proteinmasses'))
+    suite.addTest(MowseMatrixTest('test_addproteins'))
+    suite.addTest(MowseMatrixTest('test_multiprocessing'))
@@ -0,0 +1,126 @@
+'''
+    Unittests/Objects/Protein/sequence
+    __________________________________
+
+    Test suite for the bulk FASTA imports and lazy lookups of the
+    protein database.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import os
+import shutil
+import tempfile
+import unittest
+
+from xldlib.objects.protein.database import sequence
+
+# DATA
+# ----
+
+FASTA = (b'>sp|P02769|ALBU_BOVIN Serum albumin OS=Bos taurus\n'
+    b'MKWVTFISLL\nLLFSSAYS\n'
+    b'>gi|160332366|sp|P46406.3|G3P_RABIT RecName: Full=GAPDH\n'
+    b'MVKVGVNGFGRIGR\n'
+    b'>tr|Q8N1N2|Q8N1N2_HUMAN Uncharacterized protein\n'
+    b'MASTK\n'
+    b'>ref|NP_001035258.1| ferritin\n'
+    b'MTTAS\n')
+
+
+# CASES
+# -----
+
+
+class ProteinTableTest(unittest.TestCase):
+    '''Test bulk importing FASTA files and looking up the proteins'''
+
+    def setUp(self):
+        '''Set up unittests'''
+
+        self.directory = tempfile.mkdtemp()
+        self.fasta = os.path.join(self.directory, 'proteins.fasta')
+        with open(self.fasta, 'wb') as f:
+            f.write(FASTA)
+
+        self.path = os.path.join(self.directory, 'proteins.sqlite')
+        self.proteins = sequence.ProteinTable(new=True, path=self.path,
+            set_mapping=True)
+
+    def tearDown(self):
+        '''Tear down unittests'''
+
+        self.proteins.close()
+        shutil.rmtree(self.directory)
+
+    def getrows(self, table, columns):
+        sqlquery = 'SELECT {0} FROM {1} ORDER BY IntegerID'.format(
+            ', '.join(columns), table)
+        return [tuple(i.value(j) for j in range(len(columns)))
+            for i in self.proteins.fetchiter(sqlquery)]
+
+    def test_importfasta(self):
+        '''Test only the Swiss-Prot records are imported'''
+
+        self.proteins.importfasta(self.fasta)
+
+        # the Qt connection stays open at the same file
+        self.assertTrue(self.proteins.db.isOpen())
+        self.assertEquals(self.proteins.path, self.path)
+
+        columns = ('Name', 'UniProtID', 'Mnemonic', 'Sequence', 'Length')
+        self.assertEquals(self.getrows('Proteins', columns), [
+            ('Serum albumin OS=Bos taurus', 'P02769', 'ALBU_BOVIN',
+                'MKWVTFISLLLLFSSAYS', 18),
+            ('RecName: Full=GAPDH', 'P46406', 'G3P_RABIT',
+                'MVKVGVNGFGRIGR', 14)
+        ])
+
+        # name tables only store the name and ID
+        self.proteins.importfasta(self.fasta, 'named')
+        self.assertEquals(self.getrows('Named', ('Name', 'UniProtID')), [
+            ('Serum albumin OS=Bos taurus', 'P02769'),
+            ('RecName: Full=GAPDH', 'P46406')
+        ])
+
+    def test_lookup(self):
+        '''Test the lookups map to the IntegerID, after bulk inserts'''
+
+        lookup = self.proteins.mapping['proteins']
+        self.assertNotIn('P46406', lookup)
+
+        self.proteins.importfasta(self.fasta)
+        self.assertIn('P46406', lookup)
+        self.assertEquals(lookup['P02769'], 1)
+        self.assertEquals(lookup['G3P_RABIT'], 2)
+        self.assertEquals(sorted(lookup), ['ALBU_BOVIN', 'G3P_RABIT',
+            'P02769', 'P46406'])
+        self.assertEquals(len(lookup), 4)
+        self.assertIsNone(lookup.get('Q8N1N2'))
+
+        names = self.proteins.get_lookup('Proteins', 'Name')
+        self.assertEquals(names['P46406'], 'RecName: Full=GAPDH')
+
+    def test_insert(self):
+        '''Test the insert is rolled back on an error'''
+
+        rows = [('Serum albumin', 'P02769'), ('Invalid',)]
+        self.assertRaises(Exception, self.proteins.insert, rows, 'Named')
+        self.assertEquals(self.getrows('Named', ('UniProtID',)), [])
+
+        # the Qt connection is still writeable
+        self.proteins.set_limited(sequence.LimitedDatabase['Mild'])
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(ProteinTableTest('test_importfasta'))
+    suite.addTest(ProteinTableTest('test_lookup'))
+    suite.addTest(ProteinTableTest('test_insert'))
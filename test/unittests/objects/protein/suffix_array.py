@@ -0,0 +1,89 @@
+'''
+    Unittests/Objects/Protein/suffix_array
+    ______________________________________
+
+    Test suite for the peptide to protein position index.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from xldlib.objects.protein import suffix_array
+
+
+# CASES
+# -----
+
+
+class ProteinIndexTest(unittest.TestCase):
+    '''Test mapping peptides to protein start positions'''
+
+    def setUp(self):
+        '''Set up unittests'''
+
+        self.sequences = {
+            'P02769': 'MKWVTFISLLLLFSSAYSRGVFRRDTHKSEIAHRFKDLGEEHFK',
+            'P68082': 'MGLSDGEWQQVLNVWGKVEADIAGHGQEVLIRLFTGHPETLEK',
+            'Q00001': 'GHGKGHGK'
+        }
+        self.index = suffix_array.ProteinIndex(self.sequences)
+
+    def test_suffixes(self):
+        '''Test the suffix array sorts all suffixes of the text'''
+
+        text = self.index.text
+        expected = sorted(range(len(text)), key=lambda i: text[i:])
+        self.assertEquals(self.index.suffixes.tolist(), expected)
+
+    def test_starts(self):
+        '''Test finding all peptide starts within each protein'''
+
+        self.assertEquals(self.index.getstarts('GHGK', 'Q00001'), [0, 4])
+        self.assertEquals(self.index.getstarts('HGK', 'Q00001'), [1, 5])
+        self.assertEquals(self.index.getstarts('GHGQ', 'P68082'), [23])
+        self.assertEquals(self.index.getstarts('GHGQ', 'P02769'), [])
+        # peptides cannot match across consecutive proteins
+        self.assertEquals(self.index.getstarts('EKGHG', 'P68082'), [])
+
+        proteins, starts = self.index.getpositions('FK')
+        self.assertEquals(len(proteins), 2)
+        self.assertEquals(sorted(starts.tolist()), [34, 42])
+
+        with self.assertRaises(KeyError):
+            self.index.getstarts('GHGK', 'P00000')
+
+    def test_cache(self):
+        '''Test storing and loading the suffix array from disk'''
+
+        directory = tempfile.mkdtemp()
+        try:
+            stored = suffix_array.ProteinIndex.fromcache(self.sequences,
+                directory)
+            self.assertEquals(len(os.listdir(directory)), 1)
+
+            loaded = suffix_array.ProteinIndex.fromcache(self.sequences,
+                directory)
+            self.assertTrue(np.array_equal(stored.suffixes, loaded.suffixes))
+            self.assertEquals(loaded.getstarts('GHGK', 'Q00001'), [0, 4])
+        finally:
+            shutil.rmtree(directory)
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(ProteinIndexTest('test_suffixes'))
+    suite.addTest(ProteinIndexTest('test_starts'))
+    suite.addTest(ProteinIndexTest('test_cache'))
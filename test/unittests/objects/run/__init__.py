@@ -0,0 +1,23 @@
+'''
+    Unittests/Objects/Run
+    _____________________
+
+    Test suite for the runtime spectral dataset.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+from . import columnar, dataset
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    columnar.add_tests(suite)
+    dataset.add_tests(suite)
@@ -0,0 +1,104 @@
+'''
+    Unittests/Objects/Run/columnar
+    ______________________________
+
+    Test suite for the columnar scan layout.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import unittest
+
+import numpy as np
+
+from xldlib.objects.run import columnar, dataset
+from xldlib.utils.io_ import high_level
+
+
+# CASES
+# -----
+
+
+class ColumnarTest(unittest.TestCase):
+    '''Test storing and reading scans from the columnar layout'''
+
+    def setUp(self):
+        '''Set up unittests'''
+
+        self.path = high_level.mkstemp()
+        self.rundata = dataset.RunDataset(False)
+        self.rundata.new(self.path)
+        self.rundata.setattr('layout', columnar.LAYOUT)
+        self.rundata.mode = 1
+
+        self.row = self.rundata.spectra.addrow()
+        self.group = self.row.getgroup('scans')
+        for num in range(1, 31):
+            scan = self.group.newscan(num, retention_time=num / 10.)
+            scan.setattr('ms_level', 2 + num % 2)
+            if num % 2:
+                scan.setattr('precursor_num', num - 1)
+                scan.create_array('mz', obj=np.arange(num, num + 3.))
+                scan.create_array('intensity', obj=np.ones(3))
+        self.group.flush()
+
+    def tearDown(self):
+        '''Tear down unittests'''
+
+        self.rundata.close()
+        high_level.remove_file(self.path)
+
+    def test_scans(self):
+        '''Test reading scan metadata and peak lists'''
+
+        self.assertTrue(self.group.iscolumnar())
+        self.assertEquals(len(self.group), 30)
+        self.assertEquals(sorted(self.group, key=int)[:3], ['1', '2', '3'])
+
+        scan = self.group.getscan('5')
+        self.assertEquals(scan.getattrs(['num', 'precursor_num']), [5, 4])
+        self.assertEquals(scan.mz[:].tolist(), [5., 6., 7.])
+        self.assertEquals(scan.intensity[:].tolist(), [1., 1., 1.])
+
+        scan = self.group.getscan(6)
+        self.assertFalse(scan.hasattr('precursor_num'))
+        with self.assertRaises(AttributeError):
+            scan.getattr('precursor_num')
+        with self.assertRaises(AttributeError):
+            scan.mz
+
+        scan.setattr('precursor_mz', 500.25)
+        self.assertEquals(self.group.getscan(6).getattr('precursor_mz'),
+            500.25)
+
+        self.assertEquals(self.group.get('31'), None)
+        with self.assertRaises(KeyError):
+            self.group.getscan('31')
+
+        self.assertEquals(list(self.group.findscan(10)), [9, 8, 7, 6, 5, 4,
+            3, 2, 1])
+
+    def test_delevel(self):
+        '''Test separating a hierarchical level shares the peak lists'''
+
+        self.row.delevel()
+        precursor = self.row.getgroup('precursor')
+        product = self.row.getgroup('product')
+
+        self.assertEquals(len(precursor), 15)
+        self.assertEquals(len(product), 15)
+        self.assertEquals(product.getscan('9').mz[:].tolist(), [9., 10., 11.])
+        self.assertFalse(precursor.hasgroup('9'))
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(ColumnarTest('test_scans'))
+    suite.addTest(ColumnarTest('test_delevel'))
@@ -0,0 +1,57 @@
+'''
+    Unittests/Objects/Run/dataset
+    _____________________________
+
+    Test suite for the scan number index.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import unittest
+
+from xldlib.objects.run import dataset
+
+
+# CASES
+# -----
+
+
+class ScanIndexTest(unittest.TestCase):
+    '''Test preceding scan lookups from the scan number index'''
+
+    def setUp(self):
+        '''Set up unittests'''
+
+        self.index = dataset.ScanIndex([12, 1, 2, 3, 7, 8, 9, 10, 30], 5)
+
+    def test_findscan(self):
+        '''Test finding the sequential scans preceding a scan'''
+
+        self.assertEquals(list(self.index.findscan(11)), [10, 9, 8, 7])
+        self.assertEquals(list(self.index.findscan(13)), [12])
+        self.assertEquals(list(self.index.findscan(4)), [3, 2, 1])
+        self.assertEquals(list(self.index.findscan(10, 2)), [9])
+        self.assertEquals(list(self.index.findscan(1)), [])
+        self.assertEquals(list(self.index.findscan(20)), [])
+
+    def test_parents(self):
+        '''Test the nearest preceding scan for a series of scans'''
+
+        self.assertEquals(self.index.getparent(11), 10)
+        self.assertEquals(self.index.getparent(28), None)
+
+        parents = self.index.getparents([11, 28, 1, 31, 4])
+        self.assertEquals(parents.tolist(), [10, -1, -1, 30, 3])
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(ScanIndexTest('test_findscan'))
+    suite.addTest(ScanIndexTest('test_parents'))
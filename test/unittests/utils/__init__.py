@@ -9,7 +9,7 @@
 '''
 
 # load modules/submodules
-from . import bio, decorators, io_, logger, masstools, signals
+from . import bio, decorators, io_, logger, masstools, math_, signals
 
 # SUITE
 # -----
@@ -23,4 +23,5 @@ def add_tests(suite):
     io_.add_tests(suite)
     logger.add_tests(suite)
     masstools.add_tests(suite)
+    math_.add_tests(suite)
     signals.add_tests(suite)
@@ -10,6 +10,8 @@
 
 # load modules/submodules
 import os
+import shutil
+import tempfile
 import unittest
 
 from xldlib.resources import paths
@@ -26,6 +28,15 @@ UNIPROT_FASTA = {
     'sequence': SEQUENCE
 }
 
+UNIPROT_RECORD = fasta.Record('P02769',
+    'sp|P02769|ALBU_BOVIN Serum albumin OS=Bos taurus GN=ALB PE=1 SV=4',
+    SEQUENCE)
+
+MIXED_FASTA = (b'>gi|160332366|sp|P46406.3|G3P_RABIT RecName\n'
+    b'MVKVGVNG\nFGRIGR-LV\n'
+    b'>P02769 Serum albumin\r\nMKWVTF\r\nISLL*LLFSS\r\n'
+    b'>sp|P02769|ALBU_BOVIN\n')
+
 
 # CASES
 # -----
@@ -59,6 +70,58 @@ class ParseTest(unittest.TestCase):
         del self.path
 
 
+class ReaderTest(unittest.TestCase):
+    '''Test block reading FASTA files into compact records'''
+
+    def setUp(self):
+        '''Set up unittests'''
+
+        home = paths.DIRS['home']
+        self.path = os.path.join(home, 'test', 'files')
+        self.directory = tempfile.mkdtemp()
+
+    def test_read(self):
+        '''Test FASTA block reading for each file'''
+
+        files = [
+            os.path.join(self.path, 'bio', 'file.fasta'),
+            os.path.join(self.path, 'bio', 'file.fasta.gz'),
+            os.path.join(self.path, 'bio', 'file.fasta.bz2')
+        ]
+        for path in files:
+            with fasta.Reader(path) as reader:
+                self.assertEquals(list(reader), [UNIPROT_RECORD])
+                self.assertEquals(reader.grammar.name, 'uniprot')
+
+    def test_blocks(self):
+        '''Test records split across block boundaries and header grammars'''
+
+        path = os.path.join(self.directory, 'mixed.fasta')
+        with open(path, 'wb') as f:
+            f.write(MIXED_FASTA)
+
+        for blocksize in (1, 16, 1024):
+            with fasta.Reader(path, blocksize) as reader:
+                records = list(reader)
+                self.assertEquals([i.accession for i in records],
+                    ['P46406', 'P02769', 'P02769'])
+                self.assertEquals([i.sequence for i in records],
+                    ['MVKVGVNGFGRIGRLV', 'MKWVTFISLL', ''])
+                self.assertEquals(records[1].header, 'P02769 Serum albumin')
+                self.assertEquals(reader.grammar.name, 'uniprot')
+
+    def test_closed(self):
+        '''Test iterating a closed reader raises an error'''
+
+        reader = fasta.Reader()
+        self.assertRaises(ValueError, iter, reader)
+
+    def tearDown(self):
+        '''Tear down unittests'''
+
+        shutil.rmtree(self.directory)
+
+
 # SUITE
 # -----
 
@@ -67,3 +130,6 @@ def add_tests(suite):
     '''Add tests to the unittest suite'''
 
     suite.addTest(ParseTest('test_parse'))
+    suite.addTest(ReaderTest('test_read'))
+    suite.addTest(ReaderTest('test_blocks'))
+    suite.addTest(ReaderTest('test_closed'))
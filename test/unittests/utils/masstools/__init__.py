@@ -9,7 +9,7 @@
 '''
 
 # load modules/submodules
-from . import charged_mass
+from . import charged_mass, formula
 
 
 # TESTS
@@ -20,3 +20,4 @@ def add_tests(suite):
     '''Add tests to the unittest suite'''
 
     charged_mass.add_tests(suite)
+    formula.add_tests(suite)
@@ -0,0 +1,70 @@
+'''
+    Unittests/Utils/Masstools/formula
+    _________________________________
+
+    Unittests for the memoized crosslinked peptide masses.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import unittest
+
+from namedlist import namedlist
+
+from xldlib.utils.masstools import formula
+
+
+# OBJECTS
+# -------
+
+Formula = namedlist("Formula", "mass")
+
+
+# CASES
+# -----
+
+
+class MassTableTest(unittest.TestCase):
+    '''Test memoizing peptide and link masses'''
+
+    def setUp(self):
+        self.table = formula.MassTable()
+
+    def test_peptide(self):
+        '''Test peptide masses are cached by the matched row'''
+
+        value = self.table.getpeptide(3, Formula(1000.5), {'neutralloss': -18.})
+        self.assertEquals(value, (1000.5, -18.))
+        self.assertEquals(self.table.misses, 1)
+
+        value = self.table.getpeptide(3, Formula(0.), {'neutralloss': 0.})
+        self.assertEquals(value, (1000.5, -18.))
+        self.assertEquals(self.table.hits, 1)
+
+    def test_link(self):
+        '''Test link masses are calculated once per key'''
+
+        calls = []
+        function = lambda ends: calls.append(ends) or 2 * ends
+
+        for __ in range(3):
+            self.assertEquals(self.table.getlink('key', function, 100.), 200.)
+        self.assertEquals(len(calls), 1)
+        self.assertEquals((self.table.hits, self.table.misses), (2, 1))
+
+        self.table.clear()
+        self.assertEquals(len(self.table), 0)
+        self.assertEquals(self.table.hits, 0)
+
+
+# TESTS
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(MassTableTest('test_peptide'))
+    suite.addTest(MassTableTest('test_link'))
@@ -0,0 +1,21 @@
+'''
+    Unittests/Utils/Math_
+    _____________________
+
+    Test suite for numerical helper functions.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+from . import array
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    array.add_tests(suite)
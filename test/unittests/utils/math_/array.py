@@ -0,0 +1,66 @@
+'''
+    Unittests/Utils/Math_/array
+    ___________________________
+
+    Test suite for vectorized array helpers.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import unittest
+
+import numpy as np
+
+from xldlib.utils.math_ import array
+
+
+# CASES
+# -----
+
+
+class ExpandRangesTest(unittest.TestCase):
+    '''Test expanding half-open ranges to the owners and positions'''
+
+    def test_expandranges(self):
+        '''Test expanding ranges, including empty ranges'''
+
+        starts = np.array([0, 2, 2, 5])
+        ends = np.array([2, 2, 4, 6])
+        owners, positions = array.expandranges(starts, ends)
+
+        self.assertEquals(owners.tolist(), [0, 0, 2, 2, 3])
+        self.assertEquals(positions.tolist(), [0, 1, 2, 3, 5])
+
+    def test_loop(self):
+        '''Test the expanded ranges match a Python loop'''
+
+        state = np.random.RandomState(7)
+        starts = state.randint(0, 50, 100)
+        ends = starts + state.randint(0, 5, 100)
+        owners, positions = array.expandranges(starts, ends)
+
+        expected = [(i, j) for i, (start, end) in enumerate(zip(starts, ends))
+            for j in range(start, end)]
+        self.assertEquals(list(zip(owners.tolist(), positions.tolist())),
+            expected)
+
+    def test_empty(self):
+        '''Test expanding no ranges, from lists'''
+
+        owners, positions = array.expandranges([], [])
+        self.assertEquals(owners.size, 0)
+        self.assertEquals(positions.size, 0)
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(ExpandRangesTest('test_expandranges'))
+    suite.addTest(ExpandRangesTest('test_loop'))
+    suite.addTest(ExpandRangesTest('test_empty'))
@@ -9,7 +9,8 @@
 '''
 
 # load modules/submodules
-from . import matched, tools
+from . import (batch, link_finder, matched, ms1quantitation,
+    peptide_database, scan_linkers, spectra, tools)
 
 
 # SUITE
@@ -19,5 +20,11 @@ from . import matched, tools
 def add_tests(suite):
     '''Add tests to the unittest suite'''
 
+    batch.add_tests(suite)
+    link_finder.add_tests(suite)
     matched.add_tests(suite)
+    ms1quantitation.add_tests(suite)
+    peptide_database.add_tests(suite)
+    scan_linkers.add_tests(suite)
+    spectra.add_tests(suite)
     tools.add_tests(suite)
@@ -0,0 +1,174 @@
+'''
+    Unittests/XlPy/batch
+    ____________________
+
+    Test suite for the headless batch runner manifests, parameters and
+    shards.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from xldlib.resources import chemical_defs
+from xldlib.resources.parameters import input_files
+from xldlib.xlpy import batch
+
+
+# DATA
+# ----
+
+MANIFEST = {
+    "type": "level_separated",
+    "mode": "default",
+    "files": {
+        "Precursor Scans": ["/data/run1_d.mgf", "/data/run2_d.mgf"],
+        "Product Scans": ["/data/run1_c.mgf", "/data/run2_c.mgf"],
+        "Matched Output": ["/data/run1.txt", "/data/run2.txt"]
+    }
+}
+
+
+# HELPERS
+# -------
+
+
+def dump(directory, name, data):
+    path = os.path.join(directory, name)
+    with open(path, 'w') as f:
+        json.dump(data, f)
+    return path
+
+
+# CASES
+# -----
+
+
+class LoaderTest(unittest.TestCase):
+    '''Test loading input manifests and parameter profiles'''
+
+    def setUp(self):
+        '''Set up unittests'''
+
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        '''Tear down unittests'''
+
+        shutil.rmtree(self.directory)
+
+    def test_manifest(self):
+        '''Test loading an input manifest as an InputFilesTable'''
+
+        table = batch.loadmanifest(dump(self.directory, 'run.json', MANIFEST))
+        self.assertEquals(table.type,
+            input_files.INPUT_FILE_TYPES['level_separated'])
+        self.assertTrue(table.default)
+        self.assertEquals(table.length, 2)
+        self.assertEquals(table['Matched Output'],
+            ["/data/run1.txt", "/data/run2.txt"])
+
+    def test_parameters(self):
+        '''Test loading crosslinkers, by name or ID, and the profile'''
+
+        path = dump(self.directory, 'dsso.json', {
+            "crosslinkers": ["DSSO"],
+            "profile": 1,
+            "reporterion_quantitation": False
+        })
+        kwds, reporterions = batch.loadparameters(path)
+
+        ids = batch.getcrosslinkerids('DSSO')
+        self.assertEquals(ids, batch.getcrosslinkerids(ids[0]))
+        self.assertEquals(sorted(kwds['crosslinkers']), ids)
+        self.assertEquals(kwds['profile'], chemical_defs.PROFILES[1])
+        self.assertTrue(kwds['fragments'])
+        self.assertFalse(reporterions)
+
+    def test_unknown(self):
+        '''Test unrecognized crosslinkers raise a KeyError'''
+
+        self.assertRaises(KeyError, batch.getcrosslinkerids, 'Unknown')
+        self.assertNotIn('Unknown', chemical_defs.CROSSLINKERS.names)
+        self.assertRaises(KeyError, batch.getcrosslinkerids, 10**6)
+
+        path = dump(self.directory, 'unknown.json',
+            {"crosslinkers": ["Unknown"]})
+        self.assertRaises(KeyError, batch.loadparameters, path)
+
+
+class ShardTest(unittest.TestCase):
+    '''Test splitting manifests by row and merging failed shards'''
+
+    def setUp(self):
+        '''Set up unittests'''
+
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        '''Tear down unittests'''
+
+        shutil.rmtree(self.directory)
+
+    def test_splitmanifest(self):
+        '''Test each row is split into a single-row manifest'''
+
+        table = input_files.InputFilesTable.loadjson(MANIFEST)
+        manifests = list(batch.splitmanifest(table))
+
+        self.assertEquals(len(manifests), 2)
+        for row, manifest in enumerate(manifests):
+            self.assertEquals(manifest['files'], {k: [v[row]]
+                for k, v in MANIFEST['files'].items()})
+
+            shard = input_files.InputFilesTable.loadjson(manifest)
+            self.assertEquals(shard.length, 1)
+            self.assertEquals(shard.type, table.type)
+            self.assertEquals(shard.mode, table.mode)
+
+    def test_mergeshards(self):
+        '''Test crashed and failed shards are reported, and not merged'''
+
+        directories = [os.path.join(self.directory, str(i)) for i in range(2)]
+        os.makedirs(directories[0])
+        dump(directories[0], 'report.json', {
+            'completed': False,
+            'errors': ['Matched file not found'],
+            'time': 2.,
+            'peak_rss': 1024,
+            'stages': []
+        })
+
+        outdir = os.path.join(self.directory, 'merged')
+        report = batch.mergeshards(directories, outdir, False, [1, -11])
+
+        self.assertFalse(report['completed'])
+        self.assertEquals(report['failed'], directories)
+        self.assertEquals(len(report['errors']), 2)
+        self.assertEquals(report['errors'][0], 'Matched file not found')
+        self.assertIn('-11', report['errors'][1])
+        self.assertEquals(report['time'], 2.)
+        self.assertEquals(report['peak_rss'], 1024)
+
+        with open(os.path.join(outdir, 'report.json')) as f:
+            self.assertEquals(json.load(f), report)
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(LoaderTest('test_manifest'))
+    suite.addTest(LoaderTest('test_parameters'))
+    suite.addTest(LoaderTest('test_unknown'))
+    suite.addTest(ShardTest('test_splitmanifest'))
+    suite.addTest(ShardTest('test_mergeshards'))
@@ -0,0 +1,23 @@
+'''
+    Unittests/XlPy/Link_Finder
+    __________________________
+
+    Test suite for the crosslink search modules.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+from . import crosslink, subsetsum
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    crosslink.add_tests(suite)
+    subsetsum.add_tests(suite)
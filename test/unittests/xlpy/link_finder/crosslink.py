@@ -0,0 +1,187 @@
+'''
+    Unittests/XlPy/Link_Finder/crosslink
+    ____________________________________
+
+    Test suite for the vectorized candidate link classification.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import unittest
+
+from xldlib.xlpy.link_finder.search import crosslink
+
+# load objects/functions
+from collections import namedtuple
+
+
+# OBJECTS
+# -------
+
+Ends = namedtuple("Ends", "link dead number")
+
+
+class Scan(namedtuple("Scan", "mass precursor_z z peptide")):
+    '''Precursor scan with a neutral mass, for a simple ppm calculation'''
+
+    def getmz(self):
+        return self.mass
+
+    def getppm(self, theoretical):
+        return (theoretical - self.mass) / self.mass * 1e6
+
+
+# HELPERS
+# -------
+
+
+def newlink(scan, theoretical, number=2, dead=0):
+    '''Returns a new link, with a mass charge of 1 for each link'''
+
+    ends = Ends({'K': number}, {'K': dead}, number)
+    mass = crosslink.Mass(theoretical, scan.mass, theoretical - scan.mass, 1)
+    ppm = crosslink.Ppm(None, set())
+    return crosslink.LinkData(scan, ends, mass, ppm)
+
+
+def newlinks(scan):
+    '''
+    Returns candidate links for the scan, with a charge of 4 from
+    2 links, and 3 from a single link.
+    '''
+
+    mass = scan.mass
+    shift = crosslink.NEUTRON_MASS
+    return [
+        # within the ppm threshold, at the monoisotopic and 3rd isotope
+        newlink(scan, mass),
+        newlink(scan, mass - 2 * shift + 0.001),
+        # ppm match without the matching charge
+        newlink(scan, mass, number=1),
+        # within the mass threshold
+        newlink(scan, mass + 0.3),
+        newlink(scan, mass + 0.3, number=1),
+        # missing peptide, at a lower charge
+        newlink(scan, mass - 800., number=1),
+        newlink(scan, mass - 800.),
+        newlink(scan, mass - 100., number=1),
+        # negative ends
+        newlink(scan, mass, dead=-1),
+        # outside all thresholds
+        newlink(scan, mass + 5.)
+    ]
+
+
+def checklink(checker, link):
+    '''Reference classification, checking each link and isotope in turn'''
+
+    charges = link.getcharges()
+    charge = link.scan.precursor_z
+    if crosslink.isinvalid(link.ends):
+        return None
+
+    matched = checker.relaxcharges == crosslink.STANDARD or charge in charges
+    for isotope in range(checker.isotopes):
+        theoretical = link.mass.theoretical + isotope * crosslink.NEUTRON_MASS
+        ppm = link.scan.getppm(theoretical)
+        link.ppm.set.add(ppm)
+        if abs(ppm) < checker.ppmthreshold and matched:
+            return crosslink.STANDARD
+
+    matched = (checker.relaxcharges == crosslink.LOW_CONFIDENCE or
+        charge in charges)
+    if matched and abs(link.mass.error) < checker.massthreshold:
+        return crosslink.LOW_CONFIDENCE
+
+    if (-link.mass.error > checker.minimum_peptide_mass and
+        any(i < charge for i in charges) and
+        crosslink.ismultiplepeptides(link.scan.peptide)):
+        return crosslink.INCOMPLETE
+
+
+# CASES
+# -----
+
+
+class CheckLinkTest(unittest.TestCase):
+    '''Test classifying all candidate links of a precursor together'''
+
+    def setUp(self):
+        '''Set up unittests'''
+
+        self.checker = crosslink.CheckLink()
+        self.checker.isotopes = 3
+        self.checker.ppmthreshold = 10
+        self.checker.massthreshold = 0.5
+        self.checker.minimum_peptide_mass = 500
+        self.checker.relaxcharges = 'Disabled'
+
+        self.scans = [
+            Scan(2500.25, 4, [1, 1], ['PEPTIDEK', 'KPEPTIDE']),
+            Scan(2500.25, 4, [1, 1], ['PEPTIDEK', 'PEPTIDEK'])
+        ]
+
+    def classify(self, scan):
+        '''Returns the names and ppm sets, classified together and singly'''
+
+        links = newlinks(scan)
+        names = self.checker.classify(links)
+
+        expected = newlinks(scan)
+        expectednames = [checklink(self.checker, i) for i in expected]
+
+        self.assertEquals(names, expectednames)
+        self.assertEquals([i.ppm.set for i in links],
+            [i.ppm.set for i in expected])
+        return names
+
+    def test_classify(self):
+        '''Test the link names, including low confidence and incomplete'''
+
+        standard = crosslink.STANDARD
+        low = crosslink.LOW_CONFIDENCE
+        incomplete = crosslink.INCOMPLETE
+
+        self.assertEquals(self.classify(self.scans[0]), [standard, standard,
+            None, low, None, incomplete, None, None, None, None])
+        # identical peptides cannot be an incomplete link
+        self.assertEquals(self.classify(self.scans[1]), [standard, standard,
+            None, low, None, None, None, None, None, None])
+
+    def test_relaxcharges(self):
+        '''Test relaxing the charge matching for each link type'''
+
+        for relaxcharges in (crosslink.STANDARD, crosslink.LOW_CONFIDENCE):
+            self.checker.relaxcharges = relaxcharges
+            for scan in self.scans:
+                self.classify(scan)
+
+        # the ppm match is still within the mass threshold
+        self.assertEquals(self.classify(self.scans[0])[2:5],
+            [crosslink.LOW_CONFIDENCE] * 3)
+        self.checker.relaxcharges = crosslink.STANDARD
+        self.assertEquals(self.classify(self.scans[0])[2],
+            crosslink.STANDARD)
+
+    def test_single(self):
+        '''Test checking a single link'''
+
+        for link, expected in zip(newlinks(self.scans[0]),
+            newlinks(self.scans[0])):
+            self.assertEquals(self.checker(link),
+                checklink(self.checker, expected))
+            self.assertEquals(link.ppm.set, expected.ppm.set)
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(CheckLinkTest('test_classify'))
+    suite.addTest(CheckLinkTest('test_relaxcharges'))
+    suite.addTest(CheckLinkTest('test_single'))
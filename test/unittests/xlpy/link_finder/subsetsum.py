@@ -0,0 +1,66 @@
+'''
+    Unittests/XlPy/Link_Finder/subsetsum
+    ____________________________________
+
+    Test suite for the meet-in-the-middle subset-sum search.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import itertools as it
+import unittest
+
+from xldlib.xlpy.link_finder import subsetsum
+
+
+# CASES
+# -----
+
+
+class SubsetSumTest(unittest.TestCase):
+    '''Test finding subsets within mass windows'''
+
+    def setUp(self):
+        '''Set up unittests'''
+
+        self.weights = [1200.5, 850.25, 2301.75, 640.0, 1775.5]
+        self.sums = subsetsum.SubsetSums(self.weights)
+
+    def getexpected(self, condition):
+        expected = set()
+        for count in range(len(self.weights) + 1):
+            for indexes in it.combinations(range(len(self.weights)), count):
+                if condition(sum(self.weights[i] for i in indexes)):
+                    expected.add(indexes)
+        return expected
+
+    def test_between(self):
+        '''Test finding all subsets within a window'''
+
+        masks = self.sums.between(2000., 3500.).tolist()
+        found = {subsetsum.getindexes(i) for i in masks}
+
+        self.assertEquals(len(found), len(masks))
+        self.assertEquals(found, self.getexpected(lambda x: 2000 <= x <= 3500))
+
+    def test_below(self):
+        '''Test finding all subsets below an upper bound'''
+
+        masks = self.sums.below(2050.75).tolist()
+        found = {subsetsum.getindexes(i) for i in masks}
+
+        self.assertEquals(found, self.getexpected(lambda x: x < 2050.75))
+        self.assertEquals(subsetsum.getindexes(0b10110), (1, 2, 4))
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(SubsetSumTest('test_between'))
+    suite.addTest(SubsetSumTest('test_below'))
@@ -9,7 +9,7 @@
 '''
 
 # load modules/submodules
-from . import scan_titles
+from . import formula, mime, msf, pepxml, scan_titles
 
 # SUITE
 # -----
@@ -18,4 +18,8 @@ from . import scan_titles
 def add_tests(suite):
     '''Add tests to the unittest suite'''
 
+    formula.add_tests(suite)
+    mime.add_tests(suite)
+    msf.add_tests(suite)
+    pepxml.add_tests(suite)
     scan_titles.add_tests(suite)
@@ -0,0 +1,61 @@
+'''
+    Unittests/XlPy/Matched/formula
+    ______________________________
+
+    Test suite for the vectorized peptide formula calculations.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import unittest
+
+import numpy as np
+
+from xldlib import chemical
+from xldlib.xlpy.matched import formula
+
+
+# CASES
+# -----
+
+
+class FormulaCalculatorTest(unittest.TestCase):
+    '''Test calculating peptide formulas for all rows at once'''
+
+    def test_segments(self):
+        '''Test segment sums from the cumulative residue counts'''
+
+        codes, starts = formula.getcodes(['PEP', 'TI', 'DE'])
+        self.assertEquals(codes.size, 7)
+        self.assertEquals(starts.tolist(), [0, 3, 5])
+
+        values = np.arange(14).reshape(7, 2)
+        sums = formula.sumsegments(values, starts, codes.size)
+        self.assertEquals(sums.tolist(), [[6, 9], [14, 16], [22, 24]])
+
+    def test_peptides(self):
+        '''Test the formulas match the parsed peptides'''
+
+        peptides = ['SAMPLER', 'PEPTIDEK', 'sampler', 'SAMPLER']
+        calculator = formula.FormulaCalculator()
+        formulas = calculator(peptides, [], None)
+
+        for peptide, item in zip(peptides, formulas):
+            self.assertIs(item, chemical.getformula(peptide=peptide))
+        self.assertIs(formulas[0], formulas[2])
+
+        with self.assertRaises(KeyError):
+            calculator(['SAMPLZR'], [], None)
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(FormulaCalculatorTest('test_segments'))
+    suite.addTest(FormulaCalculatorTest('test_peptides'))
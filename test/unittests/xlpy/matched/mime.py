@@ -0,0 +1,182 @@
+'''
+    Unittests/XlPy/Matched/mime
+    ___________________________
+
+    Test suite for indexing and parsing the sections of Mascot .dat
+    MIME files.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import os
+import shutil
+import tempfile
+import unittest
+
+from xldlib.general import mapping
+from xldlib.xlpy.matched import scan_titles
+from xldlib.xlpy.matched.mascot import mime
+
+
+# DATA
+# ----
+
+BOUNDARY = b'gc0p4Jq0M2Yt08jU534c0p'
+
+SECTIONS = [
+    (b'parameters', b'FILE=C:\\data\\file_00.mgf\nCLE=Trypsin\nCOM=BSA'),
+    (b'masses', b'A=71.037114\ndelta1=15.994915,Oxidation (M)\n'
+        b'FixedMod1=57.021464,Carbamidomethyl (C)\nFixedModResidues1=C'),
+    (b'unimod', b'<?xml version="1.0" encoding="UTF-8"?>\n<umod:unimod/>'),
+    (b'summary', b'qmass1=852.367000\nqexp1=427.190776,2+\n'
+        b'qmass2=700.330648\nqexp2=351.172600,2+'),
+    (b'peptides', b'q1_p1=0,852.365000,0.002000,5,SAMSHCR,18,000100000,'
+        b'40.00,00020020000000000,0,0;"ALBU_BOVIN":0:56:62:1\n'
+        b'q1_p1_terms=R,R\nq2_p1=-1'),
+    (b'proteins', b'"ALBU_BOVIN"=69293.00,"Serum albumin"'),
+    (b'query1', b'title=file_00%2e1632%2e1632%2e2%2edta\ncharge=2+\n'
+        b'Ions1=182.200000:395.8'),
+    (b'query2', b'title=file_00%2e1633%2e1633%2e2%2edta\ncharge=2+'),
+]
+
+
+# HELPERS
+# -------
+
+
+def newfile(sections, newline=b'\n'):
+    '''Returns the content of a Mascot .dat file with the sections'''
+
+    lines = [
+        b'MIME-Version: 1.0 (Generated by Mascot version 1.0)',
+        b'Content-Type: multipart/mixed; boundary=' + BOUNDARY,
+        b''
+    ]
+    for name, payload in sections:
+        lines.append(b'--' + BOUNDARY)
+        lines.append(b'Content-Type: application/x-Mascot; name="' +
+            name + b'"')
+        lines.append(b'')
+        lines.extend(payload.split(b'\n'))
+    lines.append(b'--' + BOUNDARY + b'--')
+
+    return newline.join(lines) + newline
+
+
+class MimeParser(mime.MimeParser):
+    '''MIME section parser, without the matched data storage'''
+
+    def __init__(self, fileobj):
+        super(mime.MimeParser, self).__init__()
+
+        self.data = {'attrs': {}}
+        self.set_messages(fileobj)
+
+        self.queries = mapping.OrderedRecursiveDict()
+        self.ids = {}
+        self.masses = mime.Modifications()
+        self.hits = mime.Hits(self.masses, self.queries)
+        self.title_formatter = scan_titles.TitleFormatter()
+
+
+# CASES
+# -----
+
+
+class MimeTest(unittest.TestCase):
+    '''Test indexing and parsing synthetic Mascot .dat files'''
+
+    def setUp(self):
+        '''Set up unittests'''
+
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        '''Tear down unittests'''
+
+        shutil.rmtree(self.directory)
+
+    def write(self, content):
+        path = os.path.join(self.directory, 'search.dat')
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def parse(self, content):
+        with open(self.write(content), 'rb') as fileobj:
+            parser = MimeParser(fileobj)
+            try:
+                parser.process_messages()
+            finally:
+                parser.messages.close()
+        return parser
+
+    def test_index(self):
+        '''Test the sections are indexed by name, with LF or CRLF lines'''
+
+        for newline in (b'\n', b'\r\n'):
+            with open(self.write(newfile(SECTIONS, newline)), 'rb') as f:
+                index = mime.SectionIndex(f)
+                try:
+                    sections = list(index)
+                    self.assertEquals([i.name for i in sections],
+                        [i.decode('ascii') for i, _ in SECTIONS])
+                    self.assertTrue(all(i.content == mime.CONTENT_TYPE
+                        for i in sections))
+
+                    for section, (_, payload) in zip(sections, SECTIONS):
+                        self.assertEquals(index.getpayload(section),
+                            newline.join(payload.split(b'\n')).decode('utf-8'))
+
+                    query = sections[-2]
+                    self.assertEquals(index.getvalue(query, 'charge'), '2+')
+                    self.assertEquals(index.getvalue(query, 'title'),
+                        'file_00%2e1632%2e1632%2e2%2edta')
+                    self.assertIsNone(index.getvalue(query, 'IT_MODS'))
+                finally:
+                    index.close()
+
+    def test_parse(self):
+        '''Test parsing the parameters, mods, queries and hits'''
+
+        parser = self.parse(newfile(SECTIONS))
+
+        self.assertEquals(parser.data['attrs']['enzyme'], 'Trypsin')
+        self.assertEquals(parser.ids, {'ALBU_BOVIN': 'Serum albumin'})
+        self.assertEquals(list(parser.queries), ['1', '2'])
+
+        query = parser.queries['1']
+        self.assertEquals(query['num'], 1632)
+        self.assertEquals(query['fraction'], 'file_00')
+        self.assertEquals(query['z'], 2)
+        self.assertEquals(parser.queries['2']['hits'], [])
+
+        hit, = query['hits']
+        self.assertEquals(hit['peptide'], 'SAMSHCR')
+        self.assertEquals(hit['id'], 'ALBU_BOVIN')
+        self.assertEquals(hit['start'], 56)
+        self.assertEquals(hit['score'], 40.)
+        self.assertEquals(dict(hit['modifications']['certain']),
+            {'Oxidation (M)': [3], 'Carbamidomethyl (C)': [6]})
+
+    def test_querymods(self):
+        '''Test query-specific variable mods raise an error'''
+
+        sections = SECTIONS[:-1] + [(b'query2',
+            b'title=file_00%2e1633%2e1633%2e2%2edta\n'
+            b'IT_MODS=Oxidation (M)\ncharge=2+')]
+        self.assertRaises(AssertionError, self.parse, newfile(sections))
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(MimeTest('test_index'))
+    suite.addTest(MimeTest('test_parse'))
+    suite.addTest(MimeTest('test_querymods'))
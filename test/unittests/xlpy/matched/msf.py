@@ -0,0 +1,182 @@
+'''
+    Unittests/XlPy/Matched/msf
+    __________________________
+
+    Test suite for reading Proteome Discoverer MSF files, comparing
+    the bulk JOIN extraction to the per-table queries.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import sqlite3
+import unittest
+
+from xldlib.xlpy.matched.proteome_discoverer import msf
+
+
+# DATA
+# ----
+
+TABLES = [
+    ("Peptides", "PeptideID, SpectrumID, Sequence, SearchEngineRank", [
+        (1, 1, 'PEPTIDEK', 1),
+        (2, 1, 'PEPMIDEK', 2),
+        (3, 2, 'SAMPLER', 1),
+        (4, 2, 'SAMPLEK', 2)
+    ]),
+    ("SpectrumHeaders", "SpectrumID, ScanNumbers, Charge, Mass", [
+        (1, 1632, 2, 1001.5),
+        (2, 1633, 3, 1500.75),
+        (3, 1634, 2, 800.4)
+    ]),
+    # peptide 1 is scored twice, peptide 4 is unscored
+    ("PeptideScores", "PeptideID, ScoreValue", [
+        (1, 40.),
+        (2, 10.),
+        (3, 20.),
+        (1, 45.),
+        (9, 5.)
+    ]),
+    ("ProteinAnnotations", "ProteinID, Description", [
+        (10, '>sp|P46406|G3P_RABIT'),
+        (11, '>sp|P02769|ALBU_BOVIN')
+    ]),
+    ("PeptidesProteins", "PeptideID, ProteinID", [
+        (1, 10),
+        (2, 11),
+        (3, 11),
+        (1, 11),
+        (9, 10)
+    ]),
+    # peptide ID 9 is not within the peptides table
+    ("PeptidesAminoAcidModifications",
+     "PeptideID, AminoAcidModificationID, Position", [
+        (2, 5, 3),
+        (9, 5, 1),
+        (3, 5, 1),
+        (2, 7, 0)
+    ]),
+    ("PeptidesTerminalModifications", "PeptideID, TerminalModificationID", [
+        (1, 6),
+        (9, 6),
+        (4, 6)
+    ]),
+]
+
+
+# HELPERS
+# -------
+
+
+def newdatabase():
+    '''Returns an in-memory MSF database with the peptide tables'''
+
+    database = sqlite3.connect(':memory:')
+    for table, columns, rows in TABLES:
+        database.execute("CREATE TABLE {} ({});".format(table, columns))
+        placeholders = ', '.join('?' * len(rows[0]))
+        database.executemany("INSERT INTO {} VALUES ({});".format(
+            table, placeholders), rows)
+
+    return database
+
+
+def todict(item):
+    '''Recursively converts the ordered, recursive dicts to dicts'''
+
+    if isinstance(item, dict):
+        return {k: todict(v) for k, v in item.items()}
+    return item
+
+
+# CASES
+# -----
+
+
+class MSFReaderTest(unittest.TestCase):
+    '''Test the bulk and per-table MSF readers produce the same data'''
+
+    def setUp(self):
+        '''Set up unittests'''
+
+        self.database = newdatabase()
+
+    def tearDown(self):
+        '''Tear down unittests'''
+
+        self.database.close()
+
+    def read(self, bulk):
+        reader = msf.MSFReader(self.database.cursor())
+        reader(bulk)
+        return reader
+
+    def test_read(self):
+        '''Test the bulk reader against the per-table reader'''
+
+        tables = self.read(False)
+        bulk = self.read(True)
+
+        self.assertEquals(bulk.peptide_to_spectrum,
+            tables.peptide_to_spectrum)
+        self.assertEquals(list(bulk.peptides), list(tables.peptides))
+        self.assertEquals(todict(bulk.peptides), todict(tables.peptides))
+        self.assertEquals(bulk.internal, tables.internal)
+        self.assertEquals(bulk.terminal, tables.terminal)
+
+        # the temporary tables are removed
+        cursor = self.database.execute(
+            "SELECT name FROM sqlite_temp_master WHERE type='table';")
+        self.assertEquals(cursor.fetchall(), [])
+
+    def test_values(self):
+        '''Test the read peptide hits, spectra and mods'''
+
+        reader = self.read(True)
+
+        self.assertEquals(reader.peptide_to_spectrum,
+            {1: 1, 2: 1, 3: 2, 4: 2})
+        self.assertEquals(list(reader.peptides), [1, 2])
+
+        spectrum = reader.peptides[1]
+        self.assertEquals(spectrum['num'], 1632)
+        self.assertEquals(spectrum['z'], 2)
+        self.assertAlmostEquals(spectrum['m/z'], 501.2536, 4)
+
+        # the last score and protein for a peptide are used
+        self.assertEquals(spectrum[1]['score'], 45.)
+        self.assertAlmostEquals(spectrum[1]['ev'], 10 ** -4.5)
+        self.assertEquals(spectrum[1]['id'], 'P02769')
+        self.assertEquals(spectrum[1]['name'], 'ALBU_BOVIN')
+        self.assertEquals(spectrum[2]['peptide'], 'PEPMIDEK')
+        self.assertEquals(spectrum[2]['rank'], 2)
+
+        unscored = reader.peptides[2][4]
+        self.assertEquals(todict(unscored),
+            {'peptide': 'SAMPLEK', 'rank': 2})
+
+        self.assertEquals(reader.internal, [(2, 5, 3), (3, 5, 1), (2, 7, 0)])
+        self.assertEquals(reader.terminal, [(1, 6), (4, 6)])
+
+    def test_batches(self):
+        '''Test the bulk extraction is independent of the batch size'''
+
+        cursor = self.database.cursor()
+        expected = msf.BulkExtractor(cursor)()
+        for batchsize in (1, 2, 3):
+            columns = msf.BulkExtractor(cursor, batchsize)()
+            self.assertEquals(columns, expected)
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(MSFReaderTest('test_read'))
+    suite.addTest(MSFReaderTest('test_values'))
+    suite.addTest(MSFReaderTest('test_batches'))
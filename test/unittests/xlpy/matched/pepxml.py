@@ -0,0 +1,187 @@
+'''
+    Unittests/XlPy/Matched/pepxml
+    _____________________________
+
+    Test suite for the streaming pepXML reader and the chunked storage
+    of the parsed scans.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import io
+import unittest
+import xml.sax
+
+from xldlib.objects import matched
+from xldlib.xlpy.matched import pepxml
+
+# load objects/functions
+from collections import namedtuple
+
+
+# OBJECTS
+# -------
+
+Row = namedtuple("Row", "data")
+
+
+# DATA
+# ----
+
+PEPXML = b'''<?xml version="1.0" encoding="UTF-8"?>
+<msms_pipeline_analysis xmlns="http://regis-web.systemsbiology.net/pepXML">
+  <msms_run_summary base_name="file_00">
+    <sample_enzyme name="Trypsin"/>
+    <search_summary base_name="/data/file_00" search_engine="MASCOT">
+      <aminoacid_modification aminoacid="M" massdiff="15.9949"
+        mass="147.0354" variable="Y" description="Oxidation"/>
+    </search_summary>
+    <spectrum_query spectrum="file_00.1632.1632.2.dta" start_scan="1632"
+      end_scan="1632" precursor_neutral_mass="1000.5000" assumed_charge="2">
+      <search_result>
+        <search_hit hit_rank="1" peptide="PEPMIDEK" massdiff="0.0010"
+          protein="P46406|G3P_RABIT" protein_descr="GAPDH">
+          <modification_info>
+            <mod_aminoacid_mass position="4" mass="147.0354"/>
+          </modification_info>
+          <search_score name="ionscore" value="40.0"/>
+          <search_score name="expect" value="0.01"/>
+        </search_hit>
+        <search_hit hit_rank="2" peptide="PEPTIDEK" massdiff="0.0200"
+          protein="P00330|ADH1_YEAST" protein_descr="ADH1">
+          <search_score name="ionscore" value="10.0"/>
+        </search_hit>
+      </search_result>
+    </spectrum_query>
+    <spectrum_query spectrum="file_00.1633.1633.3.dta" start_scan="1633"
+      end_scan="1633" precursor_neutral_mass="1500.7500" assumed_charge="3">
+      <search_result>
+        <search_hit hit_rank="1" peptide="SAMPLER" massdiff="-0.0010"
+          protein="P02769|ALBU_BOVIN" protein_descr="BSA">
+          <search_score name="ionscore" value="20.0"/>
+        </search_hit>
+      </search_result>
+    </spectrum_query>
+    <spectrum_query spectrum="file_00.1634.1634.2.dta" start_scan="1634"
+      end_scan="1634" precursor_neutral_mass="800.4000" assumed_charge="2">
+      <search_result>
+        <search_hit hit_rank="1" peptide="LIGHTK" massdiff="0.0005"
+          protein="P00330|ADH1_YEAST" protein_descr="ADH1">
+          <search_score name="ionscore" value="30.0"/>
+        </search_hit>
+      </search_result>
+    </spectrum_query>
+  </msms_run_summary>
+</msms_pipeline_analysis>
+'''
+
+
+# HELPERS
+# -------
+
+
+def newrow():
+    return Row(matched.DataTable(engines={'matched': ('Mascot', '2.4')}))
+
+
+def newscans():
+    '''Returns scans with hits missing the score, and a filtered hit'''
+
+    scans = []
+    for num, hits in ((1, ({'score': 1.},)), (2, ({}, {'score': 2.}))):
+        scan = matched.Scan(num=num, fraction='file_00')
+        for rank, hit in enumerate(hits, 1):
+            scan.set_hit(rank).update(hit)
+        scans.append(scan)
+
+    return scans
+
+
+def getcolumns(data):
+    '''Returns the matched columns as lists, with NaN replaced by None'''
+
+    return {k: [None if i != i else i for i in v]
+        for k, v in data['matched'].items()}
+
+
+# CASES
+# -----
+
+
+class PepXmlReaderTest(unittest.TestCase):
+    '''Test the streaming pepXML reader against the SAX parser'''
+
+    def setUp(self):
+        '''Set up unittests'''
+
+        self.handler = newrow()
+        parser = xml.sax.make_parser()
+        parser.setContentHandler(pepxml.PepXmlHandler(self.handler))
+        parser.parse(io.BytesIO(PEPXML))
+
+    def test_parse(self):
+        '''Test the parsed scans, search hits and attributes'''
+
+        row = newrow()
+        reader = pepxml.PepXmlReader(row, chunksize=2)
+        reader.parse(io.BytesIO(PEPXML))
+
+        self.assertEquals(reader.scans, [])
+        self.assertEquals(row.data['attrs']['enzyme'], 'Trypsin')
+        self.assertEquals(reader.start._fraction, 'file_00')
+
+        columns = getcolumns(row.data)
+        self.assertEquals(columns['num'], [1632, 1633, 1634])
+        self.assertEquals(columns['z'], [2, 3, 2])
+        self.assertEquals(columns['peptide'],
+            ['PEPMIDEK', 'SAMPLER', 'LIGHTK'])
+        self.assertEquals(columns['id'], ['P46406', 'P02769', 'P00330'])
+        self.assertEquals(columns['rank'], [1, 1, 1])
+        self.assertEquals(columns['score'], [40., 20., 30.])
+
+        modifications = columns['modifications'][0]['certain']
+        self.assertEquals(dict(modifications), {'Oxidation': [4]})
+
+        self.assertEquals(columns, getcolumns(self.handler.data))
+
+    def test_chunksize(self):
+        '''Test the parsed data is independent of the chunk size'''
+
+        for chunksize in (1, 3, 1000):
+            row = newrow()
+            pepxml.PepXmlReader(row, chunksize).parse(io.BytesIO(PEPXML))
+            self.assertEquals(getcolumns(row.data),
+                getcolumns(self.handler.data))
+
+
+class NewScansTest(unittest.TestCase):
+    '''Test storing a chunk of scans at once matches each separately'''
+
+    def test_newscans(self):
+        '''Test the columns are equal and padded for missing keys'''
+
+        separate = newrow().data
+        for scan in newscans():
+            separate.newscan(scan)
+
+        chunk = newrow().data
+        chunk.newscans(newscans())
+
+        columns = getcolumns(chunk)
+        self.assertEquals(columns, getcolumns(separate))
+        self.assertEquals(columns['num'], [1, 2])
+        self.assertEquals(columns['score'], [1., None])
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(PepXmlReaderTest('test_parse'))
+    suite.addTest(PepXmlReaderTest('test_chunksize'))
+    suite.addTest(NewScansTest('test_newscans'))
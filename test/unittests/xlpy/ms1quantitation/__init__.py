@@ -0,0 +1,22 @@
+'''
+    Unittests/XlPy/MS1Quantitation
+    ______________________________
+
+    Test suite for the MS1 quantitation modules.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+from . import scans
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    scans.add_tests(suite)
@@ -0,0 +1,53 @@
+'''
+    Unittests/XlPy/MS1Quantitation/scans
+    ____________________________________
+
+    Test suite for the ion chromatogram extraction helpers.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import unittest
+
+import numpy as np
+
+from xldlib.xlpy.ms1quantitation.extraction import scans
+
+
+# CASES
+# -----
+
+
+class ExtractionTest(unittest.TestCase):
+    '''Test matching peaks and summing the transition hierarchy'''
+
+    def test_aggregator(self):
+        '''Test summing the child values for each group'''
+
+        matrix = scans.getaggregator([[0, 2], [1, 1], []], 3)
+        values = matrix.dot(np.array([1., 10., 100.]))
+
+        self.assertEquals(values.tolist(), [101., 20., 0.])
+
+    def test_windows(self):
+        '''Test finding the retention time windows containing a scan'''
+
+        windows = scans.WindowIndex([10., 2., 5.], [12., 9., 6.])
+
+        self.assertEquals(sorted(windows(5.5).tolist()), [1, 2])
+        self.assertEquals(windows(11.).tolist(), [0])
+        self.assertEquals(windows(9.5).tolist(), [])
+        self.assertEquals(windows(2.).tolist(), [])
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(ExtractionTest('test_aggregator'))
+    suite.addTest(ExtractionTest('test_windows'))
@@ -0,0 +1,22 @@
+'''
+    Unittests/XlPy/Peptide_Database
+    _______________________________
+
+    Test suite for the theoretical peptide database modules.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+from . import index
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    index.add_tests(suite)
@@ -0,0 +1,86 @@
+'''
+    Unittests/XlPy/Peptide_Database/index
+    _____________________________________
+
+    Test suite for the mass-sorted, memory-mapped peptide index.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from xldlib.xlpy.peptide_database import index
+
+
+# CASES
+# -----
+
+
+class PeptideIndexTest(unittest.TestCase):
+    '''Test streaming construction and mass window queries'''
+
+    def setUp(self):
+        '''Set up unittests'''
+
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'standard')
+        self.dtype = [('id', 'S11'), ('peptide', 'S20'), ('start', 'i8')]
+
+        state = np.random.RandomState(4)
+        self.masses = np.round(state.uniform(500, 5000, 250), 2)
+        # duplicate masses keep their insertion order
+        self.masses[10:13] = 1250.
+
+        # chunks of 16 records, merged from multiple runs and blocks
+        with index.PeptideIndexWriter(self.path, self.dtype, 16) as writer:
+            for row, mass in enumerate(self.masses):
+                peptide = 'PEPTIDE{}K'.format(row).encode('ascii')
+                writer.append(mass, (b'P46406', peptide, row))
+
+    def tearDown(self):
+        '''Tear down unittests'''
+
+        shutil.rmtree(self.directory)
+
+    def test_sorted(self):
+        '''Test the masses are sorted with offsets to the records'''
+
+        merged = index.PeptideIndex(self.path)
+        self.assertEquals(len(merged), 250)
+        self.assertEquals(merged.masses.tolist(), sorted(self.masses))
+        self.assertEquals(merged.records['start'][merged.offsets].tolist(),
+            np.argsort(self.masses, kind='mergesort').tolist())
+        self.assertFalse(any(i.startswith('run-')
+            for i in os.listdir(self.path)))
+
+    def test_window(self):
+        '''Test querying all records within a mass tolerance'''
+
+        merged = index.PeptideIndex(self.path)
+        records = merged.window(1250., 10)
+        self.assertEquals(records['start'].tolist(), [10, 11, 12])
+        self.assertEquals(records['peptide'][0], b'PEPTIDE10K')
+
+        start, end = merged.between(1000., 2000.)
+        expected = (self.masses >= 1000.) & (self.masses <= 2000.)
+        self.assertEquals(sorted(merged.getrecords(start, end)['start']),
+            np.flatnonzero(expected).tolist())
+        self.assertEquals(len(merged.window(100., 10)), 0)
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(PeptideIndexTest('test_sorted'))
+    suite.addTest(PeptideIndexTest('test_window'))
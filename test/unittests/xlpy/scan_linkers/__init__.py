@@ -0,0 +1,23 @@
+'''
+    Unittests/XlPy/Scan_Linkers
+    ___________________________
+
+    Test suite for linking product scans to their precursor scans.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+from . import ms1, process
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    ms1.add_tests(suite)
+    process.add_tests(suite)
@@ -0,0 +1,82 @@
+'''
+    Unittests/XlPy/Scan_Linkers/ms1
+    _______________________________
+
+    Test suite for linking precursor scans to their MS1 scans.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import unittest
+
+from xldlib.objects.run import dataset
+from xldlib.xlpy.scan_linkers import ms1
+
+# load objects/functions
+from collections import namedtuple
+
+
+# OBJECTS
+# -------
+
+Row = namedtuple("Row", "data spectra")
+
+
+class Scan(namedtuple("Scan", "num")):
+    def getattrs(self, keys):
+        return [int(self.num), int(self.num) / 10.]
+
+
+class Group(object):
+    '''Minimal MS1 scan level, with scans 1, 2 and 8'''
+
+    def setscans(self):
+        pass
+
+    def getscanindex(self):
+        return dataset.ScanIndex([1, 2, 8], 5)
+
+    def getscan(self, num):
+        return Scan(num)
+
+
+class Spectra(namedtuple("Spectra", "group")):
+    def getgroup(self, key):
+        return self.group
+
+
+# CASES
+# -----
+
+
+class Ms1LinkerTest(unittest.TestCase):
+    '''Test finding the parent MS1 scan for each precursor scan'''
+
+    def test_linkedscans(self):
+        '''Test linking scans, with missing precursor scan numbers'''
+
+        nums = [3, float('nan'), None, 20, 9, float('nan')]
+        row = Row({'matched': {'precursor_num': nums}}, Spectra(Group()))
+        linker = ms1.Ms1Linker(row)
+        linker.steps = 5
+        linker.setlinkedscans()
+
+        self.assertEquals(sorted(linker.num, key=str), [20, 3, 9, None])
+        self.assertEquals(linker.num[None], [1, 2, 5])
+        self.assertEquals(linker.linkedscans[3], (2, 0.2))
+        self.assertEquals(linker.linkedscans[9], (8, 0.8))
+        self.assertEquals(linker.linkedscans[20], (None, None))
+        self.assertEquals(linker.linkedscans[None], (None, None))
+        self.assertTrue(linker.error)
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(Ms1LinkerTest('test_linkedscans'))
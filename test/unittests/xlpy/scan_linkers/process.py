@@ -0,0 +1,67 @@
+'''
+    Unittests/XlPy/Scan_Linkers/process
+    ___________________________________
+
+    Test suite for the vectorized precursor m/z matching.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import unittest
+
+import numpy as np
+
+from xldlib.xlpy.scan_linkers import process
+
+
+# CASES
+# -----
+
+
+class PrecursorIndexTest(unittest.TestCase):
+    '''Test matching product precursor m/z values to candidate scans'''
+
+    def test_match(self):
+        '''Test matching to the peaks within the candidate scans'''
+
+        index = process.PrecursorIndex([1, 2, 3],
+            [[500., 750.], [], [500.0002, 1000.]])
+        matched = index.match([500., 1000.], 1e-7, [[1, 2, 3], [1, 3]])
+        self.assertEquals(matched.tolist(), [True, False, False, False, True])
+
+        # 0.4 ppm from the precursor m/z
+        matched = index.match([500.], 1e-6, [[3]])
+        self.assertEquals(matched.tolist(), [True])
+
+    def test_loop(self):
+        '''Test the matches are identical to checking each candidate'''
+
+        state = np.random.RandomState(11)
+        nums = np.arange(1, 21)
+        mzs = [np.round(state.uniform(400, 1200, state.randint(0, 30)), 2)
+            for __ in nums]
+        precursor_mzs = [state.choice(i) + state.uniform(-0.01, 0.01)
+            if i.size else 800. for i in mzs]
+        candidates = [sorted(state.choice(nums, 4, replace=False))
+            for __ in precursor_mzs]
+        threshold = 10e-6
+
+        index = process.PrecursorIndex(nums, mzs)
+        matched = index.match(precursor_mzs, threshold, candidates)
+        expected = [process.matchingprecursor(mz, threshold, mzs[num - 1])
+            for mz, scans in zip(precursor_mzs, candidates) for num in scans]
+        self.assertEquals(matched.tolist(), expected)
+        self.assertTrue(any(expected))
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(PrecursorIndexTest('test_match'))
+    suite.addTest(PrecursorIndexTest('test_loop'))
@@ -0,0 +1,24 @@
+'''
+    Unittests/XlPy/Spectra
+    ______________________
+
+    Test suite for parsing raw spectral data formats.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+from . import binary, cache, offsets
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    binary.add_tests(suite)
+    cache.add_tests(suite)
+    offsets.add_tests(suite)
@@ -0,0 +1,89 @@
+'''
+    Unittests/XlPy/Spectra/binary
+    _____________________________
+
+    Test suite for decoding binary peak lists and MS-Numpress arrays.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import base64
+import unittest
+
+import numpy as np
+
+from xldlib.xlpy.spectra import binary, numpress
+
+# ITEMS
+# -----
+
+ZLIB_64 = 'eJxjYACBSAcwJZAJoY8UOQAAFRQCyQ=='
+BIG_32 = 'QsgAAEYcQABDSIAARZxAAA=='
+
+LINEAR = 'QMOIAAAAAABAQg8ACJgeAMSy6w1OC2bxgA=='
+PIC = 'hxf1jjMELhA='
+SLOF = 'QI9AAAAAAAAAAF4J/Ro='
+
+
+# CASES
+# -----
+
+
+class DecodeTest(unittest.TestCase):
+    '''Test decoding base64 binary arrays to NumPy arrays'''
+
+    def test_float(self):
+        '''Test decoding compressed and byte-swapped float arrays'''
+
+        array = binary.decode(ZLIB_64, 64, 'zlib')
+        self.assertEquals(array.dtype, np.float64)
+        self.assertEquals(array.tolist(), [100.0, 200.5, 300.25])
+
+        array = binary.decode(BIG_32, 32, byteorder='network')
+        self.assertEquals(array.dtype, np.float64)
+        self.assertEquals(array.tolist(), [100.0, 1e4, 200.5, 5e3])
+
+    def test_corrupt(self):
+        '''Test corrupt zlib data returns an empty array'''
+
+        array = binary.decode(BIG_32, 64, 'zlib')
+        self.assertEquals(array.size, 0)
+
+
+class NumpressTest(unittest.TestCase):
+    '''Test the MS-Numpress decoders against reference-encoded data'''
+
+    def test_linear(self):
+        '''Test linear prediction decoding'''
+
+        array = numpress.decode_linear(base64.b64decode(LINEAR))
+        expected = [100.0, 200.5, 300.25, 301.0, 250.125]
+        self.assertTrue(np.allclose(array, expected, atol=1e-4))
+
+    def test_pic(self):
+        '''Test positive integer decoding, with odd half-byte padding'''
+
+        array = numpress.decode_pic(base64.b64decode(PIC))
+        self.assertEquals(array.tolist(), [0, 1, 15, 1000, 123456])
+
+    def test_slof(self):
+        '''Test short logged float decoding'''
+
+        array = binary.decode(SLOF, compressor='slof')
+        self.assertTrue(np.allclose(array, [0, 10, 1000], rtol=1e-3))
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(DecodeTest('test_float'))
+    suite.addTest(DecodeTest('test_corrupt'))
+    suite.addTest(NumpressTest('test_linear'))
+    suite.addTest(NumpressTest('test_pic'))
+    suite.addTest(NumpressTest('test_slof'))
@@ -0,0 +1,233 @@
+'''
+    Unittests/XlPy/Spectra/cache
+    ____________________________
+
+    Test suite for the parsed spectra cache keys, storage and eviction.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import tables as tb
+
+from xldlib.resources import paths
+from xldlib.resources.parameters import defaults
+from xldlib.xlpy.spectra import cache
+
+# load objects/functions
+from collections import namedtuple
+
+
+# OBJECTS
+# -------
+
+Source = namedtuple("Source", "quantitative fingerprinting reporterions")
+
+Row = namedtuple("Row", "spectra engines files")
+
+
+class Engine(namedtuple("Engine", "name version")):
+    def tostr(self):
+        return self.version
+
+
+class Spectra(object):
+    '''Minimal spectral row, with a precursor and product group'''
+
+    ms1 = 'ms1'
+
+    def __init__(self, group=None):
+        self.group = group
+
+    def keys(self, ignore=None):
+        return [i for i in ('precursor', 'product') if i != ignore]
+
+
+# HELPERS
+# -------
+
+
+def write(path, data, mtime=None):
+    with open(path, 'wb') as f:
+        f.write(data)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def newrow(path, group=None):
+    engines = {k: Engine('mgf', 'MSConvert') for k in Spectra().keys()}
+    files = {k: path for k in Spectra().keys()}
+    return Row(Spectra(group), engines, files)
+
+
+class Scan(tb.IsDescription):
+    num = tb.Int64Col()
+
+
+# CASES
+# -----
+
+
+class EvictTest(unittest.TestCase):
+    '''Test least recently used eviction of cached file rows and memos'''
+
+    def setUp(self):
+        '''Set up unittests'''
+
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        '''Tear down unittests'''
+
+        shutil.rmtree(self.directory)
+
+    def getpath(self, name):
+        return os.path.join(self.directory, name)
+
+    def test_evict(self):
+        '''Test the oldest rows and memos are removed until below the limit'''
+
+        # b is the least recently used row, o an unreferenced memo
+        for name, mtime in (('a', 2000), ('b', 1000), ('c', 3000)):
+            write(self.getpath(name + cache.SUFFIX), b'0' * 100, mtime)
+        write(self.getpath('o' + cache.DIGEST_SUFFIX), b'0' * 10, 500)
+
+        self.assertEquals(cache.evict(400, self.directory), [])
+
+        removed = cache.evict(150, self.directory)
+        names = [os.path.basename(i) for i in removed]
+        self.assertEquals(names, ['o' + cache.DIGEST_SUFFIX,
+            'b' + cache.SUFFIX, 'a' + cache.SUFFIX])
+        self.assertEquals(os.listdir(self.directory), ['c' + cache.SUFFIX])
+
+    def test_memos(self):
+        '''Test the memos are removed with their cached file row'''
+
+        memos = ['a' + i for i in cache.MEMO_SUFFIXES]
+        path = self.getpath('a' + cache.SUFFIX)
+        with tb.open_file(path, 'w') as cached:
+            setattr(cached.root._v_attrs, cache.MEMOS, json.dumps(memos))
+        os.utime(path, (1000, 1000))
+
+        for memo in memos:
+            write(self.getpath(memo), b'0' * 10, 5000)
+        write(self.getpath('c' + cache.SUFFIX), b'0' * 100, 3000)
+
+        self.assertEquals(cache.readmemos(path),
+            [self.getpath(i) for i in memos])
+        removed = cache.evict(100, self.directory)
+        self.assertEquals(removed, [path] + [self.getpath(i) for i in memos])
+        self.assertEquals(os.listdir(self.directory), ['c' + cache.SUFFIX])
+
+
+class SpectralCacheTest(unittest.TestCase):
+    '''Test the cache keys and the storage of parsed file rows'''
+
+    def setUp(self):
+        '''Set up unittests'''
+
+        self.directory = tempfile.mkdtemp()
+        self.cachedir = paths.DIRS['cache']
+        paths.DIRS['cache'] = os.path.join(self.directory, 'cache')
+        os.makedirs(paths.DIRS['cache'])
+
+        self.raw = os.path.join(self.directory, 'run.mgf')
+        write(self.raw, b'BEGIN IONS\nEND IONS\n')
+        self.source = Source(False, False, False)
+
+    def tearDown(self):
+        '''Tear down unittests'''
+
+        paths.DIRS['cache'] = self.cachedir
+        shutil.rmtree(self.directory)
+
+    def getkey(self, path, nums=None, source=None):
+        row = newrow(path)
+        return cache.SpectralCache(row, nums, source or self.source).key
+
+    def test_key(self):
+        '''Test the key depends on the file contents, scans and settings'''
+
+        key = self.getkey(self.raw)
+        self.assertEquals(key, self.getkey(self.raw))
+
+        # keyed by content, not the file path
+        copied = os.path.join(self.directory, 'copy.mgf')
+        shutil.copy(self.raw, copied)
+        self.assertEquals(key, self.getkey(copied))
+        write(copied, b'BEGIN IONS\nTITLE=1\nEND IONS\n')
+        self.assertNotEquals(key, self.getkey(copied))
+
+        self.assertEquals(self.getkey(self.raw, [3, 1, 2]),
+            self.getkey(self.raw, [1, 2, 3]))
+        self.assertNotEquals(key, self.getkey(self.raw, [1, 2, 3]))
+        self.assertNotEquals(key,
+            self.getkey(self.raw, source=Source(True, False, False)))
+
+        steps = defaults.DEFAULTS['precursor_scan_steps']
+        try:
+            defaults.DEFAULTS['precursor_scan_steps'] = steps + 1
+            self.assertNotEquals(key, self.getkey(self.raw))
+        finally:
+            defaults.DEFAULTS['precursor_scan_steps'] = steps
+
+    def test_roundtrip(self):
+        '''Test saving and loading a parsed file row'''
+
+        with tb.open_file(os.path.join(self.directory, 'parsed.h5'),
+            'w') as parsed:
+            group = parsed.create_group('/', 'row')
+            for name, nums in (('precursor', [1, 2]), ('product', [3])):
+                level = parsed.create_group(group, name)
+                level._v_attrs.level = name
+                table = parsed.create_table(level, 'scans', Scan)
+                table.append([(i,) for i in nums])
+                table.flush()
+
+            spectralcache = cache.SpectralCache(newrow(self.raw, group),
+                source=self.source)
+            self.assertFalse(spectralcache.load())
+            spectralcache.save()
+
+        self.assertTrue(os.path.exists(spectralcache.path))
+        memos = cache.readmemos(spectralcache.path)
+        self.assertEquals(len(memos), 4)
+        self.assertTrue(os.path.exists(cache.getmemopath(self.raw)))
+        self.assertIn(cache.getmemopath(self.raw), memos)
+
+        # the existing, empty precursor scans table is filled in-place
+        with tb.open_file(os.path.join(self.directory, 'target.h5'),
+            'w') as target:
+            group = target.create_group('/', 'row')
+            level = target.create_group(group, 'precursor')
+            table = target.create_table(level, 'scans', Scan)
+
+            loaded = cache.SpectralCache(newrow(self.raw, group),
+                source=self.source)
+            self.assertEquals(loaded.key, spectralcache.key)
+            self.assertTrue(loaded.load())
+
+            self.assertIs(group.precursor.scans, table)
+            self.assertEquals(table.col('num').tolist(), [1, 2])
+            self.assertEquals(group.precursor._v_attrs.level, 'precursor')
+            self.assertEquals(group.product.scans.col('num').tolist(), [3])
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(EvictTest('test_evict'))
+    suite.addTest(EvictTest('test_memos'))
+    suite.addTest(SpectralCacheTest('test_key'))
+    suite.addTest(SpectralCacheTest('test_roundtrip'))
@@ -0,0 +1,99 @@
+'''
+    Unittests/XlPy/Spectra/offsets
+    ______________________________
+
+    Test suite for the random-access mzML spectrum offset index.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import io
+import unittest
+
+from xldlib.xlpy.spectra import offsets
+
+# ITEMS
+# -----
+
+SPECTRUM = ('<spectrum index="{0}" id="controllerType=0 controllerNumber=1 '
+    'scan={1}" defaultArrayLength="0">\n</spectrum>\n')
+
+HEADER = '<mzML>\n<run>\n<spectrumList count="3">\n'
+FOOTER = '</spectrumList>\n</run>\n</mzML>\n'
+SCANS = [5, 6, 10]
+
+
+# HELPERS
+# -------
+
+
+def getmzml():
+    '''Returns the mzML file and the expected spectrum offsets'''
+
+    text = HEADER
+    expected = []
+    for index, num in enumerate(SCANS):
+        expected.append((num, len(text)))
+        text += SPECTRUM.format(index, num)
+    return text + FOOTER, expected
+
+
+def getindexedmzml():
+    '''Returns the mzML wrapped by an indexedmzML tag, with an indexList'''
+
+    mzml, expected = getmzml()
+    head = '<indexedmzML>\n'
+    text = head + mzml
+    expected = [(num, offset + len(head)) for num, offset in expected]
+
+    listoffset = len(text)
+    text += '<indexList count="1">\n<index name="spectrum">\n'
+    for num, offset in expected:
+        text += ('<offset idRef="controllerType=0 controllerNumber=1 '
+            'scan={0}">{1}</offset>\n'.format(num, offset))
+    text += '</index>\n</indexList>\n'
+    text += '<indexListOffset>{0}</indexListOffset>\n'.format(listoffset)
+    text += '</indexedmzML>\n'
+    return text, expected
+
+
+# CASES
+# -----
+
+
+class OffsetsTest(unittest.TestCase):
+    '''Test reading and building spectrum offset indexes'''
+
+    def test_indexlist(self):
+        '''Test reading offsets from an indexedmzML indexList'''
+
+        text, expected = getindexedmzml()
+        fileobj = io.BytesIO(text.encode('utf-8'))
+        self.assertEquals(list(offsets.readindexlist(fileobj).items()),
+            expected)
+
+        text, expected = getmzml()
+        fileobj = io.BytesIO(text.encode('utf-8'))
+        self.assertEquals(offsets.readindexlist(fileobj), None)
+
+    def test_build(self):
+        '''Test building offsets with tags split by the block boundaries'''
+
+        text, expected = getmzml()
+        fileobj = io.BytesIO(text.encode('utf-8'))
+        for blocksize in (7, 16, 64, 1 << 20):
+            index = offsets.buildindex(fileobj, blocksize)
+            self.assertEquals(list(index.items()), expected)
+
+
+# SUITE
+# -----
+
+
+def add_tests(suite):
+    '''Add tests to the unittest suite'''
+
+    suite.addTest(OffsetsTest('test_indexlist'))
+    suite.addTest(OffsetsTest('test_build'))
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+    xldiscoverer_batch
+    __________________
+
+    Headless batch launcher for XL Discoverer. Runs the full
+    identification (and optionally quantitation) pipeline for each
+    input manifest without a display, and reports the wall time and
+    peak RSS for each stage.
+
+    $ python xldiscoverer_batch.py run1.json run2.json --outdir results \\
+        --parameters dsso.json
+    usage: xldiscoverer_batch.py [-h] [--outdir OUTDIR]
+        [--parameters PARAMETERS] [--quantitative]
+        [--backing-store BACKING_STORE] [--processes PROCESSES]
+        [--no-export] manifests [manifests ...]
+
+    Each manifest's backing stores, spreadsheet and `report.json` are
+    written to `OUTDIR/<manifest name>`. Using a separate backing store
+    directory per process allows multiple batch runners per node.
+
+    With `--processes`, each file row of a manifest is run in a separate
+    process, and the rows are merged before writing the spreadsheet.
+    Quantitative runs with global XIC quantitation (`quantify_globally`)
+    need every row in one process, and ignore `--processes`.
+'''
+
+# load future
+from __future__ import division, print_function
+
+# load modules
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+
+# PARSER
+# ------
+
+PARSER = argparse.ArgumentParser(description='Headless XL Discoverer')
+PARSER.add_argument('manifests', nargs='+',
+                    help="JSON input file manifests, one per run")
+# long options only, short options are reserved by `xldlib.onstart.args`
+PARSER.add_argument('--outdir', default=os.getcwd(),
+                    help="Directory for the run outputs and reports")
+PARSER.add_argument('--parameters',
+                    help="JSON parameter profile")
+PARSER.add_argument('--quantitative', action='store_true',
+                    help="Run the MS1 quantitation stages")
+PARSER.add_argument('--backing-store',
+                    help="Process-specific directory for the backing stores")
+PARSER.add_argument('--processes', type=int,
+                    help="Process each file row of a manifest concurrently")
+PARSER.add_argument('--no-export', dest='export', action='store_false',
+                    help="Skip writing the spreadsheets")
+
+
+# HELPERS
+# -------
+
+
+def set_backing_store(directory):
+    '''Redirects the run backing stores, before any dependent imports'''
+
+    from xldlib.resources import paths
+
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    for key in ('spectra', 'matched', 'transition', 'spreadsheet'):
+        name = os.path.basename(paths.FILES[key])
+        paths.FILES[key] = os.path.join(directory, name)
+
+
+def print_reports(reports):
+    '''Prints a per-stage profile summary for each run'''
+
+    for path, report in reports:
+        status = 'completed' if report['completed'] else 'failed'
+        print('{0}: {1}, {2:.2f} s'.format(path, status, report['time']))
+        for shard in report.get('shards', [report]):
+            for stage in shard['stages']:
+                rss = (stage['peak_rss'] or 0) / 2**20
+                print('    {0:<32} {1:>10.2f} s {2:>10.1f} MB'.format(
+                    stage['name'], stage['time'], rss))
+
+
+# ONSTART
+# -------
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+
+    args = PARSER.parse_args()
+    if '--headless' not in sys.argv:
+        # read by `xldlib.onstart.args` when creating the QApplication
+        sys.argv.append('--headless')
+    if args.backing_store is not None:
+        set_backing_store(args.backing_store)
+
+    from xldlib.onstart import registers
+    del registers
+    from xldlib.xlpy import batch
+
+    if args.processes is None:
+        reports = batch.runmanifests(args.manifests, args.outdir,
+                                     args.parameters, args.quantitative,
+                                     args.export)
+    else:
+        reports = [(i, batch.runsharded(i, args.outdir, args.parameters,
+            args.quantitative, args.processes)) for i in args.manifests]
+    print_reports(reports)
+
+    with open(os.path.join(args.outdir, 'batch.json'), 'w') as dump:
+        json.dump(dict(reports), dump, sort_keys=True, indent=4)
+    sys.exit(int(not all(i['completed'] for __, i in reports)))
@@ -9,8 +9,10 @@
     :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
 '''
 
-from .formula import Molecule
+from .formula import Formula, getformula, Molecule
 
 __all__ = [
+    'Formula',
+    'getformula',
     'Molecule',
 ]
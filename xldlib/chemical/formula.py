@@ -10,18 +10,24 @@
 '''
 
 # load modules/submodules
+import weakref
+
 from collections import Counter, defaultdict, Mapping
 
+import numpy as np
 import six
 
 from namedlist import namedlist
 
-from xldlib.definitions import re
+from xldlib.definitions import re, ZIP
+from xldlib.general import mapping
 from xldlib.utils import serialization
 
 from .building_blocks import AMINOACIDS, ELEMENTS, MONOMERS
 
 __all__ = [
+    'Formula',
+    'getformula',
     'Molecule'
 ]
 
@@ -33,6 +39,9 @@ CHEMICAL = r'(\d{1,3})?([A-Z]{1}[a-z]?)(?:(-?\d+)|\((-?\d+)\))?'
 MONOMER = r'(\w+)(?:(-?\d+)|\((-?\d+)\))?'
 WATER_FORMULA = 'H2 O'
 
+# parsed formulas and peptides to store in the LRU cache
+FORMULA_CACHE_SIZE = 100000
+
 
 # OBJECTS
 # -------
@@ -382,6 +391,184 @@ class Molecule(defaultdict, AminoAcidParserMixin):
         return Molecule(obj, strict=self.strict)
 
 
+# COMPACT FORMULAS
+# ----------------
+
+
+@serialization.register('Formula')
+class Formula(object):
+    '''
+    Immutable, interned chemical formula, stored as sorted (index, count)
+    pairs over the fixed isotope index, `ISOTOPE_KEYS`. Formulas with
+    the same composition share a single instance, and the monoisotopic
+    and average masses are calculated once, on construction.
+
+        Ex. Formula.frommolecule(Molecule('H2 O')).mass --> 18.0105646863
+    '''
+
+    __slots__ = ('counts', 'mass', 'average', '__weakref__')
+
+    def __new__(cls, counts=()):
+        counts = _normalize(counts)
+        self = INTERNED.get(counts)
+        if self is None:
+            self = object.__new__(cls)
+            object.__setattr__(self, 'counts', counts)
+            object.__setattr__(self, 'mass', _summass(counts, MONOISOTOPIC))
+            object.__setattr__(self, 'average', _summass(counts, AVERAGE))
+            INTERNED[counts] = self
+
+        return self
+
+    #     MAGIC
+
+    @serialization.tojson
+    def __json__(self):
+        '''
+        Serialize data for object reconstruction to JSON
+        Returns (dict): serialized data
+        '''
+
+        return {'formula': self.tostr()}
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Formula objects are immutable")
+
+    def __reduce__(self):
+        return self.__class__, (self.counts,)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __eq__(self, other):
+        if isinstance(other, Formula):
+            return self.counts == other.counts
+        return NotImplemented
+
+    def __ne__(self, other):
+        if isinstance(other, Formula):
+            return self.counts != other.counts
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.counts)
+
+    def __float__(self):
+        return self.mass
+
+    def __round__(self, precision):
+        return round(self.mass, precision)
+
+    def __add__(self, other):
+        '''Add the elemental counts from other'''
+
+        if not isinstance(other, Formula):
+            return NotImplemented
+        return Formula(self.counts + other.counts)
+
+    def __sub__(self, other):
+        '''Subtract the elemental counts from other'''
+
+        if not isinstance(other, Formula):
+            return NotImplemented
+        return Formula(self.counts + tuple((k, -v) for k, v in other.counts))
+
+    def __mul__(self, other):
+        '''Multiply the elemental counts by other'''
+
+        assert isinstance(other, six.integer_types)
+        return Formula((k, v*other) for k, v in self.counts)
+
+    def __repr__(self):
+        return 'Formula({})'.format(self.tostr())
+
+    #   CLASS METHODS
+
+    @classmethod
+    def loadjson(cls, data):
+        '''
+        Deserialize JSON data into object constructor
+
+        Args:
+            data (dict, mapping):   serialized object data
+        Returns (Formula):          class instance
+        '''
+
+        return getformula(data['formula'])
+
+    @classmethod
+    def frommolecule(cls, molecule):
+        '''Convert the `Molecule` to an interned formula'''
+
+        counts = []
+        for symbol, atom in molecule.items():
+            for isotope, count in atom.items():
+                counts.append((ISOTOPE_INDEX[(symbol, isotope)], count))
+        return cls(counts)
+
+    @classmethod
+    def fromvector(cls, vector):
+        '''Convert the element-count vector over `ISOTOPE_KEYS`'''
+
+        indexes, = np.nonzero(vector)
+        return cls(ZIP(indexes.tolist(), np.take(vector, indexes).tolist()))
+
+    #     PUBLIC
+
+    def items(self):
+        '''Yields the symbol, isotope and count for each element'''
+
+        for index, count in self.counts:
+            symbol, isotope = ISOTOPE_KEYS[index]
+            yield symbol, isotope, count
+
+    def tomolecule(self, strict=True):
+        '''Return a mutable `Molecule` with the same elemental counts'''
+
+        molecule = Molecule(strict=strict)
+        for symbol, isotope, count in self.items():
+            molecule[symbol][isotope] += count
+        return molecule
+
+    def tovector(self, dtype=int):
+        '''Return the element-count vector over `ISOTOPE_KEYS`'''
+
+        vector = np.zeros(len(ISOTOPE_KEYS), dtype=dtype)
+        for index, count in self.counts:
+            vector[index] = count
+        return vector
+
+    def tostr(self):
+        '''Return string representation of the chemical formula'''
+
+        return self.tomolecule().tostr()
+
+
+def getformula(formula=None, peptide=None, strict=True):
+    '''
+    Returns the interned `Formula` for a chemical formula and peptide,
+    see `Molecule.update_formula` for full arg specs. String formulas
+    are memoized within an LRU cache.
+    '''
+
+    if isinstance(formula, Mapping):
+        return Formula.frommolecule(Molecule(formula, peptide, strict=strict))
+
+    key = (formula, peptide, strict)
+    try:
+        return FORMULA_CACHE[key]
+    except KeyError:
+        if peptide:
+            value = Formula(_peptide_counts(formula, peptide, strict))
+        else:
+            value = Formula.frommolecule(Molecule(formula, strict=strict))
+        FORMULA_CACHE[key] = value
+        return value
+
+
 # PRIVATE
 # -------
 
@@ -428,3 +615,80 @@ def _as_string(item):
         return '{0}{1}'.format(symbol, count)
     else:
         return '{0}{1}{2}'.format(isotope, symbol, count)
+
+
+def _average(atom, isotope=-1):
+    '''
+    Return the average mass for the atom, weighted by the natural
+    abundance, or the isotopic mass for a labeled atom.
+
+    Args:
+        atom (str): elemental symbol
+    '''
+
+    isotopes = ELEMENTS[atom].isotopes
+    if isotope != -1:
+        return isotopes[int(isotope)].mass
+
+    abundance = sum(i.abundance for i in isotopes.values())
+    mass = sum(i.mass * i.abundance for i in isotopes.values())
+    return mass / abundance
+
+
+def _peptide_counts(formula, peptide, strict=True):
+    '''
+    Return the (index, count) pairs for the formula and peptide, summing
+    the memoized formula for each residue rather than re-parsing them.
+    '''
+
+    counts = list(getformula(WATER_FORMULA).counts)
+    if formula:
+        counts.extend(getformula(formula).counts)
+
+    parser = Molecule(strict=strict)
+    for residue, number in Counter(peptide).items():
+        residue = getformula(parser._residue_formula(residue))
+        counts.extend((k, v*number) for k, v in residue.counts)
+    return counts
+
+
+def _isotope_keys():
+    '''
+    Return the (symbol, isotope) pairs for the compact formula index,
+    ordered by atomic number, with the default (-1) isotope first.
+    '''
+
+    keys = []
+    ordered = sorted(ELEMENTS.items(), key=lambda i: i[1].atomic_number)
+    for symbol, element in ordered:
+        keys.append((symbol, -1))
+        keys.extend((symbol, i) for i in sorted(element.isotopes))
+    return tuple(keys)
+
+
+def _normalize(counts):
+    '''Return sorted (index, count) pairs, dropping empty counts'''
+
+    totals = defaultdict(int)
+    for index, count in counts:
+        totals[int(index)] += int(count)
+    return tuple(sorted(i for i in totals.items() if i[1]))
+
+
+def _summass(counts, masses):
+    '''Return the total mass for (index, count) pairs'''
+
+    return float(sum(masses[k] * v for k, v in counts))
+
+
+# DATA
+# ----
+
+ISOTOPE_KEYS = _isotope_keys()
+ISOTOPE_INDEX = {k: i for i, k in enumerate(ISOTOPE_KEYS)}
+
+MONOISOTOPIC = tuple(_mass(*i) for i in ISOTOPE_KEYS)
+AVERAGE = tuple(_average(*i) for i in ISOTOPE_KEYS)
+
+INTERNED = weakref.WeakValueDictionary()
+FORMULA_CACHE = mapping.LruDict(FORMULA_CACHE_SIZE)
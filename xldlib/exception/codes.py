@@ -58,4 +58,7 @@ CODES = {
     "025": ("Warning: Protease specified in matched output and was not found "
             "in local protease list."),
     "026": ("Some entered files do not exist", "WARNING: Missing data"),
+    "027": ("Mascot query {} has query-specific variable modifications "
+            "(IT_MODS), such as from an error tolerant search, which "
+            "are not supported."),
 }
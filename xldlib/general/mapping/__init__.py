@@ -24,6 +24,7 @@ __all__ = [
     'HashableDict',
     'IoMapping',
     'load_document',
+    'LruDict',
     'OrderedDefaultdict',
     'OrderedRecursiveDict',
     'save',
@@ -14,6 +14,7 @@ from collections import OrderedDict
 import six
 
 __all__ = [
+    'LruDict',
     'OrderedDefaultdict',
     'OrderedRecursiveDict'
 ]
@@ -65,3 +66,36 @@ class OrderedRecursiveDict(OrderedDefaultdict):
 
     def __init__(self, *args, **kwds):
         OrderedDefaultdict.__init__(self, OrderedRecursiveDict, *args, **kwds)
+
+
+class LruDict(OrderedDict):
+    '''
+    An ordered dict which evicts the least recently used keys once
+    more than `maxsize` keys are stored. Lookups move the key to the
+    end of the dict.
+    '''
+
+    def __init__(self, maxsize, *args, **kwds):
+        self.maxsize = maxsize
+        super(LruDict, self).__init__(*args, **kwds)
+
+    def __getitem__(self, key):
+        '''Return the value for `key` and mark it as recently used'''
+
+        value = OrderedDict.pop(self, key)
+        OrderedDict.__setitem__(self, key, value)
+        return value
+
+    def __setitem__(self, key, value):
+        '''Set `key` and evict the least recently used keys if full'''
+
+        if key in self:
+            OrderedDict.__delitem__(self, key)
+        OrderedDict.__setitem__(self, key, value)
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+
+    def __reduce__(self):
+        '''Add pickling/unpickling support'''
+
+        return self.__class__, (self.maxsize,), None, None, iter(self.items())
@@ -8,6 +8,7 @@
     :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
 '''
 
+from .column import Column
 from .defaultlist import DefaultList
 from .extendable import ExtendableList
 from .functions import *
@@ -15,6 +16,7 @@ from .lookup import LookupTable
 from .user import UserList
 
 __all__ = [
+    'Column',
     'DefaultList',
     'ExtendableList',
     'from_args',
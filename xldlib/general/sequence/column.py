@@ -0,0 +1,403 @@
+'''
+    General/Sequence/column
+    _______________________
+
+    Typed, NumPy-backed list for columnar data storage. Numeric values
+    are stored within typed arrays, strings as interned integer codes,
+    and object arrays are only used for heterogeneous data.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules/submodules
+import numpy as np
+import six
+
+from . import functions
+
+__all__ = [
+    'Column'
+]
+
+
+# CONSTANTS
+# ---------
+
+INITIAL_CAPACITY = 16
+
+INT64_MIN = np.iinfo(np.int64).min
+INT64_MAX = np.iinfo(np.int64).max
+
+
+# DATA
+# ----
+
+DTYPES = {
+    'bool': np.bool_,
+    'int': np.int64,
+    'float': np.float64,
+    'nan': np.float64,
+    'str': np.int32,
+    'object': object
+}
+
+NUMERIC = {'bool', 'int', 'float', 'nan'}
+
+# NaN placeholders only promote floats, so missing values
+# padding an integer column do not convert the integers to floats
+PROMOTIONS = {
+    frozenset(('int', 'float')): 'float',
+    frozenset(('nan', 'float')): 'float',
+}
+
+
+# HELPERS
+# -------
+
+
+def getkind(value):
+    '''Returns the storage kind for a single value'''
+
+    if isinstance(value, (bool, np.bool_)):
+        return 'bool'
+    elif isinstance(value, six.integer_types + (np.integer,)):
+        if INT64_MIN <= value <= INT64_MAX:
+            return 'int'
+        return 'object'
+    elif isinstance(value, (float, np.floating)):
+        if value != value:
+            return 'nan'
+        return 'float'
+    elif isinstance(value, six.string_types):
+        return 'str'
+    return 'object'
+
+
+def promote(kind, other):
+    '''Returns the storage kind which can store both kinds'''
+
+    if kind is None or kind == other:
+        return other
+    return PROMOTIONS.get(frozenset((kind, other)), 'object')
+
+
+def ismember(values, lookup):
+    '''Returns a boolean mask for the `values` within `lookup`'''
+
+    return np.fromiter((i in lookup for i in values), dtype=bool,
+        count=len(values))
+
+
+def getkinds(values):
+    '''Returns the storage kind for all values'''
+
+    kind = None
+    for value in values:
+        kind = promote(kind, getkind(value))
+        if kind == 'object':
+            break
+    return kind
+
+
+# OBJECTS
+# -------
+
+
+@functions.serializable("Column", deserialize=functions.from_list)
+class Column(object):
+    '''
+    List-like column, which stores homogeneous data in typed NumPy
+    arrays, promoting the storage type (int -> float -> object) when
+    heterogeneous values are added. Integers padded with NaN are
+    stored as objects, to keep the integers as `int`. The list API
+    returns Python objects, while `values`, `codes`, `take` and
+    `isin` provide vectorized access.
+
+    >>> column = Column([1, 2])
+    >>> column.append(2.5)
+    >>> column.kind
+    'float'
+    >>> column = Column([1, 2])
+    >>> column.append(float('nan'))
+    >>> column.kind
+    'object'
+    '''
+
+    def __init__(self, iterable=()):
+        super(Column, self).__init__()
+
+        self.kind = None
+        self.size = 0
+        self.data = None
+        self.strings = []
+        self.lookup = {}
+
+        self.extend(iterable)
+
+    #      MAGIC
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __contains__(self, value):
+        return value in self.tolist()
+
+    def __eq__(self, other):
+        if isinstance(other, (Column, list, tuple)):
+            return self.tolist() == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'Column({!r})'.format(self.tolist())
+
+    def __reduce__(self):
+        '''Pickling/unpickling support'''
+
+        return self.__class__, (self.tolist(),)
+
+    def __array__(self, dtype=None, copy=None):
+        '''Returns the decoded values as a NumPy array'''
+
+        if self.kind in NUMERIC:
+            return np.array(self.values(), dtype=dtype)
+        array = np.empty(self.size, dtype=object)
+        for index, value in enumerate(self.tolist()):
+            array[index] = value
+        return array if dtype is None else array.astype(dtype)
+
+    def __getitem__(self, index):
+        '''Returns the value at `index`, or a list for slices'''
+
+        if isinstance(index, slice):
+            return self.take(range(*index.indices(self.size)))
+        return self._decode(self.values()[self._normalize(index)])
+
+    def __setitem__(self, index, value):
+        '''Sets the value at `index`, promoting the storage if needed'''
+
+        if isinstance(index, slice):
+            if index == slice(None):
+                self.clear()
+                self.extend(value)
+            else:
+                values = self.tolist()
+                values[index] = value
+                self.clear()
+                self.extend(values)
+        else:
+            index = self._normalize(index)
+            self._convert(promote(self.kind, getkind(value)))
+            self.data[index] = self._encode(value)
+
+    def __delitem__(self, index):
+        '''Deletes the value or slice at `index`'''
+
+        if isinstance(index, slice):
+            self.delete(range(*index.indices(self.size)))
+        else:
+            self.delete([self._normalize(index)])
+
+    #     PUBLIC
+
+    def append(self, value):
+        '''Appends a single value'''
+
+        self._convert(promote(self.kind, getkind(value)))
+        self._reserve(self.size + 1)
+        self.data[self.size] = self._encode(value)
+        self.size += 1
+
+    def extend(self, values):
+        '''Appends all values, converting the storage once'''
+
+        values = list(values)
+        if not values:
+            return
+
+        self._convert(promote(self.kind, getkinds(values)))
+        end = self.size + len(values)
+        self._reserve(end)
+        if self.kind == 'str':
+            self.data[self.size:end] = [self._encode(i) for i in values]
+        elif self.kind == 'object':
+            # assign individually, since nested sequences would broadcast
+            for index, value in enumerate(values, self.size):
+                self.data[index] = value
+        else:
+            self.data[self.size:end] = values
+        self.size = end
+
+    def insert(self, index, value):
+        values = self.tolist()
+        values.insert(index, value)
+        self.clear()
+        self.extend(values)
+
+    def pop(self, index=-1):
+        value = self[index]
+        del self[index]
+        return value
+
+    def index(self, value):
+        return self.tolist().index(value)
+
+    def count(self, value):
+        return self.tolist().count(value)
+
+    def clear(self):
+        self.kind = None
+        self.size = 0
+        self.data = None
+        self.strings = []
+        self.lookup = {}
+
+    def delete(self, indexes):
+        '''Deletes all the values at `indexes` at once'''
+
+        indexes = np.asarray(list(indexes), dtype=np.int64)
+        if not indexes.size:
+            return
+
+        mask = np.ones(self.size, dtype=bool)
+        mask[indexes] = False
+        kept = self.values()[mask]
+        self.data[:kept.size] = kept
+        if self.kind == 'object':
+            self.data[kept.size:self.size] = None
+        self.size = kept.size
+
+    #    VECTORIZED
+
+    def values(self):
+        '''
+        Returns a view of the stored values, with the interned string
+        codes for string columns.
+        '''
+
+        if self.data is None:
+            return np.empty(0, dtype=DTYPES.get(self.kind, object))
+        return self.data[:self.size]
+
+    def codes(self):
+        '''
+        Returns the array keys for vectorized grouping, which are
+        decoded by `decode`, or None if the column stores objects.
+        '''
+
+        if self.kind == 'object':
+            return None
+        return self.values()
+
+    def take(self, indexes):
+        '''Returns a list of the values at `indexes`'''
+
+        indexes = np.asarray(list(indexes), dtype=np.int64)
+        return self._decodeall(self.values()[indexes])
+
+    def isin(self, lookup):
+        '''
+        Returns a boolean mask for the values within `lookup`. Each
+        distinct value is only tested once, and `lookup` is never
+        iterated, so lazy lookups only query the stored values.
+        '''
+
+        if self.kind == 'str':
+            found = ismember(self.strings, lookup)
+            return found[self.values()]
+        elif self.kind in NUMERIC:
+            unique, inverse = np.unique(self.values(), return_inverse=True)
+            found = ismember(unique.tolist(), lookup)
+            return found[inverse.reshape(-1)]
+
+        return ismember(self.tolist(), lookup)
+
+    def decode(self, keys):
+        '''Returns the values for the keys from `codes`'''
+
+        return self._decodeall(np.asarray(keys))
+
+    def tolist(self):
+        return self._decodeall(self.values())
+
+    #     HELPERS
+
+    def _normalize(self, index):
+        '''Returns the non-negative index, raising an IndexError if invalid'''
+
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("Column index out of range")
+        return index
+
+    def _reserve(self, size):
+        '''Grows the storage to hold at least `size` values'''
+
+        capacity = 0 if self.data is None else self.data.size
+        if size <= capacity:
+            return
+
+        capacity = max(INITIAL_CAPACITY, capacity * 2, size)
+        data = np.empty(capacity, dtype=DTYPES[self.kind])
+        if self.kind == 'object':
+            data[:] = None
+        if self.size:
+            data[:self.size] = self.values()
+        self.data = data
+
+    def _convert(self, kind):
+        '''Converts the stored values to the `kind` of storage'''
+
+        if kind == self.kind:
+            return
+        elif not self.size:
+            self.clear()
+            self.kind = kind
+            return
+
+        values = self.tolist()
+        self.clear()
+        self.kind = kind
+        self.extend(values)
+
+    def _encode(self, value):
+        '''Converts the value to the stored representation'''
+
+        if self.kind == 'str':
+            code = self.lookup.get(value)
+            if code is None:
+                code = self.lookup[value] = len(self.strings)
+                self.strings.append(value)
+            return code
+        return value
+
+    def _decode(self, value):
+        '''Converts the stored value to a Python object'''
+
+        if self.kind == 'str':
+            return self.strings[value]
+        elif self.kind in NUMERIC:
+            return value.item()
+        return value
+
+    def _decodeall(self, values):
+        '''Converts the stored array to a list of Python objects'''
+
+        if self.kind == 'str':
+            strings = self.strings
+            return [strings[i] for i in values.tolist()]
+        elif self.kind in NUMERIC:
+            return values.tolist()
+        return list(values)
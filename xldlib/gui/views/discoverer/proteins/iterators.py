@@ -3,7 +3,8 @@
     _________________________________________________
 
     Iterators for adding items to the proteins database via files
-    (XML, FASTA) or database queries (UniProt KB).
+    (XML) or database queries (UniProt KB). FASTA files are bulk
+    imported by `ProteinTable.importfasta`.
 
     :copyright: (c) 2015 The Regents of the University of California.
     :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
@@ -17,7 +18,7 @@ from xldlib.definitions import re
 from xldlib.qt.objects import base
 from xldlib.resources.parameters import defaults
 from xldlib.utils import logger
-from xldlib.utils.bio import fasta, uniprot_xml
+from xldlib.utils.bio import uniprot_xml
 from xldlib.utils.conn import uniprot
 
 from . import dialog
@@ -27,25 +28,6 @@ from . import dialog
 # ---------
 
 
-@logger.init('database', 'DEBUG')
-class UniProtFastaIterator(base.BaseObject):
-    '''Definitions for a row-wise UniProt FASTA-format iterator'''
-
-    def __init__(self, path):
-        super(UniProtFastaIterator, self).__init__()
-
-        self.path = path
-
-    def __iter__(self):
-        '''Custom iterator which transfers each object to Protein names'''
-
-        with fasta.Parse(self.path) as parser:
-            for entry in parser:
-                self.app.processEvents()
-                if 'sp' in entry:
-                    yield proteins.Protein.from_fasta(entry)
-
-
 @logger.init('database', 'DEBUG')
 class UniProtXmlIterator(base.BaseObject):
     '''Definitions for a row-wise UniProt XML-format iterator'''
@@ -259,11 +259,21 @@ class LoadingSection(widgets.KeyBindingWidget, messages.BaseMessage):
     #     ADDERS
 
     def add_from_fasta(self, title=OPEN_FASTA, path=None):
-        '''Add items to the protein database from a FASTA entry'''
+        '''Bulk imports items to the protein database from a FASTA file'''
 
         text = qtio.getopenfile(self, title, path)
         if text:
-            self.add_items(iterators.UniProtFastaIterator(text))
+            self.tabs.submit()
+
+            self.loaddialog.show()
+            try:
+                model = self.tabs.current_tab.model()
+                # finish the lazy model query, which would block the write
+                model.fetchall()
+                self.proteins.importfasta(text, model.tableName())
+                model.select()
+            finally:
+                self.loaddialog.hide()
 
     def add_from_xml(self, title=OPEN_UNIPROT_XML, path=None):
         '''Add items to the protein database from a UniProt XML'''
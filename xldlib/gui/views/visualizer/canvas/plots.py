@@ -51,8 +51,8 @@ COLORS = [
 def yield_group(group, indexes):
     '''Yields the (x, y) data for the labels plot'''
 
-    x = group.get_retentiontime()
-    y = group.child_intensity()
+    x = group.extracted_retentiontime()
+    y = group.child_intensity()[:, group.get_extracted_slice()]
 
     if y.size > defaults.DEFAULTS['maximum_plot_points']:
         # interpolation produces much faster plotting
@@ -71,8 +71,8 @@ def yield_isotope(group):
     '''Yields the (x, y) data for the isotope plot'''
 
     index = group.get_charge().index(group)
-    x = group.get_retentiontime()
-    y = group.intensity()
+    x = group.extracted_retentiontime()
+    y = group.extracted_intensity()
     color = COLORS[index % 6]
     yield Plot(x, y, color)
 
@@ -111,7 +111,8 @@ def get_ylimit(group, plotdata, padding=1.2):
     '''Reutns the y limits for the plot'''
 
     y = (i.y for i in plotdata)
-    if group.levels.labels is not None:
+    if group.levels.labels is not None and not group.iswindowed():
+        # windowed plot data is already within the window
         window = group.get_labels().get_window_indexes()
         y = (i[window.start:window.end] for i in y)
 
@@ -192,6 +192,36 @@ class TransitionDataBase(mappedfile.Data):
         else:
             return self.get_file().cache.retentiontime()[start:end]
 
+    def iswindowed(self):
+        '''
+        Returns if the transitions were only extracted within the labels
+        window, as stored on the file during extraction.
+        '''
+
+        transitionfile = self.get_file()
+        return bool(self.levels.labels is not None and
+            transitionfile.hasattr('windowed_extraction') and
+            transitionfile.getattr('windowed_extraction'))
+
+    def get_extracted_slice(self):
+        '''Returns the slice over the scans extracted for the transitions'''
+
+        if self.iswindowed():
+            window = self.get_labels().get_window_indexes()
+            return slice(window.start, window.end + 1)
+        return slice(None)
+
+    def extracted_retentiontime(self):
+        return self.get_retentiontime()[self.get_extracted_slice()]
+
+    def extracted_intensity(self):
+        '''
+        Returns the intensity over the extracted scans. Windowed
+        extraction only sets the intensities within the labels window.
+        '''
+
+        return self.intensity()[self.get_extracted_slice()]
+
     def area(self):
         return xictools.get_integral(self)
 
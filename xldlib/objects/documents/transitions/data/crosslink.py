@@ -209,10 +209,10 @@ class TransitionsCrosslinkData(TransitionDataBase):
         return xictools.scorecrosslink(self)
 
     def get_baseline(self):
-        return np.median(self.intensity())
+        return np.median(self.extracted_intensity())
 
     def get_noise(self):
-        return np.std(self.intensity())
+        return np.std(self.extracted_intensity())
 
     def get_masscorrelation(self):
         '''Isotope mass correlation between experimental and thereetical'''
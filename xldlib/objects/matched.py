@@ -14,13 +14,15 @@ import copy
 import operator as op
 import os
 
-from collections import defaultdict, namedtuple
+from collections import defaultdict, namedtuple, OrderedDict
 
+import numpy as np
 import six
 
 import tables as tb
 
 from xldlib.chemical import proteins
+from xldlib.definitions import ZIP
 from xldlib.general import mapping, number, sequence
 from xldlib.onstart.main import APP
 from xldlib.resources import paths
@@ -344,6 +346,60 @@ SCAN_MODES = tb.Enum([
 ])
 
 
+# COLUMNS
+# -------
+
+
+def iscolumn(values):
+    return isinstance(values, sequence.Column)
+
+
+def getvalues(values, indexes):
+    '''Returns the values at each index from a column or list'''
+
+    if iscolumn(values):
+        return values.take(indexes)
+    return [values[i] for i in indexes]
+
+
+def isdescending(rows):
+    return all(i > j for i, j in ZIP(rows, rows[1:]))
+
+
+class ColumnTable(dict):
+    '''
+    Columnar storage for the matched data, with a typed
+    `sequence.Column` for each key. Missing keys are initialized
+    with empty columns, like `defaultdict(list)`.
+    '''
+
+    def __missing__(self, key):
+        column = self[key] = sequence.Column()
+        return column
+
+    def __setitem__(self, key, value, dict_setitem=dict.__setitem__):
+        '''Stores `value` as a column'''
+
+        if not iscolumn(value):
+            value = sequence.Column(value)
+        dict_setitem(self, key, value)
+
+    #     PUBLIC
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = [] if default is None else default
+        return self[key]
+
+
+def newcolumns():
+    '''Returns the matched data storage for the layout'''
+
+    if defaults.DEFAULTS['matched_layout'] == 'columnar':
+        return ColumnTable()
+    return defaultdict(list)
+
+
 # DATA
 # ----
 
@@ -369,6 +425,7 @@ class DataTable(dict):
     def __init__(self, data=None, **attrs):
         if data is None:
             data = copy.deepcopy(NEWFILE)
+            data['matched'] = newcolumns()
         super(DataTable, self).__init__(data)
 
         for key, value in attrs.items():
@@ -398,6 +455,12 @@ class DataTable(dict):
             row = scan.torow(hit)
             self.setfromdict(row)
 
+    def newscans(self, scans):
+        '''Appends all search hit data from a chunk of scans at once'''
+
+        self.setfromdicts(scan.torow(hit) for scan in scans
+            for hit in scan.hits())
+
     def setnull(self, keys=PRECURSOR_KEYS, blank=None):
         '''Sets a default placeholder (None) when no item is found'''
 
@@ -420,6 +483,26 @@ class DataTable(dict):
             for key in fields - set(mapping):
                 self['matched'][key].append(float('nan'))
 
+    def setfromdicts(self, mappings):
+        '''
+        Appends the data from the mapping structures, extending each
+        column once rather than appending each value separately.
+        '''
+
+        matched = self['matched']
+        pending = OrderedDict((key, []) for key in matched)
+        for mapping in mappings:
+            for key, value in mapping.items():
+                pending.setdefault(key, []).append(value)
+
+            # need to make sure no uneven addition, all columns equal
+            for key in set(pending) - set(mapping):
+                pending[key].append(float('nan'))
+
+        for key, values in pending.items():
+            if values:
+                matched[key].extend(values)
+
     def getattr(self, attr):
         return self['attrs'].get(attr)
 
@@ -431,9 +514,14 @@ class DataTable(dict):
     def findrows(self, column, lookup):
         '''Returns the indexes of values in the lookup table from the column'''
 
-        for index, value in enumerate(self['matched'][column]):
-            if value in lookup:
-                yield index
+        values = self['matched'][column]
+        if iscolumn(values):
+            indexes = np.flatnonzero(values.isin(lookup)).tolist()
+        else:
+            indexes = (i for i, value in enumerate(values) if value in lookup)
+
+        for index in indexes:
+            yield index
 
     def iterrows(self, columns=None, asdict=False):
         '''Returns an iterator for all items within the table'''
@@ -470,8 +558,19 @@ class DataTable(dict):
             del self['matched'][column][row]
 
     def deleterows(self, rows):
-        for row in rows:
-            self.deleterow(row)
+        '''
+        Deletes the rows from the DataTable, in order. Descending rows
+        are deleted from each column at once.
+        '''
+
+        rows = list(rows)
+        columns = self['matched'].values()
+        if isdescending(rows) and all(iscolumn(i) for i in columns):
+            for column in columns:
+                column.delete(rows)
+        else:
+            for row in rows:
+                self.deleterow(row)
 
     #   COLUMNS
 
@@ -479,15 +578,23 @@ class DataTable(dict):
         '''Returns all rows for the given column'''
 
         if isinstance(column, six.string_types):
-            for row in rows:
-                yield self['matched'][column][row]
+            if iscolumn(self['matched'][column]):
+                rows = list(rows)
+                for value in self['matched'][column].take(rows):
+                    yield value
+            else:
+                for row in rows:
+                    yield self['matched'][column][row]
 
         elif hasattr(column, "__iter__"):
-            for row in rows:
+            rows = list(rows)
+            column = list(column)
+            values = [getvalues(self['matched'][i], rows) for i in column]
+            for items in ZIP(*values):
                 if asdict:
-                    yield {i: self['matched'][i][row] for i in column}
+                    yield dict(ZIP(column, items))
                 else:
-                    yield [self['matched'][i][row] for i in column]
+                    yield list(items)
 
     #   GROUPING
 
@@ -497,6 +604,10 @@ class DataTable(dict):
         if indexes is None:
             indexes = range(len(self['matched']['id']))
 
+        keys = self['matched'][column]
+        if iscolumn(keys) and keys.codes() is not None:
+            return self._groupcolumn(keys, indexes, fields)
+
         grouped = defaultdict(list)
         for index in indexes:
             key = self['matched'][column][index]
@@ -521,6 +632,41 @@ class DataTable(dict):
         for index in range(len(fields)):
             yield {k: key(i[index+1] for i in v) for k, v in grouped.items()}
 
+    #   NON-PUBLIC
+
+    def _groupcolumn(self, keys, indexes, fields=None):
+        '''
+        Groups the indexes by the column keys with a stable argsort,
+        splitting the sorted indexes at each new key. Groups are added
+        in order of the first index, as with the row-wise grouping.
+        '''
+
+        indexes = np.asarray(list(indexes), dtype=np.int64)
+        grouped = defaultdict(list)
+        if not indexes.size:
+            return grouped
+
+        codes = keys.codes()[indexes]
+        order = np.argsort(codes, kind='mergesort')
+        ordered = codes[order]
+        boundaries = np.flatnonzero(ordered[1:] != ordered[:-1]) + 1
+        starts = np.r_[0, boundaries]
+
+        groups = np.split(order, boundaries)
+        values = keys.decode(ordered[starts])
+
+        if fields is None:
+            items = indexes.tolist()
+        else:
+            rows = indexes.tolist()
+            columns = [getvalues(self['matched'][i], rows) for i in fields]
+            items = list(ZIP(rows, *columns))
+
+        for position in np.argsort(order[starts], kind='mergesort').tolist():
+            grouped[values[position]] = [items[i] for i in groups[position]]
+
+        return grouped
+
 
 # FILE
 # ----
@@ -11,6 +11,7 @@
 from .database import (LimitedDatabase, ProteinModel,
                        ProteinTable, PROTEIN_FIELDS)
 from .mowse import MowseDatabase
+from .suffix_array import ProteinIndex
 
 __all__ = [
     'fasta',
@@ -19,5 +20,6 @@ __all__ = [
     'peptidelist',
     'permutations',
     'protease',
-    'sequencetools'
+    'sequencetools',
+    'suffix_array'
 ]
@@ -4,6 +4,12 @@
 
     Dataset to store protein sequences and UniProt ID numbers
 
+    The UniProt ID, mnemonic and name columns are indexed, and the
+    ID mappings are lazy point lookups rather than full-table dicts.
+    Large proteomes are bulk inserted with a separate `sqlite3`
+    connection, in a single transaction with batched `executemany`
+    calls, while the Qt connection stays open.
+
     :copyright: (c) 2015 The Regents of the University of California.
     :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
 
@@ -12,16 +18,18 @@
 '''
 
 # load modules
+import itertools as it
 import shutil
+import sqlite3
 
 import tables as tb
 
 from xldlib.objects import sqlite
 from xldlib.resources import paths
 from xldlib.utils import logger
+from xldlib.utils.bio import fasta
 
-# load objects/functions
-from collections import defaultdict
+from .proteins import molecular_weight
 
 
 # ENUMS
@@ -46,6 +54,51 @@ def get_path(path):
     return path
 
 
+def getfields(record):
+    '''Returns the '|'-delimited database fields from the FASTA header'''
+
+    return record.header.split(None, 1)[0].split('|') if record.header else []
+
+
+def isswissprot(record):
+    '''
+    Returns if the FASTA header has a Swiss-Prot field, which are the
+    only FASTA records imported.
+        >sp|P02769|ALBU_BOVIN Serum albumin -> True
+        >tr|Q8N1N2|Q8N1N2_HUMAN ... -> False
+    '''
+
+    return 'sp' in getfields(record)[:-1]
+
+
+def getrow(record):
+    '''Returns the Proteins table row from a Swiss-Prot FASTA record'''
+
+    fields = getfields(record)
+    index = fields.index('sp') + 2
+    mnemonic = fields[index] if index < len(fields) else None
+    header = record.header.split(None, 1)
+    name = header[1] if len(header) > 1 else ''
+
+    sequence = record.sequence
+    return (name, record.accession, mnemonic, sequence,
+        len(sequence), molecular_weight(sequence))
+
+
+def iterbatches(rows, size):
+    '''Yields lists of up to `size` rows'''
+
+    rows = iter(rows)
+    return iter(lambda: list(it.islice(rows, size)), [])
+
+
+# CONSTANTS
+# ---------
+
+# rows per `executemany` call during bulk inserts
+BATCH_SIZE = 10000
+
+
 # CONSTRUCTORS
 # ------------
 
@@ -77,6 +130,18 @@ PARAMETER_CONSTRUCTION = '''CREATE TABLE [{table}] (
     [ParameterValue] [text] NULL)
 '''
 
+INDEX_CONSTRUCTOR = '''CREATE INDEX IF NOT EXISTS [{table}{column}Index]
+    ON [{table}] ([{column}])'''
+
+INSERT = 'INSERT INTO [{table}] ({columns}) VALUES ({values})'
+
+# the Qt connection pragmas disable journaling, which bulk inserts keep
+BULK_QUERIES = (
+    "PRAGMA cache_size = 16384",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA synchronous = OFF"
+)
+
 
 # TABLES
 # ------
@@ -107,6 +172,28 @@ ATTR_TO_FIELD = {
     'mnemonic': 'Mnemonic',
 }
 
+PROTEIN_COLUMNS = (
+    'Name',
+    'UniProtID',
+    'Mnemonic',
+    'Sequence',
+    'Length',
+    'MolecularWeight'
+)
+
+NAME_COLUMNS = (
+    'Name',
+    'UniProtID'
+)
+
+# keyed by the lowercase table name, as for the model and mapping
+COLUMNS = dict([(i.lower(), PROTEIN_COLUMNS) for i in PROTEIN_TABLES] +
+    [(i.lower(), NAME_COLUMNS) for i in NAME_TABLES])
+
+INDEXES = [(i, j) for i in PROTEIN_TABLES
+    for j in ('UniProtID', 'Mnemonic', 'Name')]
+INDEXES += [(i, j) for i in NAME_TABLES for j in ('UniProtID', 'Name')]
+
 TABLES = [
     (PROTEIN_CONSTRUCTOR, PROTEIN_TABLES),
     (NAME_CONSTRUCTOR, NAME_TABLES),
@@ -149,6 +236,7 @@ class ProteinTable(sqlite.SqlFile):
         for constructor, tables in TABLES:
             for name in tables:
                 self.execute(constructor.format(table=name))
+        self.set_indexes()
         self.set_limited(limited)
 
     @logger.call('database', 'debug')
@@ -158,6 +246,8 @@ class ProteinTable(sqlite.SqlFile):
         path = get_path(path)
         self._open(path)
         self.limited = self.get_limited()
+        # databases from previous versions lack the indexes
+        self.set_indexes()
 
     @logger.call('database', 'debug')
     def tryopen(self, path=None):
@@ -172,6 +262,51 @@ class ProteinTable(sqlite.SqlFile):
     def saveas(self, path):
         shutil.copy2(self.path, path)
 
+    @logger.call('database', 'debug')
+    def insert(self, rows, table='Proteins'):
+        '''
+        Bulk inserts the rows, ordered as the table `COLUMNS`, with a
+        separate `sqlite3` connection in a single transaction. The Qt
+        connection stays open, and models over the table must call
+        `select()` afterwards to show the rows.
+        '''
+
+        path = self.path
+        assert path not in (None, ':memory:'), "Bulk inserts need a file"
+
+        columns = COLUMNS[table.lower()]
+        statement = INSERT.format(table=table,
+            columns=', '.join('[{}]'.format(i) for i in columns),
+            values=', '.join('?' * len(columns)))
+
+        with self.unlocked():
+            connection = sqlite3.connect(path)
+            try:
+                for sqlquery in BULK_QUERIES:
+                    connection.execute(sqlquery)
+                # commits on success, rolls back on an error
+                with connection:
+                    cursor = connection.cursor()
+                    for batch in iterbatches(rows, BATCH_SIZE):
+                        cursor.executemany(statement, batch)
+            finally:
+                connection.close()
+
+        # the lookups memoize misses, which may now exist
+        for lookup in getattr(self, 'mapping', {}).values():
+            lookup.clear()
+
+    def importfasta(self, path, table='Proteins'):
+        '''
+        Bulk inserts the Swiss-Prot proteins from a FASTA file into the
+        table, skipping TrEMBL and non-UniProt records.
+        '''
+
+        size = len(COLUMNS[table.lower()])
+        with fasta.Reader(path) as reader:
+            self.insert((getrow(i)[:size] for i in reader if isswissprot(i)),
+                table)
+
     #    SETTERS
 
     def set_limited(self, limited):
@@ -182,24 +317,25 @@ class ProteinTable(sqlite.SqlFile):
             VALUES (?, ?);''', ('LimitedDatabase', limited)))
 
     def set_mapping(self):
-        '''Sets the mapping interface for the current databases'''
+        '''
+        Sets the lazy mapping interface for the current databases,
+        mapping the IDs (and mnemonics) to the IntegerID of the row.
+        '''
 
-        self.mapping = defaultdict(dict)
+        self.mapping = {}
         for name in PROTEIN_TABLES:
-            for attr in ('id', 'mnemonic'):
-                self.set_ids(name, attr)
+            keys = [ATTR_TO_FIELD[i] for i in ('id', 'mnemonic')]
+            self.mapping[name.lower()] = sqlite.TableLookup(self, name, keys)
 
         for name in NAME_TABLES:
-            self.set_ids(name, 'id')
+            keys = [ATTR_TO_FIELD['id']]
+            self.mapping[name.lower()] = sqlite.TableLookup(self, name, keys)
 
-    def set_ids(self, name, attr):
-        '''Sets the name mapping for the given IDs for quick lookups'''
+    def set_indexes(self):
+        '''Creates the indexes for the lookup columns'''
 
-        records = self.fetchall("SELECT * FROM {};".format(name))
-        field = ATTR_TO_FIELD[attr]
-        for index, record in enumerate(records):
-            value = record.value(field)
-            self.mapping[name.lower()][value] = index
+        for table, column in INDEXES:
+            self.execute(INDEX_CONSTRUCTOR.format(table=table, column=column))
 
     #    GETTERS
 
@@ -222,5 +358,4 @@ class ProteinTable(sqlite.SqlFile):
         to another value.
         '''
 
-        sqlquery = "SELECT UniProtID, {0} FROM {1}".format(column, table)
-        return {i.value(0): i.value(1) for i in self.fetchiter(sqlquery)}
+        return sqlite.TableLookup(self, table, ['UniProtID'], column)
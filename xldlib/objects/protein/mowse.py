@@ -5,6 +5,16 @@
     Implementation of the MOWSE algorithm for high-speed peptide
     sequencing.
 
+    Proteins are digested in bulk over the concatenated sequences,
+    and the peptides are binned into the protein x peptide mass grid
+    by histogramming, appending the peptides to each grid cell in a
+    single write per chunk of proteins. The counts are accumulated
+    over all chunks and stored once.
+
+    With multiprocessing enabled, each chunk of proteins is digested
+    within a worker process, and the digests are stored in chunk order,
+    so the database is identical to the serial digestion.
+
     :copyright: (c) 2015 The Regents of the University of California.
     :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
 
@@ -27,14 +37,20 @@
 from __future__ import division
 
 # load modules
+import multiprocessing
 import operator as op
 import weakref
 
+import numpy as np
+import six
 import tables as tb
 
+from xldlib import chemical
+from xldlib.definitions import MAP, ZIP
 from xldlib.chemical import proteins
+from xldlib.chemical.building_blocks import AMINOACIDS
 from xldlib.utils import logger
-from xldlib.resources import chemical_defs, paths
+from xldlib.resources import paths
 from xldlib.resources.parameters import defaults
 
 from .. import pytables
@@ -43,6 +59,18 @@ from .. import pytables
 from collections import namedtuple
 
 
+# CONSTANTS
+# ---------
+
+# proteins digested and stored per pass, bounding the memory
+CHUNK_SIZE = 5000
+
+# separates consecutive sequences, so no bond is cleaved across proteins
+SEPARATOR = b'\x00'
+
+WATER_FORMULA = 'H2 O'
+
+
 # DATA
 # ----
 
@@ -73,12 +101,170 @@ def description():
     return PeptideQuery
 
 
+# HELPERS
+# -------
+
+
+def getresiduemasses():
+    '''Returns the residue masses indexed by character code, NaN if unknown'''
+
+    masses = np.full(256, np.nan)
+    for letter, aminoacid in AMINOACIDS.items():
+        mass = chemical.getformula(aminoacid.formula).mass
+        masses[ord(letter.upper())] = masses[ord(letter.lower())] = mass
+
+    return masses
+
+
+def getcutsites(codes, enzyme):
+    '''
+    Returns a mask of the cleaved bonds, where True at i cleaves the
+    bond between residues i and i + 1. Matches the cut regex from
+    `ProteolyticEnzyme.cut_peptide`, including overlapping cut sites.
+    '''
+
+    cut = np.zeros(256, dtype=bool)
+    cut[[ord(i) for i in enzyme.cut]] = True
+    residues = np.zeros(256, dtype=bool)
+    residues[[ord(i) for i in enzyme.cut_residues]] = True
+
+    if enzyme.nterm:
+        left, right = residues, cut
+    else:
+        left, right = cut, residues
+
+    mask = np.zeros(codes.size, dtype=bool)
+    mask[:-1] = left[codes[:-1]] & right[codes[1:]]
+    return mask
+
+
+def concatenate(sequences):
+    '''
+    Returns the character codes of the concatenated sequences and the
+    start and end offset of each sequence.
+    '''
+
+    encoded = [i.encode('ascii') if isinstance(i, six.text_type) else i
+        for i in sequences]
+    lengths = np.array([len(i) for i in encoded], dtype=np.int64)
+    starts = np.cumsum(lengths + 1) - lengths - 1
+    text = b''.join(i + SEPARATOR for i in encoded)
+
+    return np.frombuffer(text, dtype=np.uint8), starts, starts + lengths
+
+
+def getproteins(db):
+    '''Returns the protein IDs and sequences from the protein database'''
+
+    ids = []
+    sequences = []
+    for record in db.fetchiter("SELECT UniProtID, Sequence FROM Proteins"):
+        if record.value(1) is not None:
+            ids.append(record.value(0))
+            sequences.append(record.value(1))
+
+    return ids, sequences
+
+
+def getcumulative(codes):
+    '''
+    Returns the cumulative residue masses and unknown residue counts
+    for the character codes, so segment sums are differences.
+    '''
+
+    residues = getresiduemasses()[codes]
+    unknown = np.isnan(residues)
+    residues[unknown] = 0.
+    summed = np.concatenate(([0.], np.cumsum(residues)))
+    unknowns = np.concatenate(([0], np.cumsum(unknown)))
+
+    return summed, unknowns
+
+
+def getproteinmasses(sequences):
+    '''Returns the protein masses, ignoring unknown residues'''
+
+    codes, starts, ends = concatenate(sequences)
+    summed, __ = getcumulative(codes)
+    return summed[ends] - summed[starts] + chemical.getformula(WATER_FORMULA).mass
+
+
+def digestproteins(sequences, protease, missed=None, lengths=None):
+    '''
+    Digests all protein sequences at once, matching the cleaved and
+    concatenated peptides from `Protein.sequencing_peptides`.
+
+    Returns a Digest, where peptides with unknown residues are removed.
+    '''
+
+    if missed is None:
+        missed = range(defaults.DEFAULTS['minimum_missed_cleavages'],
+            defaults.DEFAULTS['maximum_missed_cleavages'] + 1)
+    if lengths is None:
+        lengths = (defaults.DEFAULTS['minimum_peptide_length'],
+            defaults.DEFAULTS['maximum_peptide_length'])
+
+    codes, proteinstarts, proteinends = concatenate(sequences)
+    water = chemical.getformula(WATER_FORMULA).mass
+    summed, unknowns = getcumulative(codes)
+
+    # each fragment starts at a protein start or after a cleaved bond
+    nonempty = proteinends > proteinstarts
+    cleaved = np.flatnonzero(getcutsites(codes, protease.enzyme)) + 1
+    starts = np.union1d(proteinstarts[nonempty], cleaved)
+    protein = np.searchsorted(proteinstarts, starts, 'right') - 1
+    ends = np.append(starts[1:], codes.size)
+    ends = np.minimum(ends, proteinends[protein])
+
+    firsts = [np.zeros(0, dtype=np.int64)]
+    peptidestarts = [np.zeros(0, dtype=np.int64)]
+    peptideends = [np.zeros(0, dtype=np.int64)]
+    for count in missed:
+        first = np.arange(max(starts.size - count, 0))
+        last = first + count
+        same = protein[first] == protein[last]
+        first, last = first[same], last[same]
+
+        length = ends[last] - starts[first]
+        valid = (length >= lengths[0]) & (length <= lengths[1])
+        firsts.append(first[valid])
+        peptidestarts.append(starts[first[valid]])
+        peptideends.append(ends[last[valid]])
+
+    # order by fragment, then missed cleavages, as concatenated
+    order = np.argsort(np.concatenate(firsts), kind='mergesort')
+    start = np.concatenate(peptidestarts)[order]
+    end = np.concatenate(peptideends)[order]
+
+    known = unknowns[end] == unknowns[start]
+    start, end = start[known], end[known]
+    protein = np.searchsorted(proteinstarts, start, 'right') - 1
+
+    text = codes.tobytes()
+    return Digest(protein=protein,
+        start=start - proteinstarts[protein],
+        length=end - start,
+        mass=summed[end] - summed[start] + water,
+        sequence=[text[i:j] for i, j in six.moves.zip(start.tolist(),
+            end.tolist())])
+
+
+def digestchunk(chunk):
+    '''Returns the digest for a (sequences, enzyme) chunk, within a worker'''
+
+    sequences, enzyme = chunk
+    return digestproteins(sequences, proteins.ProteolyticEnzyme(enzyme))
+
+
 # OBJECTS
 # -------
 
 Point = namedtuple("Point", "protein peptide")
 
 
+Digest = namedtuple("Digest", "protein start length mass sequence")
+
+
 class MowseInterval(namedtuple("MowseInterval", "protein peptide")):
     '''Definitions for scaling factors for the mowse database'''
 
@@ -242,6 +428,12 @@ class MatrixView(pytables.Group):
         index = self.matrix().index.getindex(size, scale=self.name)
         return Axis(self, self.getgroup(str(index)))
 
+    def gettable(self, proteinindex, peptideindex):
+        '''Returns the peptide search table for the grid cell'''
+
+        group = self.group._v_groups[str(proteinindex)]
+        return group._v_children[str(peptideindex)]
+
 
 class MowseMatrix(pytables.Group):
     '''Definitions for pseudo-2D matrix for the mowse database'''
@@ -276,7 +468,9 @@ class MowseMatrix(pytables.Group):
         group._v_file.create_group(group, name='protein', title='Protein View')
         group._v_file.create_group(group, name='peptide', title='Peptide View')
 
-        return cls(parent, group, new=True)
+        inst = cls(parent, group, new=True)
+        inst.newcounts()
+        return inst
 
     #      SETTERS
 
@@ -291,6 +485,98 @@ class MowseMatrix(pytables.Group):
                 table = self.protein.newtable(proteinindex, peptideindex)
                 self.peptide.newlink(proteinindex, peptideindex, table)
 
+    @pytables.silence_naturalname
+    def newcounts(self):
+        '''Initializes the protein x peptide peptide count grid'''
+
+        shape = (len(self.index.proteinrows()), len(self.index.peptiderows()))
+        self.group._v_file.create_carray(self.group, 'counts',
+            atom=tb.Int64Atom(),
+            shape=shape,
+            title='Peptide Counts',
+            filters=self.document().filter)
+
+    #      GETTERS
+
+    def getcounts(self):
+        '''Returns the (protein rows x peptide rows) peptide counts'''
+
+        if 'counts' not in self.group._v_children:
+            self.newcounts()
+        return self.group._v_children['counts']
+
+    def newhistogram(self):
+        '''Returns an empty peptide count grid, to accumulate counts'''
+
+        return np.zeros(self.getcounts().shape, dtype=np.int64)
+
+    def getfrequencies(self):
+        '''
+        Returns the MOWSE frequency matrix, with the peptide counts
+        normalized to the maximum count for each protein mass row.
+        '''
+
+        counts = self.getcounts().read().astype(float)
+        maximum = counts.max(axis=1)[:, None]
+        return np.divide(counts, maximum, out=np.zeros_like(counts),
+            where=maximum > 0)
+
+    #      PUBLIC
+
+    def addcounts(self, histogram):
+        '''Adds the accumulated peptide counts to the stored counts'''
+
+        counts = self.getcounts()
+        counts[:] = counts.read() + histogram
+
+    def addpeptides(self, ids, digest, proteinmasses, histogram):
+        '''
+        Bins the digested peptides into the protein x peptide mass grid,
+        adding the counts to `histogram` and appending the peptides to
+        each grid cell in a single write.
+        '''
+
+        index = self.index
+        proteinrows = proteinmasses[digest.protein] // index.scale.protein
+        proteinrows = np.clip(proteinrows, index.min.protein,
+            index.max.protein).astype(np.int64)
+        peptiderows = digest.mass // index.scale.peptide
+        keep = (peptiderows >= index.min.peptide) & \
+            (peptiderows <= index.max.peptide)
+        if not keep.any():
+            return
+
+        rows = np.flatnonzero(keep)
+        proteinrows = proteinrows[keep] - index.min.protein
+        peptiderows = peptiderows[keep].astype(np.int64) - index.min.peptide
+
+        width = histogram.shape[1]
+        cells = proteinrows * width + peptiderows
+        histogram += np.bincount(cells,
+            minlength=histogram.size).reshape(histogram.shape)
+
+        order = np.argsort(cells, kind='mergesort')
+        unique, bounds = np.unique(cells[order], return_index=True)
+        bounds = np.append(bounds, order.size)
+        for cell, start, end in six.moves.zip(unique.tolist(),
+            bounds[:-1].tolist(), bounds[1:].tolist()):
+            proteinindex, peptideindex = divmod(cell, width)
+            table = self.protein.gettable(proteinindex + index.min.protein,
+                peptideindex + index.min.peptide)
+            table.append(self.getrecords(table, ids, digest,
+                rows[order[start:end]]))
+
+    def getrecords(self, table, ids, digest, rows):
+        '''Returns the structured table records for the peptides'''
+
+        records = np.zeros(rows.size, dtype=table.dtype)
+        records['id'] = [ids[i] for i in digest.protein[rows].tolist()]
+        records['sequence'] = [digest.sequence[i] for i in rows.tolist()]
+        # peptide starts are 1-indexed, as from `cut_sequence`
+        records['start'] = digest.start[rows] + 1
+        records['mass'] = digest.mass[rows]
+        return records
+
 
 # DATABASE
 # --------
@@ -313,31 +599,67 @@ class MowseDatabase(pytables.Root):
             self.tryopen()
 
     @classmethod
-    def fromproteins(cls, db, modifications=None):
+    def fromproteins(cls, db, protease=None):
         '''
-        Initializes the Mowse database and constructs the queries
-        from an HDF5 protein database
+        Initializes the Mowse database and stores the unmodified
+        peptides from the SQLite protein database
         '''
 
-        if modifications is None:
-            modifications = chemical_defs.MODIFICATIONS.selected
-
-        group = db.get_group('proteins')
-        mwrange = group.get_mwrange()
+        ids, sequences = getproteins(db)
+        masses = getproteinmasses(sequences)
+        if masses.size:
+            minprotein, maxprotein = masses.min(), masses.max()
+        else:
+            minprotein = maxprotein = 0
 
         inst = cls(new=True,
-            minprotein=mwrange.min,
-            maxprotein=mwrange.max)
-
-        for row in group.iterrows(as_dict=True):
-            protein = proteins.Protein(**row)
-            protein.cut_sequence()
-            for peptide in protein.peptides:
-                # TODO: sample permutations...
-                pass
+            minprotein=minprotein,
+            maxprotein=maxprotein)
+        inst.addproteins(ids, sequences, protease, masses)
 
         return inst
 
+    def addproteins(self, ids, sequences, protease=None, masses=None):
+        '''
+        Digests and adds the proteins to the matrix, in chunks of
+        `CHUNK_SIZE` proteins. New proteins can be added to an existing
+        database, and proteins outside the protein mass range are
+        binned to the nearest protein row.
+        '''
+
+        if protease is None:
+            protease = proteins.ProteolyticEnzyme()
+        if masses is None:
+            masses = getproteinmasses(sequences)
+
+        starts = range(0, len(ids), CHUNK_SIZE)
+        chunks = ((sequences[i:i + CHUNK_SIZE], protease.enzyme)
+            for i in starts)
+        histogram = self.mowsematrix.newhistogram()
+
+        self.setmapper()
+        try:
+            # `imap` yields in submission order, for deterministic output
+            for start, digest in ZIP(starts, self.mapper(digestchunk, chunks)):
+                end = start + CHUNK_SIZE
+                self.mowsematrix.addpeptides(ids[start:end], digest,
+                    masses[start:end], histogram)
+        finally:
+            self._closepool()
+
+        self.mowsematrix.addcounts(histogram)
+        self.flush()
+
+    def setmapper(self):
+        '''Sets the function mapping (either pool-based or within a process)'''
+
+        if defaults.DEFAULTS['use_multiprocessing']:
+            cores = defaults.DEFAULTS['max_multiprocessing']
+            self.pool = multiprocessing.Pool(processes=cores)
+            self.mapper = self.pool.imap
+        else:
+            self.mapper = MAP
+
     def new(self, minprotein, maxprotein, path=paths.FILES['mowse']):
         '''Creates a new matrix within the dimensions'''
 
@@ -362,3 +684,11 @@ class MowseDatabase(pytables.Root):
 
         self.mowsematrix = None
 
+    #     HELPERS
+
+    def _closepool(self):
+        if hasattr(self, "pool"):
+            self.pool.close()
+            self.pool.join()
+            del self.pool
+
@@ -0,0 +1,227 @@
+'''
+    Objects/Protein/suffix_array
+    ____________________________
+
+    Suffix array over the concatenated protein sequences, mapping
+    peptides to all (protein, start) positions by binary search,
+    in O(m log n) per peptide rather than a scan of each sequence.
+
+    The suffix array only depends on the protein sequences, and is
+    cached on disk, keyed by the digest of the protein database.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+
+    >>> index = ProteinIndex({'P1': 'MKPEPTIDEK', 'P2': 'PEPK'})
+    >>> index.getstarts('PEP', 'P1')
+    [2]
+'''
+
+# load modules
+import hashlib
+import os
+
+import numpy as np
+import six
+
+from xldlib.resources import paths
+
+__all__ = [
+    'ProteinIndex'
+]
+
+
+# CONSTANTS
+# ---------
+
+# increment when the suffix array layout changes, invalidating the cache
+VERSION = 1
+
+SUFFIX = '.suffixes.npy'
+
+# separates consecutive sequences, so no peptide matches across proteins
+SEPARATOR = b'\x00'
+
+
+# HELPERS
+# -------
+
+
+def encode(sequence):
+    if isinstance(sequence, six.text_type):
+        return sequence.encode('ascii')
+    return sequence
+
+
+def getdigest(ids, sequences):
+    '''Returns the SHA1 digest for the protein IDs and sequences'''
+
+    digest = hashlib.sha1(str(VERSION).encode('ascii'))
+    for id_, sequence in six.moves.zip(ids, sequences):
+        digest.update(id_.encode('utf-8') + b'\t' + sequence + b'\n')
+    return digest.hexdigest()
+
+
+def getsuffixarray(codes):
+    '''
+    Returns the suffix array for the character codes, by prefix
+    doubling: the suffixes are sorted by the ranks of their first
+    k characters, doubling k until all ranks are unique.
+    '''
+
+    size = codes.size
+    if not size:
+        return np.zeros(0, dtype=np.int64)
+
+    rank = codes.astype(np.int64)
+    # ranks are < size after the first pass, and < 256 before it
+    scale = max(size, 256) + 1
+    width = 1
+    while True:
+        # rank of the next k characters, 0 past the end of the text
+        second = np.zeros(size, dtype=np.int64)
+        second[:size - width] = rank[width:] + 1
+
+        key = rank * scale + second
+        order = np.argsort(key, kind='mergesort')
+        key = key[order]
+
+        changed = np.empty(size, dtype=bool)
+        changed[0] = True
+        changed[1:] = key[1:] != key[:-1]
+
+        rank = np.empty(size, dtype=np.int64)
+        rank[order] = np.cumsum(changed) - 1
+        if changed.all() or width >= size:
+            return order
+        width *= 2
+
+
+# OBJECTS
+# -------
+
+
+class ProteinIndex(object):
+    '''
+    Peptide to protein position index, from a {id: sequence} mapping.
+    Positions are 0-indexed from the start of each sequence.
+    '''
+
+    def __init__(self, sequences, suffixes=None):
+        super(ProteinIndex, self).__init__()
+
+        self.ids = sorted(sequences)
+        self.index = {k: i for i, k in enumerate(self.ids)}
+
+        encoded = [encode(sequences[i]) for i in self.ids]
+        lengths = np.array([len(i) + 1 for i in encoded], dtype=np.int64)
+        self.offsets = np.cumsum(lengths) - lengths
+        self.text = b''.join(i + SEPARATOR for i in encoded)
+        self.digest = getdigest(self.ids, encoded)
+
+        if suffixes is None:
+            codes = np.frombuffer(self.text, dtype=np.uint8)
+            suffixes = getsuffixarray(codes)
+        self.suffixes = suffixes
+
+    def __len__(self):
+        return len(self.ids)
+
+    #     CLASS METHODS
+
+    @classmethod
+    def fromcache(cls, sequences, directory=None):
+        '''
+        Loads the suffix array from the on-disk cache for the protein
+        database, or builds and stores it if the database is new.
+        '''
+
+        if directory is None:
+            directory = paths.DIRS['cache']
+
+        ids = sorted(sequences)
+        digest = getdigest(ids, (encode(sequences[i]) for i in ids))
+        path = os.path.join(directory, digest + SUFFIX)
+        if os.path.exists(path):
+            try:
+                return cls(sequences, np.load(path, mmap_mode='r'))
+            except (IOError, OSError, ValueError):
+                pass
+
+        inst = cls(sequences)
+        inst.save(path)
+        return inst
+
+    #     PUBLIC
+
+    def save(self, path):
+        '''Atomically stores the suffix array to path'''
+
+        temp = '{0}.{1}.npy'.format(path, os.getpid())
+        try:
+            np.save(temp, self.suffixes)
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(temp, path)
+        except (IOError, OSError):
+            if os.path.exists(temp):
+                os.remove(temp)
+
+    #     GETTERS
+
+    def getrange(self, peptide):
+        '''Returns the [start, end) suffix array range for the peptide'''
+
+        text = self.text
+        suffixes = self.suffixes
+        length = len(peptide)
+
+        lower, upper = 0, len(suffixes)
+        while lower < upper:
+            middle = (lower + upper) // 2
+            start = int(suffixes[middle])
+            if text[start:start + length] < peptide:
+                lower = middle + 1
+            else:
+                upper = middle
+        first = lower
+
+        upper = len(suffixes)
+        while lower < upper:
+            middle = (lower + upper) // 2
+            start = int(suffixes[middle])
+            if text[start:start + length] <= peptide:
+                lower = middle + 1
+            else:
+                upper = middle
+
+        return first, lower
+
+    def getpositions(self, peptide):
+        '''
+        Returns the protein indexes and 0-indexed starts for all
+        occurrences of the peptide, sorted by protein and start.
+        '''
+
+        try:
+            peptide = encode(peptide)
+        except UnicodeError:
+            peptide = None
+        if not isinstance(peptide, six.binary_type) or SEPARATOR in peptide:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+
+        first, last = self.getrange(peptide)
+        positions = np.sort(np.asarray(self.suffixes[first:last]))
+        proteins = np.searchsorted(self.offsets, positions, 'right') - 1
+        return proteins, positions - self.offsets[proteins]
+
+    def getstarts(self, peptide, id_):
+        '''
+        Returns the sorted, 0-indexed starts of the peptide within the
+        protein, raising a KeyError if the protein is not indexed.
+        '''
+
+        protein = self.index[id_]
+        proteins, starts = self.getpositions(peptide)
+        return starts[proteins == protein].tolist()
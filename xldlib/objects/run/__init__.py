@@ -11,6 +11,7 @@
 from .dataset import RunDataset
 
 __all__ = [
+    'columnar',
     'creators',
     'dataset',
     'delevel'
@@ -0,0 +1,362 @@
+'''
+    Objects/Run/columnar
+    ____________________
+
+    Columnar layout for the scans within a spectral level. Scan
+    metadata is stored as rows within a single table, and the peak
+    lists are concatenated within extendable arrays, indexed by the
+    start and length of each scan. Unlike the group layout, no HDF5
+    nodes are created per scan.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules
+import six
+
+import numpy as np
+import tables as tb
+
+from xldlib.utils import logger
+
+from .. import pytables
+from . import dataset
+
+# load objects/functions
+from collections import OrderedDict
+
+
+# CONSTANTS
+# ---------
+
+LAYOUT = 'columnar'
+
+TABLE = 'scans'
+
+# rows to buffer before appending to the table
+BUFFER_SIZE = 1000
+
+# expected peaks for the array chunkshapes
+EXPECTED_PEAKS = 10000000
+
+# the metadata is highly redundant and compresses well
+FILTERS = tb.Filters(complevel=5, complib='blosc')
+
+
+# DATA
+# ----
+
+ATTRIBUTES = OrderedDict([
+    ('num', tb.Int64Col),
+    ('ms_level', tb.Int32Col),
+    ('peaks_count', tb.Int64Col),
+    ('retention_time', tb.Float64Col),
+    ('precursor_num', tb.Int64Col),
+    ('precursor_mz', tb.Float64Col),
+    ('precursor_intensity', tb.Float64Col),
+    ('precursor_z', tb.Int32Col),
+    ('precursor_rt', tb.Float64Col),
+    ('spectrum_type', lambda **kwds: tb.StringCol(16, **kwds)),
+    ('polarity', lambda **kwds: tb.StringCol(16, **kwds)),
+    ('total_ion_current', tb.Float64Col),
+    ('total_injection_time', tb.Float64Col),
+    ('basepeak_mz', tb.Float64Col),
+    ('basepeak_intensity', tb.Float64Col),
+    ('low_mz', tb.Float64Col),
+    ('high_mz', tb.Float64Col),
+    ('file', lambda **kwds: tb.StringCol(255, **kwds)),
+])
+
+# bit flags for the attributes set on each scan
+FLAGS = {k: 1 << i for i, k in enumerate(ATTRIBUTES)}
+
+STRINGS = {'spectrum_type', 'polarity', 'file'}
+
+ARRAYS = (
+    'mz',
+    'intensity',
+    'z'
+)
+
+
+# HELPERS
+# -------
+
+
+def getdescription():
+    '''Returns the table description for the scan metadata'''
+
+    description = OrderedDict()
+    for position, (key, column) in enumerate(ATTRIBUTES.items()):
+        description[key] = column(pos=position)
+
+    position = len(description)
+    description['attrs'] = tb.Int64Col(pos=position)
+    for index, key in enumerate(ARRAYS):
+        description[key + '_start'] = tb.Int64Col(pos=position + 2*index + 1)
+        description[key + '_length'] = tb.Int64Col(dflt=-1,
+            pos=position + 2*index + 2)
+    return description
+
+
+def iscolumnar(group):
+    return getattr(group._v_attrs, 'layout', None) == LAYOUT
+
+
+def tovalue(key, value):
+    '''Converts a value read from the table to a Python object'''
+
+    if key in STRINGS:
+        if six.PY3:
+            return value.decode('utf-8')
+        return value
+    return value.item()
+
+
+def fromvalue(key, value):
+    '''Converts a value to the table type'''
+
+    if key in STRINGS and isinstance(value, six.text_type):
+        return value.encode('utf-8')
+    return value
+
+
+# OBJECTS
+# -------
+
+
+class ColumnarScan(dataset.ScanMixin):
+    '''
+    Definitions for a single scan, stored as a row in the scan table.
+    Scans are buffered by the scan level until flushed, after which
+    the scan is bound to the table row.
+    '''
+
+    def __init__(self, parent, index=None):
+        super(ColumnarScan, self).__init__()
+
+        self.parent = parent
+        self.index = index
+        self.row = None
+        self.record = None
+        if index is None:
+            self.row = {'attrs': 0}
+
+    def __getattr__(self, key):
+        '''Reads the peak list from the concatenated arrays'''
+
+        if key not in ARRAYS:
+            raise AttributeError(key)
+
+        start = self._get(key + '_start', 0)
+        length = self._get(key + '_length', -1)
+        if length < 0:
+            raise AttributeError(key)
+        return self.parent.group._v_children[key][start:start + length]
+
+    #    CHECKERS
+
+    def hasattr(self, key):
+        return bool(self._get('attrs', 0) & FLAGS.get(key, 0))
+
+    def ispending(self):
+        return self.index is None
+
+    #    GETTERS
+
+    def getattr(self, key):
+        '''Returns a scan attribute, raising an AttributeError if not set'''
+
+        if not self.hasattr(key):
+            raise AttributeError(key)
+        return self._get(key)
+
+    def getattrs(self, attrs):
+        return [self.getattr(i) for i in attrs]
+
+    def getrecord(self):
+        '''Returns the table row, which is read once per scan instance'''
+
+        if self.record is None:
+            self.record = self.parent.table[self.index]
+        return self.record
+
+    def _get(self, key, default=None):
+        if self.ispending():
+            return self.row.get(key, default)
+        return tovalue(key, self.getrecord()[key])
+
+    #    SETTERS
+
+    def setattr(self, key, value):
+        '''Sets the scan attribute, which must be a table column'''
+
+        if key not in FLAGS:
+            raise AttributeError("Unrecognized scan attribute: " + key)
+
+        self._set(key, fromvalue(key, value))
+        self._set('attrs', self._get('attrs', 0) | FLAGS[key])
+
+    def setattrs(self, **kwds):
+        for key, value in kwds.items():
+            self.setattr(key, value)
+
+    def _set(self, key, value):
+        if self.ispending():
+            self.row[key] = value
+        else:
+            self.parent.table.cols._f_col(key)[self.index] = value
+            self.record = None
+
+    #      PUBLIC
+
+    def create_array(self, key, obj=None, **kwds):
+        '''Appends the array to the scan level, and stores the offsets'''
+
+        array = np.asarray(obj)
+        start = self.parent.appendarray(key, array)
+        self._set(key + '_start', start)
+        self._set(key + '_length', array.size)
+        return array
+
+    def newarray(self, key, array):
+        return self.create_array(key, obj=array)
+
+    def torecord(self):
+        '''Binds the buffered scan to a table row'''
+
+        row, self.row = self.row, None
+        return row
+
+
+@logger.init('scans', level='DEBUG')
+class ColumnarScanLevel(dataset.ScanLevel):
+    '''
+    Definitions for a columnar spectral group, with an O(1) scan
+    number to row index.
+    '''
+
+    def __init__(self, parent, group):
+        super(ColumnarScanLevel, self).__init__(parent, group)
+
+        self.table = self.group._v_children[TABLE]
+        self.pending = []
+        self.index = None
+
+    def __iter__(self):
+        self.flush()
+        return (str(i) for i in self.table.col('num'))
+
+    def __len__(self):
+        return self.table.nrows + len(self.pending)
+
+    #      PUBLIC
+
+    @staticmethod
+    @pytables.silence_naturalname
+    def new(group):
+        '''Initializes the scan table for a new HDF5 group'''
+
+        group._v_file.create_table(group, TABLE, getdescription(),
+            title='Scan metadata', filters=FILTERS)
+        group._v_attrs.layout = LAYOUT
+
+    def flush(self):
+        '''Appends the buffered scans to the table'''
+
+        if not self.pending:
+            return
+
+        records = np.zeros(len(self.pending), dtype=self.table.dtype)
+        for key in ARRAYS:
+            records[key + '_length'] = -1
+
+        start = self.table.nrows
+        for offset, scan in enumerate(self.pending):
+            record = records[offset]
+            for key, value in scan.torecord().items():
+                record[key] = value
+            scan.index = start + offset
+
+        self.table.append(records)
+        self.table.flush()
+        if self.index is not None:
+            for offset, num in enumerate(records['num']):
+                self.index[int(num)] = start + offset
+        self.pending = []
+
+    def extend(self, other, records):
+        '''
+        Appends table records from another columnar scan level in the
+        same file, linking to the other level's peak list arrays.
+        '''
+
+        self.flush()
+        for key in ARRAYS:
+            if key in other.group and key not in self.group:
+                self.create_hard_link(key, other.group._v_children[key])
+
+        self.table.append(records)
+        self.table.flush()
+        self.index = None
+
+    def read(self):
+        self.flush()
+        return self.table.read()
+
+    #      CHECKERS
+
+    def hasgroup(self, key):
+        return int(key) in self.getindex()
+
+    def iscolumnar(self):
+        return True
+
+    #      GETTERS
+
+    def getnums(self):
+        self.flush()
+        return self.table.col('num')
+
+    def getindex(self):
+        '''Returns the scan number to table row index'''
+
+        self.flush()
+        if self.index is None:
+            nums = self.table.col('num')
+            self.index = {int(i): index for index, i in enumerate(nums)}
+        return self.index
+
+    def getscan(self, key):
+        return ColumnarScan(self, self.getindex()[int(key)])
+
+    def getarray(self, key, dtype):
+        '''Returns the concatenated array, creating it if necessary'''
+
+        if key not in self.group:
+            self.create_earray(key, atom=tb.Atom.from_dtype(dtype),
+                shape=(0,), expectedrows=EXPECTED_PEAKS)
+        return self.group._v_children[key]
+
+    #      HELPERS
+
+    def newscan(self, num, title=None, **kwds):
+        '''Buffers a new scan and binds all keywords as attributes'''
+
+        if len(self.pending) >= BUFFER_SIZE:
+            self.flush()
+
+        scan = ColumnarScan(self)
+        self.pending.append(scan)
+        scan.setattr('num', num)
+        scan.setattrs(**kwds)
+        return scan
+
+    def appendarray(self, key, array):
+        '''Appends the array and returns the start offset'''
+
+        concatenated = self.getarray(key, array.dtype)
+        start = concatenated.nrows
+        concatenated.append(array)
+        return start
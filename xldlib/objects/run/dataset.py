@@ -10,6 +10,7 @@
 '''
 
 # load modules
+import bisect
 import six
 import weakref
 
@@ -40,30 +41,91 @@ SPECTRA = dict(where='/', name='spectra', title='Raw Spectral Data')
 SpectralWindow = namedtuple("SpectralWindow", "mz intensity")
 
 
-@logger.init('scans', level='DEBUG')
-class Scan(pytables.Group):
-    '''Definitions for a single scan object'''
-
-    def __init__(self, parent, group, **kwds):
-        super(Scan, self).__init__()
+class ScanIndex(object):
+    '''
+    Sorted scan numbers for a spectral level, with precomputed pointers
+    from each scan to the first scan of its sequential run, so each
+    preceding scan lookup is O(log N) rather than a full array scan.
+    '''
 
-        self.parent = parent
-        self.group = group
+    def __init__(self, nums, steps):
+        super(ScanIndex, self).__init__()
 
-        for key, value in kwds.items():
-            self.setattr(key, value)
-        for key, value in self.group._v_leaves.iteritems():
-            setattr(self, key, value)
+        self.nums = np.sort(np.asarray(nums, dtype=int))
+        self.steps = steps
 
-        self.setweakrefs()
+        self._nums = self.nums.tolist()
+        self.setrunstarts()
 
     #      SETTERS
 
-    def setweakrefs(self):
-        self.scanlevel = weakref.ref(self.parent)
-        self.file = weakref.ref(self.scanlevel().parent)
-        self.spectra = weakref.ref(self.file().parent)
-        self.document = weakref.ref(self.spectra().parent)
+    def setrunstarts(self):
+        '''Sets the index of the first scan in each sequential run'''
+
+        positions = np.arange(self.nums.size)
+        breaks = np.ones(self.nums.size, dtype=bool)
+        breaks[1:] = np.diff(self.nums) != 1
+        starts = np.where(breaks, positions, 0)
+        self.runstarts = np.maximum.accumulate(starts).tolist()
+
+    #      GETTERS
+
+    def getbounds(self, num, steps=None):
+        '''
+        Returns the [start, end) index bounds of the sequential scans
+        preceding `num`, within `steps` of the scan number.
+        '''
+
+        if steps is None:
+            steps = self.steps
+
+        end = bisect.bisect_left(self._nums, num)
+        if end == 0 or num - self._nums[end - 1] >= steps:
+            return end, end
+
+        lower = bisect.bisect_right(self._nums, num - steps)
+        return max(lower, self.runstarts[end - 1]), end
+
+    def getparent(self, num, steps=None):
+        '''Returns the nearest preceding scan number, or None'''
+
+        start, end = self.getbounds(num, steps)
+        if start < end:
+            return self._nums[end - 1]
+
+    def getparents(self, nums, steps=None):
+        '''
+        Returns the nearest preceding scan number for each scan in
+        `nums` in a single vectorized pass, with -1 if not found.
+        '''
+
+        if steps is None:
+            steps = self.steps
+
+        nums = np.asarray(nums, dtype=int)
+        parents = np.full(nums.size, -1, dtype=int)
+        if not self.nums.size:
+            return parents
+
+        ends = np.searchsorted(self.nums, nums, side='left')
+        found = ends > 0
+        candidates = self.nums[np.maximum(ends - 1, 0)]
+        found &= (nums - candidates) < steps
+        parents[found] = candidates[found]
+        return parents
+
+    #      HELPERS
+
+    def findscan(self, num, steps=None):
+        '''Yields the preceding sequential scans, nearest first'''
+
+        start, end = self.getbounds(num, steps)
+        for index in range(end - 1, start - 1, -1):
+            yield self._nums[index]
+
+
+class ScanMixin(object):
+    '''Methods shared by the group and columnar scan layouts'''
 
     #      GETTERS
 
@@ -75,12 +137,6 @@ class Scan(pytables.Group):
 
     #      PUBLIC
 
-    def newarray(self, key, array):
-        array = self.create_array(key, obj=array)
-        array.flush()
-        setattr(self, key, array)
-        return array
-
     def todict(self):
         '''Returns a dictionary representation of the current metadata'''
 
@@ -99,6 +155,40 @@ class Scan(pytables.Group):
         return SpectralWindow(mz[indexes], self.intensity[indexes])
 
 
+@logger.init('scans', level='DEBUG')
+class Scan(pytables.Group, ScanMixin):
+    '''Definitions for a single scan object'''
+
+    def __init__(self, parent, group, **kwds):
+        super(Scan, self).__init__()
+
+        self.parent = parent
+        self.group = group
+
+        for key, value in kwds.items():
+            self.setattr(key, value)
+        for key, value in self.group._v_leaves.iteritems():
+            setattr(self, key, value)
+
+        self.setweakrefs()
+
+    #      SETTERS
+
+    def setweakrefs(self):
+        self.scanlevel = weakref.ref(self.parent)
+        self.file = weakref.ref(self.scanlevel().parent)
+        self.spectra = weakref.ref(self.file().parent)
+        self.document = weakref.ref(self.spectra().parent)
+
+    #      PUBLIC
+
+    def newarray(self, key, array):
+        array = self.create_array(key, obj=array)
+        array.flush()
+        setattr(self, key, array)
+        return array
+
+
 @logger.init('scans', level='DEBUG')
 class ScanLevel(pytables.Group):
     '''Definitions for the spectral group parent of a series of scans'''
@@ -130,7 +220,8 @@ class ScanLevel(pytables.Group):
         self._steps = steps
 
     def setscans(self):
-        self.scans = np.sort(np.array(list(self)).astype(int))[::-1]
+        self.scanindex = ScanIndex(self.getnums(), self._steps)
+        self.scans = self.scanindex.nums[::-1]
 
     #      GETTERS
 
@@ -139,6 +230,16 @@ class ScanLevel(pytables.Group):
             key = str(key)
         return Scan(self, self[key])
 
+    def getnums(self):
+        return np.array(list(self)).astype(int)
+
+    def getscanindex(self):
+        '''Returns the scan number index, shared by the scan linkers'''
+
+        if not hasattr(self, "scanindex"):
+            self.setscans()
+        return self.scanindex
+
     #      HELPERS
 
     @pytables.silence_tbperformance
@@ -148,18 +249,16 @@ class ScanLevel(pytables.Group):
         group = self.create_group(str(num), title=title.format(num))
         return Scan(self, group, num=num, **kwds)
 
-    def findscan(self, num):
+    def findscan(self, num, steps=None):
         '''Finds all possible sequential scans from the current product scan'''
 
-        if not hasattr(self, "scans"):
-            self.setscans()
+        return self.getscanindex().findscan(num, steps)
 
-        bool_ = (self.scans < num) & (num - self.scans < self._steps)
-        nums = self.scans[np.where(bool_)[0]]
-        for index, num in enumerate(nums):
-            if index == 0 or previous - num == 1:
-                previous = num
-                yield num
+    def flush(self):
+        '''Writes any buffered scans, the group layout is unbuffered'''
+
+    def iscolumnar(self):
+        return False
 
     def isprecursor(self):
         return self.group._v_name == 'precursor'
@@ -214,12 +313,19 @@ class FileRow(pytables.Group):
 
         for key in self.document().keys():
             title = 'Spectral data for {} scans'.format(key)
-            self.create_group(key, title)
+            self.createlevel(key, title)
 
     #      GETTERS
 
     def getgroup(self, key):
-        return ScanLevel(self, self[key])
+        '''Returns the scan level, using the layout the level was written'''
+
+        from . import columnar
+
+        group = self[key]
+        if columnar.iscolumnar(group):
+            return columnar.ColumnarScanLevel(self, group)
+        return ScanLevel(self, group)
 
     #      SETTERS
 
@@ -240,7 +346,18 @@ class FileRow(pytables.Group):
 
         document = self.document()
         if not (key == 'ms1' and not document.quantitative):
-            return ScanLevel(self, self.create_group(key, title.format(key)))
+            self.createlevel(key, title.format(key))
+            return self.getgroup(key)
+
+    def createlevel(self, key, title):
+        '''Creates the HDF5 group for a scan level in the document layout'''
+
+        from . import columnar
+
+        group = self.create_group(key, title)
+        if self.document().getattr('layout') == columnar.LAYOUT:
+            columnar.ColumnarScanLevel.new(group)
+        return group
 
     def keys(self, ignore=(), mode=None):
         '''FR.keys() -> iter(('ms1', 'precursor', 'product'))'''
@@ -343,9 +460,12 @@ class RunDataset(pytables.Root):
     def new(self, path=None):
         '''Initializes the Pytables file and creates the main table'''
 
+        from xldlib.resources.parameters import defaults
+
         path = self.__get_path(path)
         self._new(path)
         self.spectra = Spectra(self, self.file.create_group(**SPECTRA))
+        self.setattr('layout', defaults.DEFAULTS['spectral_layout'])
 
     @logger.call('scans')
     def open(self, path, mode='a'):
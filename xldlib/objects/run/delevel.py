@@ -48,8 +48,21 @@ def delevel(spectra):
 
     levels = getlevels(spectra)
     flat = spectra.getgroup('scans')
+    if flat.iscolumnar():
+        delevel_columnar(flat, levels)
+        return
+
     for num, scans in flat.items():
         level = levels.get(scans.getattr('ms_level'))
 
         if level is not None:
             level.create_hard_link(num, scans.group)
+
+
+def delevel_columnar(flat, levels):
+    '''Separates the scan levels by copying the metadata rows'''
+
+    records = flat.read()
+    for key, level in levels.items():
+        if level is not None:
+            level.extend(flat, records[records['ms_level'] == key])
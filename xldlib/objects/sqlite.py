@@ -5,6 +5,10 @@
     Wrapper definitions for SQLite2 and SQLite3 objects, using
     QtSql bindings.
 
+    `TableLookup` provides dict-like, memoized point lookups over
+    indexed columns, so large tables are queried lazily rather than
+    loaded into memory.
+
     :copyright: (c) 2015 The Regents of the University of California.
     :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
 
@@ -24,11 +28,13 @@
 '''
 
 # load modules
+import contextlib
 import os
 import six
 
 from PySide import QtSql
 
+from xldlib.general import mapping
 from xldlib.qt.objects import base
 from xldlib.utils import logger
 from xldlib.utils.io_ import high_level
@@ -39,6 +45,9 @@ from xldlib.utils.io_ import high_level
 
 CONNECTION = 'protein_database'
 
+# memoized point lookups per table lookup
+LOOKUP_CACHE_SIZE = 10000
+
 
 # SETTINGS
 # --------
@@ -68,6 +77,91 @@ def iterquery(query):
 # -------
 
 
+class TableLookup(object):
+    '''
+    Lazy, dict-like lookup of a value column by one or more key
+    columns within a table, which should be indexed. Point lookups
+    are memoized, and iteration streams the distinct keys.
+
+    The value defaults to the row's IntegerID, which is 1-based and
+    stable across deletions, unlike the 0-based row index stored by
+    the former full-table dicts. Call `clear` after modifying the
+    table outside the lookup, since misses are memoized too.
+
+    >>> lookup = TableLookup(db, 'Proteins', ['UniProtID', 'Mnemonic'])
+    >>> 'P46406' in lookup
+    True
+    '''
+
+    def __init__(self, sqlfile, table, keys, value='IntegerID'):
+        super(TableLookup, self).__init__()
+
+        self.sqlfile = sqlfile
+        self.table = table
+        self.keys = keys
+        self.value = value
+        self.cache = mapping.LruDict(LOOKUP_CACHE_SIZE)
+
+    #     MAGIC
+
+    def __contains__(self, key):
+        return self.lookup(key)[0]
+
+    def __getitem__(self, key):
+        found, value = self.lookup(key)
+        if not found:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        return (i.value(0) for i in self.sqlfile.fetchiter(self.getkeys()))
+
+    def __len__(self):
+        sqlquery = 'SELECT COUNT(*) FROM ({})'.format(self.getkeys())
+        return int(self.sqlfile.fetchone(sqlquery))
+
+    #     PUBLIC
+
+    def get(self, key, default=None):
+        found, value = self.lookup(key)
+        return value if found else default
+
+    def clear(self):
+        self.cache.clear()
+
+    def lookup(self, key):
+        '''
+        Returns (found, value) for the key, from the most recent row
+        matching any key column.
+        '''
+
+        if key in self.cache:
+            return self.cache[key]
+
+        result = (False, None)
+        for column in self.keys:
+            sqlquery = ('''SELECT [{0}] FROM [{1}] WHERE [{2}]=?
+                ORDER BY IntegerID DESC LIMIT 1'''.format(self.value,
+                self.table, column), (key,))
+            query = self.sqlfile.execute(sqlquery)
+            if query.next():
+                result = (True, query.value(0))
+                query.finish()
+                break
+            query.finish()
+
+        self.cache[key] = result
+        return result
+
+    #     HELPERS
+
+    def getkeys(self):
+        '''Returns the query for the distinct, non-null keys'''
+
+        return ' UNION '.join('SELECT [{0}] FROM [{1}] WHERE [{0}] IS NOT NULL'
+            .format(column, self.table) for column in self.keys)
+
+
 @logger.init('database', 'DEBUG')
 class SqlFile(base.BaseObject):
     '''Definitions for an Sql File object wrapper'''
@@ -216,6 +310,21 @@ class SqlFile(base.BaseObject):
         query = "SELECT name from sqlite_master WHERE type='table';"
         return self.fetchall(query)
 
+    @contextlib.contextmanager
+    def unlocked(self):
+        '''
+        Releases the exclusive file lock for the context block, so
+        separate connections to the file can write to it.
+        '''
+
+        self.execute("PRAGMA locking_mode = NORMAL")
+        # the lock is only released upon the next read
+        self.master()
+        try:
+            yield self
+        finally:
+            self.execute("PRAGMA locking_mode = EXCLUSIVE")
+
     #    COMMITS
 
     def commit(self):
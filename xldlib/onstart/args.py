@@ -29,6 +29,8 @@ PARSER.add_argument('-o', "--stdout", action='store_false',
                     help="Remove stdout")
 PARSER.add_argument('-e', "--stderr", action='store_false',
                     help="Remove stderr")
+PARSER.add_argument("--headless", action='store_true',
+                    help="Run without a graphical display (batch mode)")
 
 # DEBUGGING/INTERNAL
 # ------------------
@@ -43,12 +45,14 @@ PARSER.add_argument('-p', "--pickle", action='store_true',
 # DEFINE LOCAL
 # ------------
 
-ARGS = PARSER.parse_args()
+# unknown arguments are left for embedding command-line tools
+ARGS, __ = PARSER.parse_known_args()
 
 LOG = ARGS.log
 REMOTE_THRESHOLD = ARGS.remote_threshold
 STDOUT = ARGS.stdout
 STDERR = ARGS.stderr
+HEADLESS = ARGS.headless
 DEBUG = ARGS.debug
 TRACE = ARGS.trace
 PICKLE = ARGS.pickle
@@ -56,4 +60,4 @@ PICKLE = ARGS.pickle
 # CLEANUP
 # -------
 
-del argparse, ARGS, PARSER
+del argparse, ARGS, PARSER, __
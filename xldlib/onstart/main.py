@@ -15,5 +15,7 @@ __all__ = [
     'APP'
 ]
 
-from . import app
-APP = app.App([])
+from . import app, args
+
+# headless sessions never connect to a display server
+APP = app.App([], not args.HEADLESS, process=args.HEADLESS)
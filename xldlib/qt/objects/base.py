@@ -9,7 +9,7 @@
 '''
 
 # load modules/submodules
-from PySide import QtCore, QtGui
+from PySide import QtCore
 
 from xldlib.onstart.main import APP
 
@@ -29,10 +29,14 @@ class BaseObject(QtCore.QObject):
     # SHARED
     # ------
     app = APP
-    desktop = QtGui.QDesktopWidget()
 
     #    PROPERTIES
 
+    @property
+    def desktop(self):
+        # lazily bound, headless sessions have no desktop widget
+        return self.app.desktop()
+
     @property
     def desktop_rect(self):
         return self.desktop.availableGeometry()
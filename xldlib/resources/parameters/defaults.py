@@ -98,6 +98,16 @@ DEFAULTS = mapping.Configurations(DEFAULT_PATH, [
     # Boolean for whether to report modifications positions relative to
     # peptide or protein sequence (False means relative to peptide)
     ('peptide_relative_start', False),
+    # Storage layout for the matched data columns, {'columnar', 'lists'}
+    # The columnar layout stores typed NumPy arrays and interned strings,
+    # allowing vectorized grouping and row lookups
+    ('matched_layout', 'columnar'),
+    # Number of pepXML spectrum queries to buffer before storing the
+    # scans in the matched data, bounding the memory while parsing
+    ('pepxml_chunk_size', 1000),
+    # Boolean for whether to extract Proteome Discoverer MSF files with
+    # set-based JOIN queries, rather than a separate query per stage
+    ('msf_bulk_extraction', True),
 
     # RAW DATA
     # --------
@@ -117,6 +127,16 @@ DEFAULTS = mapping.Configurations(DEFAULT_PATH, [
     # Technically toggleable settings for the precursor and product scan levels
     ('precursor_scan_level', 2),
     ('product_scan_level', 3),
+    # Storage layout for the parsed scans, {'columnar', 'groups'}
+    # The columnar layout stores metadata in a table and the peak lists
+    # in concatenated arrays, rather than an HDF5 group per scan
+    ('spectral_layout', 'columnar'),
+    # Boolean for whether to cache parsed spectra between runs, keyed by
+    # the raw file contents and parsing settings
+    ('cache_spectra', True),
+    # Maximum size of the parsed spectra cache, in MB, before evicting
+    # the least recently used files
+    ('spectral_cache_size', 10240),
 
     # LINK FINDING
     # ------------
@@ -200,6 +220,9 @@ DEFAULTS = mapping.Configurations(DEFAULT_PATH, [
     # Number of minutes before the sequenced ID to consider
     # in-window (not noise) for the transitions
     ('minus_time_window', 1.5),
+    # Only extract the transitions for MS1 scans within the time window
+    # of the sequenced IDs, skipping all other scans for the transitions
+    ('windowed_extraction', True),
     # Quantify transitions in all files. Still subject to retention
     # time similarities between files.
     ('quantify_globally', True),
@@ -298,6 +321,9 @@ DEFAULTS = mapping.Configurations(DEFAULT_PATH, [
     ('fingerprint_sortkey', 'peptide'),
     # Default sort order, ascending (False) or descending (True)
     ('fingerprint_sort_reverse', False),
+    # Peptides buffered per sorted run when streaming the mass-sorted
+    # peptide index to disk
+    ('peptide_index_chunk_size', 100000),
 
     # PEPTIDE SEARCH
     # --------------
@@ -74,6 +74,7 @@ def make_dirs(iterable):
 HOME = find_home()
 RESOURCE = os.path.join(HOME, 'resources')
 BACKING_STORE = os.path.join(RESOURCE, 'backing_store')
+CACHE = os.path.join(BACKING_STORE, 'cache')
 DATA = os.path.join(RESOURCE, 'data')
 DATABASES = os.path.join(RESOURCE, 'databases')
 PREFERENCES = os.path.join(RESOURCE, 'preferences')
@@ -82,6 +83,7 @@ DIRS = {
     'home': HOME,
     'resource': RESOURCE,
     'backing_store': BACKING_STORE,
+    'cache': CACHE,
     'data': DATA,
     'databases': DATABASES,
     'preferences': PREFERENCES,
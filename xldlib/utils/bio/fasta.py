@@ -12,6 +12,12 @@
     file was parsed in ~6 seconds, or about 1 record every 9e-6 seconds
     (comparable to BioPython).
 
+    For bulk imports, `Reader` yields compact (accession, header,
+    sequence) records from large buffered reads split on '>' record
+    boundaries, without any per-line processing. The accession is
+    extracted with the header grammar detected from the first record,
+    which is cached for the file, and the isoform number is removed.
+
     :copyright: (c) 2015 The Regents of the University of California.
     :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
 '''
@@ -19,9 +25,20 @@
 # load modules
 from xldlib import exception
 from xldlib.definitions import re
+from xldlib.resources.parameters import defaults
 from xldlib.utils import logger
 from xldlib.utils.io_ import high_level, ziptools
 
+# load objects/functions
+from collections import namedtuple
+
+# CONSTANTS
+# ---------
+
+# removed from the sequence lines when block reading
+DELETE = b' \t\r\n-'
+STOP = b'*'
+
 # REGEXP
 # ------
 
@@ -29,10 +46,31 @@ ISOFORM = re.compile(r'^(.*)\.\d$')
 HYPHEN = re.compile(r'-')
 ASTERIX = re.compile(r'\*')
 
+# HEADER GRAMMARS
+# ---------------
+
+Grammar = namedtuple("Grammar", "name regex")
+
+# each captures the accession, and the grammars which match a header
+# capture the same accession, so a cached grammar cannot mask another
+GRAMMARS = [
+    # >sp|P02769|ALBU_BOVIN Serum albumin OS=Bos taurus...
+    Grammar('uniprot', re.compile(r'^(?:sp|tr)\|([^|\s]+)\|')),
+    # >gi|160332366|sp|P46406.3|G3P_RABIT RecName: Full=Glyce...
+    Grammar('ncbi', re.compile(r'^gi\|\d+\|[a-z]+\|([^|\s]+)')),
+    # >ref|NP_001035258.1| ferritin...
+    Grammar('database', re.compile(r'^(?:gi\|\d+\|)?[a-z]+\|([^|\s]+)')),
+    # >P02769 Serum albumin, without any database fields
+    Grammar('generic', re.compile(r'^([^|\s]*)(?:\s|$)'))
+]
+
 # OBJECTS
 # -------
 
 
+Record = namedtuple("Record", "accession header sequence")
+
+
 class FastaParserMixin(object):
     '''
     Mixin to provide methods to parse FASTA records using
@@ -370,10 +408,140 @@ class Parse(object):
             yield protein
 
 
+@logger.init('bio', 'DEBUG')
+class Reader(object):
+    '''
+    High-throughput FASTA reader, which reads the file in large blocks,
+    splits each block on record boundaries, and yields a `Record` for
+    each entry. Sequences are cleaned as in `Parse`: gaps and
+    whitespace are removed, and the sequence ends at a stop codon.
+    '''
+
+    def __init__(self, path=None, blocksize=None):
+        super(Reader, self).__init__()
+
+        if blocksize is None:
+            blocksize = defaults.DEFAULTS['chunk_size']
+        self.blocksize = blocksize
+        self.fasta = None
+        self.grammar = None
+
+        if path is not None:
+            self.open(path)
+
+    @logger.call('bio', 'debug')
+    def __enter__(self):
+        return self
+
+    @logger.call('bio', 'debug')
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __iter__(self):
+        '''Returns the record iterator, raising a ValueError if not open'''
+
+        if self.fasta is None:
+            raise ValueError("Cannot iterate a closed FASTA reader")
+        return self.parse()
+
+    #       I/O
+
+    def open(self, path):
+        '''Open binary file handle, and reset the header grammar'''
+
+        path = ziptools.decompress(path).name
+        self.fasta = open(path, 'rb')
+        self.grammar = None
+
+    def close(self):
+        '''Remove temp files and close file object'''
+
+        if self.fasta is not None:
+            self.fasta.close()
+            high_level.remove_tempfiles()
+            self.fasta = None
+
+    #     PARSERS
+
+    def parse(self):
+        '''Yields a `Record` for each entry within the open file'''
+
+        assert self.fasta is not None
+
+        for block in _blocks(self.fasta, self.blocksize):
+            entries = block.split(b'\n>')
+            if entries[0].startswith(b'>'):
+                entries[0] = entries[0][1:]
+            else:
+                # block starts at a record boundary, or text before a header
+                del entries[0]
+
+            for entry in entries:
+                header, __, sequence = entry.partition(b'\n')
+                header = header.rstrip(b'\r').decode('utf-8', 'replace')
+
+                sequence = sequence.translate(None, DELETE)
+                stop = sequence.find(STOP)
+                if stop != -1:
+                    sequence = sequence[:stop]
+
+                yield Record(self.getaccession(header), header,
+                    sequence.decode('ascii'))
+
+    #     GETTERS
+
+    def getaccession(self, header):
+        '''
+        Returns the accession from the header, without the isoform,
+        detecting the grammar on the first record or if the cached
+        grammar does not match.
+        '''
+
+        return _remove_isoform(self._getaccession(header))
+
+    #     HELPERS
+
+    def _getaccession(self, header):
+        if self.grammar is not None:
+            match = self.grammar.regex.match(header)
+            if match is not None:
+                return match.group(1)
+
+        for grammar in GRAMMARS:
+            match = grammar.regex.match(header)
+            if match is not None:
+                self.grammar = grammar
+                return match.group(1)
+
+        # unrecognized database fields, use the first token
+        return header.split(None, 1)[0] if header.strip() else ''
+
+
 # PRIVATE
 # -------
 
 
+def _blocks(fileobj, blocksize):
+    '''
+    Yields blocks of complete records from buffered reads, each
+    ending before a record header.
+    '''
+
+    remainder = b''
+    for block in iter(lambda: fileobj.read(blocksize), b''):
+        block = remainder + block
+        end = block.rfind(b'\n>')
+        if end == -1:
+            remainder = block
+        else:
+            yield block[:end]
+            remainder = block[end:]
+
+    if remainder:
+        yield remainder
+
+
+
 def _sequence(line, clean=True):
     '''
     If clean_sequence, returns a r'[a-zA-Z]' matching sequence
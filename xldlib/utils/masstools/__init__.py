@@ -13,7 +13,9 @@ from .formula import *
 
 __all__ = [
     'CrosslinkedMass',
+    'MassTable',
     'getpeptideformula',
+    'getpositionformula',
     'mz',
     'ppm',
 ]
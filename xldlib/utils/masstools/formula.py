@@ -22,7 +22,9 @@ from xldlib.utils import logger
 
 __all__ = [
     'CrosslinkedMass',
+    'MassTable',
     'getpeptideformula',
+    'getpositionformula',
 ]
 
 
@@ -66,25 +68,39 @@ def getmodificationsformula(modifications, engine, **kwds):
     atom_counts = chemical.Molecule()
     modifications = modifications.byposition()
 
-    for position, names in modifications.items():
-        try:
-            if frozenset(names) in chemical_defs.MODIFICATION_INTERACTIONS:
-                # add the converted modification from id
-                id_ = chemical_defs.MODIFICATION_INTERACTIONS[names].converted
-                add_modifications(atom_counts, id_, **kwds)
-            else:
-                # no modification interaction, just add
-                #ids = (engine.defaults.modifications.get(i)[0] for i in names)
-                ids = [engine.defaults.modifications.get(i)[0] for i in names]
-                add_modifications(atom_counts, *ids, **kwds)
-
-        except (TypeError, IndexError):
-            # Nonetype from .get(name)[0] or [][0]
-            print("Modification not recognized: " + str(names), file=sys.stderr)
+    for names in modifications.values():
+        update_position(atom_counts, names, engine, **kwds)
 
     return atom_counts
 
 
+def getpositionformula(names, engine, **kwds):
+    '''Calculates the formula for the modification names at a position'''
+
+    atom_counts = chemical.Molecule()
+    update_position(atom_counts, names, engine, **kwds)
+    return atom_counts
+
+
+def update_position(atom_counts, names, engine, **kwds):
+    '''Adds the formula for the modification names at a single position'''
+
+    try:
+        if frozenset(names) in chemical_defs.MODIFICATION_INTERACTIONS:
+            # add the converted modification from id
+            id_ = chemical_defs.MODIFICATION_INTERACTIONS[names].converted
+            add_modifications(atom_counts, id_, **kwds)
+        else:
+            # no modification interaction, just add
+            #ids = (engine.defaults.modifications.get(i)[0] for i in names)
+            ids = [engine.defaults.modifications.get(i)[0] for i in names]
+            add_modifications(atom_counts, *ids, **kwds)
+
+    except (TypeError, IndexError):
+        # Nonetype from .get(name)[0] or [][0]
+        print("Modification not recognized: " + str(names), file=sys.stderr)
+
+
 def getpeptideformula(peptide, mods, engine, **kwds):
     '''
     Returns the full mass for the peptide, with modifications, assuming
@@ -101,11 +117,66 @@ def getpeptideformula(peptide, mods, engine, **kwds):
 # --------------------
 
 
+class MassTable(object):
+    '''
+    Per-run memo for crosslinked peptide masses. The peptide masses
+    are keyed by the matched data row index, and the link masses by
+    the crosslinker and bridging mode, so the combinations searched
+    for each precursor scan only sum cached values.
+    '''
+
+    def __init__(self):
+        super(MassTable, self).__init__()
+
+        self.peptides = {}
+        self.links = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.peptides) + len(self.links)
+
+    #     GETTERS
+
+    def getpeptide(self, row, formula, modification):
+        '''Returns the (mass, neutralloss) for the matched data row'''
+
+        value = self.peptides.get(row)
+        if value is None:
+            self.misses += 1
+            value = (formula.mass, modification['neutralloss'])
+            self.peptides[row] = value
+        else:
+            self.hits += 1
+        return value
+
+    def getlink(self, key, function, ends):
+        '''Returns the link mass for the key, calculating it if not cached'''
+
+        value = self.links.get(key)
+        if value is None:
+            self.misses += 1
+            value = function(ends)
+            self.links[key] = value
+        else:
+            self.hits += 1
+        return value
+
+    #     HELPERS
+
+    def clear(self):
+        self.peptides.clear()
+        self.links.clear()
+        self.hits = 0
+        self.misses = 0
+
+
 @logger.init('chemical', 'DEBUG')
 class CrosslinkedMass(object):
     '''
     Definitions for finding crosslinker link masses and crosslinked peptide
-    masses.
+    masses. Masses are memoized in the file row's mass table if one is
+    bound, otherwise, within a table for the instance.
     '''
 
     def __init__(self, row, crosslinker):
@@ -114,6 +185,11 @@ class CrosslinkedMass(object):
         self.crosslinker = crosslinker
         self.engine = row.engines['matched']
 
+        table = getattr(row, 'masstable', None)
+        if table is None:
+            table = MassTable()
+        self.table = table
+
         self.setdeadendmass(crosslinker.ends)
         self.bridgemass = chemical.Molecule(crosslinker.bridge).mass
 
@@ -130,15 +206,30 @@ class CrosslinkedMass(object):
 
     #     GETTERS
 
-    def getpeptidemass(self, ends, formulas, modifications):
-        '''Returns the total mass for a crosslinked peptide'''
+    def getpeptidemass(self, ends, formulas, modifications, rows=None):
+        '''
+        Returns the total mass for a crosslinked peptide. If the matched
+        data `rows` are provided, the peptide masses are memoized by row.
+        '''
 
-        masses = (i.mass for i in formulas)
-        neutrallosses = (i['neutralloss'] for i in modifications)
+        if rows is None:
+            masses = [i.mass for i in formulas]
+            neutrallosses = [i['neutralloss'] for i in modifications]
+        else:
+            zipped = ZIP(rows, formulas, modifications)
+            values = [self.table.getpeptide(*i) for i in zipped]
+            masses = [i[0] for i in values]
+            neutrallosses = [i[1] for i in values]
 
         return sum(masses) + sum(neutrallosses) + self.getlinkmass(ends)
 
     def getlinkmass(self, ends):
+        '''Returns the memoized linkmass for the bridging mode'''
+
+        key = (self.crosslinker.id, ends.number, frozenset(ends.dead.items()))
+        return self.table.getlink(key, self.calculatelinkmass, ends)
+
+    def calculatelinkmass(self, ends):
         '''Calculates the linkmass of the crosslinked peptide bridging mode'''
 
         deadend = self.getdeadendmass(ends)
@@ -9,7 +9,7 @@
     :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
 '''
 
-from .array import finite, spacing, to_num
+from .array import expandranges, finite, spacing, to_num
 from .functions import gaussian
 from .gaussian import fit_gaussian
 from .number import equal, isinf, isnan, isnull
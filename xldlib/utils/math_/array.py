@@ -46,6 +46,23 @@ def finite(*arrays):
     return tuple(i[isfinite] for i in arrays)
 
 
+def expandranges(starts, ends):
+    '''
+    Expands the half-open [start, end) ranges, without a Python loop,
+    to the owning range index and the position for each value.
+    :
+        expandranges(np.array([0, 2, 5]), np.array([2, 2, 6]))
+            -> (array([0, 0, 2]), array([0, 1, 5]))
+    '''
+
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(ends, dtype=np.int64) - starts
+    owners = np.repeat(np.arange(lengths.size), lengths)
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    positions = np.arange(owners.size) - offsets + starts[owners]
+    return owners, positions
+
+
 def to_num(array):
     '''
     Replaces all the non-number elements in an array (np.nan, np.inf)
@@ -10,6 +10,7 @@
 '''
 
 __all__ = [
+    'batch',
     'counts',
     'files',
     'helper',
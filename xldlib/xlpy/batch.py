@@ -0,0 +1,574 @@
+'''
+    XlPy/batch
+    __________
+
+    Headless runner for XL Discoverer, which executes the same
+    `RunHelper` stages as `CrosslinkDiscovererThread` without a QThread,
+    an event loop or a graphical display, profiling each stage.
+
+    Input manifests are serialized `InputFilesTable` objects, identical
+    to the tables stored in `input_files.json`:
+        {
+            "type": "level_separated",
+            "mode": "default",
+            "files": {
+                "Precursor Scans": ["/data/run1_d.mgf"],
+                "Product Scans": ["/data/run1_c.mgf"],
+                "Matched Output": ["/data/run1.txt"]
+            }
+        }
+
+    Parameter profiles are optional JSON mappings overriding the
+    stored, selected configurations:
+        {
+            "crosslinkers": ["DSSO"],
+            "profile": 1,
+            "reporterion": 1,
+            "reporterion_quantitation": false
+        }
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load future
+from __future__ import division, print_function
+
+# load modules
+import inspect
+import json
+import os
+import shutil
+import six
+import subprocess
+import sys
+import time
+import traceback
+
+try:
+    import resource
+except ImportError:
+    # Windows, no getrusage
+    resource = None
+
+from xldlib import exception
+from xldlib.export import openoffice
+from xldlib.objects import documents, matched, protein, run
+from xldlib.qt.objects import base
+from xldlib.resources import chemical_defs, paths
+from xldlib.resources.parameters import defaults, input_files
+from xldlib.utils import logger, signals
+from xldlib.utils.io_ import high_level
+
+from . import files, helper, ms1quantitation, parameters
+
+# load objects/functions
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+
+
+# CONSTANTS
+# ---------
+
+# memo key shared with the QThread, `APP.discovererthread`
+THREAD_KEY = 'CrosslinkDiscovererThread'
+
+# ru_maxrss is reported in kilobytes on Linux, bytes on OS X
+RSS_SCALE = 1 if sys.platform == 'darwin' else 1024
+
+BACKING_STORES = (
+    'matched',
+    'spectra',
+    'transition',
+    'spreadsheet'
+)
+
+TRANSITION_CACHE_SUFFIX = documents.TransitionsDocumentCache.suffix
+
+BATCH_SCRIPT = os.path.join(paths.DIRS['home'], 'xldiscoverer_batch.py')
+
+# stages skipped by shards, since the merged run is exported once
+EXPORT_STAGES = (
+    openoffice.writematched,
+)
+
+
+# OBJECTS
+# -------
+
+StageProfile = namedtuple("StageProfile", "name time peak_rss")
+
+
+# HELPERS
+# -------
+
+
+def peakrss():
+    '''Returns the peak resident set size of the process, in bytes'''
+
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_maxrss * RSS_SCALE
+
+
+def backingstores():
+    '''Returns the paths to the run backing stores, including caches'''
+
+    for key in BACKING_STORES:
+        yield paths.FILES[key]
+    yield paths.FILES['transition'] + TRANSITION_CACHE_SUFFIX
+
+
+def stagename(caller):
+    '''Returns a readable identifier for a `RunHelper` callable'''
+
+    name = getattr(caller, '__name__', None)
+    if name is None:
+        name = type(caller).__name__
+    return name
+
+
+def manifestname(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def loadmanifest(path):
+    '''Loads an `InputFilesTable` from a JSON input manifest'''
+
+    with open(path) as fileobj:
+        data = json.load(fileobj)
+    return input_files.InputFilesTable.loadjson(data)
+
+
+def loadparameters(path):
+    '''
+    Loads a parameter profile from a JSON file, and returns the
+    keyword arguments for `Parameters` and the reporter ion flag.
+    '''
+
+    with open(path) as fileobj:
+        data = json.load(fileobj)
+
+    kwds = {}
+    if 'crosslinkers' in data:
+        crosslinkers = {}
+        for key in data['crosslinkers']:
+            for id_ in getcrosslinkerids(key):
+                crosslinkers[id_] = chemical_defs.CROSSLINKERS[id_]
+
+        modifications = chemical_defs.MODIFICATIONS
+        kwds['crosslinkers'] = crosslinkers
+        kwds['fragments'] = {modifications[i].name: modifications[i]
+            for v in crosslinkers.values() for i in v.fragments}
+
+    if 'profile' in data:
+        kwds['profile'] = chemical_defs.PROFILES[data['profile']]
+    if 'reporterion' in data:
+        kwds['reporterion'] = chemical_defs.REPORTER_IONS[data['reporterion']]
+
+    return kwds, data.get('reporterion_quantitation')
+
+
+def getcrosslinkerids(key):
+    '''
+    Returns the crosslinker IDs from an integer ID or name, raising a
+    KeyError if no stored crosslinker matches the key.
+    '''
+
+    crosslinkers = chemical_defs.CROSSLINKERS
+    if isinstance(key, six.integer_types):
+        ids = [key] if key in crosslinkers else []
+    else:
+        # names are a defaultdict, do not create an empty entry
+        ids = list(crosslinkers.names.get(key, ()))
+
+    if not ids:
+        raise KeyError("Unrecognized crosslinker: {!r}".format(key))
+    return ids
+
+
+# RUNNER
+# ------
+
+
+@logger.init('threading', 'DEBUG')
+class HeadlessDiscoverer(base.BaseObject):
+    '''
+    Drop-in replacement for `CrosslinkDiscovererThread`, which runs
+    the `RunHelper` sequence in the calling thread and records the wall
+    time and peak RSS after each stage.
+    '''
+
+    def __init__(self, manifest, quantitative=False, export=True, **kwds):
+        super(HeadlessDiscoverer, self).__init__()
+
+        # all stages find the active run through `APP.discovererthread`
+        self.app.threads[THREAD_KEY] = self
+
+        self.part_done = signals.Signal()
+        self.procedure_done = signals.Signal()
+        self.paused = signals.Signal()
+        self.message = signals.Signal()
+        self.error = signals.Signal()
+        self.message.connect(self.onmessage)
+        self.error.connect(self.onerror)
+
+        self.isrunning = False
+        self.ispaused = False
+        self.errors = []
+        self.profiles = []
+
+        self.quantitative = quantitative
+        self.export = export
+        self.reporterions = kwds.pop('reporterions', None)
+        if self.reporterions is None:
+            self.reporterions = defaults.DEFAULTS['reporterion_quantitation']
+
+        self.proteins = protein.ProteinTable(tryopen=True, set_mapping=True)
+        self.protein_model = protein.ProteinModel(None, self.proteins.db)
+        self.parameters = parameters.Parameters(**kwds)
+        self.fingerprinting = self.proteins.get_limited()
+
+        self.matched = matched.File.new()
+        self.rundata = run.RunDataset(quantitative, new=True)
+
+        if self.fingerprinting:
+            self.mowse = protein.MowseDatabase.fromproteins(self.proteins)
+        if self.quantitative:
+            self.transitions = documents.TransitionsDocument.new()
+
+        self.files = files.IntegratedFiles(manifest)
+        self.helper = helper.RunHelper()
+
+    def run(self):
+        '''Executes each stage, returning True if the run completed'''
+
+        self.isrunning = True
+        try:
+            self.main()
+            self.rundata.close()
+
+        except IOError as error:
+            self.onerror(error)
+        except StopIteration:
+            self.onerror(exception.CODES['010'])
+        except Exception as error:
+            print(traceback.format_exc(), file=sys.stderr)
+            self.onerror(error, exception.CODES['019'])
+
+        finally:
+            high_level.remove_tempfiles()
+
+        completed = self.isrunning and not self.errors
+        self.isrunning = False
+        self.procedure_done.emit(completed)
+        return completed
+
+    #     HELPERS
+
+    def main(self):
+        '''Sequentially calls and profiles the runtime callables'''
+
+        for caller in self.helper:
+            if not self.isrunning:
+                break
+            elif not self.export and caller in EXPORT_STAGES:
+                continue
+
+            start = time.time()
+            if inspect.isclass(caller):
+                inst = caller()
+                inst()
+            elif callable(caller):
+                caller()
+
+            profile = StageProfile(stagename(caller), time.time() - start,
+                                   peakrss())
+            self.profiles.append(profile)
+
+    def onmessage(self, text, color='black', bool_=False):
+        print(text, file=sys.stdout)
+
+    def onerror(self, *args):
+        '''Records errors emitted by the stages and stops the run'''
+
+        message = ' '.join(str(i) for i in args)
+        print(message, file=sys.stderr)
+        self.errors.append(message)
+        self.isrunning = False
+
+    def pause(self, mode):
+        '''No user interaction, unpause immediately'''
+
+        self.paused.emit(mode)
+        self.unpause(mode)
+
+    def unpause(self, mode):
+        if mode == 'transition':
+            inst = ms1quantitation.IntegrateXics.fromthread()
+            inst()
+
+        self.ispaused = False
+
+    def report(self):
+        '''Returns a serializable summary of the stage profiles'''
+
+        return {
+            'completed': not self.errors,
+            'errors': self.errors,
+            'time': sum(i.time for i in self.profiles),
+            'peak_rss': peakrss(),
+            'stages': [i._asdict() for i in self.profiles]
+        }
+
+    def save(self, directory):
+        '''Copies the run's backing stores and report to `directory`'''
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        if self.matched is not None:
+            self.matched.save()
+        if self.quantitative:
+            self.transitions.close(save=True)
+
+        for path in backingstores():
+            if os.path.exists(path):
+                shutil.copy(path, directory)
+
+        with open(os.path.join(directory, 'report.json'), 'w') as dump:
+            json.dump(self.report(), dump, sort_keys=True, indent=4)
+
+
+# BATCH
+# -----
+
+
+def runmanifests(manifests, outdir, parameters_=None, quantitative=False,
+    export=True):
+    '''
+    Runs each input manifest sequentially, storing the outputs for
+    each manifest within a subdirectory of `outdir`. The spreadsheets
+    are only written if `export` is set.
+
+    Returns (list):     manifest path and report for each run
+    '''
+
+    kwds = {}
+    if parameters_ is not None:
+        kwds, reporterions = loadparameters(parameters_)
+        kwds['reporterions'] = reporterions
+
+    reports = []
+    for path in manifests:
+        name = manifestname(path)
+        discoverer = HeadlessDiscoverer(loadmanifest(path), quantitative,
+                                        export, **kwds)
+        discoverer.run()
+        discoverer.save(os.path.join(outdir, name))
+        reports.append((path, discoverer.report()))
+
+    return reports
+
+
+# SHARDS
+# ------
+
+
+def splitmanifest(table):
+    '''Splits an input manifest into single-row manifests'''
+
+    for row in table.rows:
+        yield {
+            'type': table.type,
+            'mode': table.mode,
+            'files': {k: [v[row]] for k, v in table.items()}
+        }
+
+
+def shardcommand(manifest, outdir, store, parameters_, quantitative):
+    '''Returns the command-line arguments to run a single shard'''
+
+    command = [
+        sys.executable, BATCH_SCRIPT, manifest,
+        '--outdir', outdir,
+        '--backing-store', store,
+        '--no-export'
+    ]
+    if parameters_ is not None:
+        command.extend(('--parameters', parameters_))
+    if quantitative:
+        command.append('--quantitative')
+    return command
+
+
+def runsharded(path, outdir, parameters_=None, quantitative=False,
+    processes=None):
+    '''
+    Runs each row of an input manifest concurrently, with one headless
+    process per `FileRow`, and a separate output directory and backing
+    store per process. The rows are independent until export, so the
+    shards skip the export, and are then merged into a single matched
+    file, spectral dataset and transitions document, and the
+    spreadsheet is written once.
+
+    Quantitative runs with `quantify_globally` set search the XICs
+    across every row, and therefore run in a single process, as does
+    a manifest with a single row.
+
+    Returns (dict):     report for the merged run
+    '''
+
+    table = loadmanifest(path)
+    if table.length < 2 or (quantitative and
+        defaults.DEFAULTS['quantify_globally']):
+        # global XIC searches require every row in a single process
+        return runmanifests([path], outdir, parameters_, quantitative)[0][1]
+
+    directory = os.path.join(outdir, manifestname(path))
+    shards = os.path.join(directory, 'shards')
+
+    commands = []
+    directories = []
+    for index, manifest in enumerate(splitmanifest(table)):
+        # the batch script writes to `<outdir>/<manifest name>`
+        sharddir = os.path.join(shards, str(index))
+        if not os.path.exists(sharddir):
+            os.makedirs(sharddir)
+        manifestpath = os.path.join(shards, '{}.json'.format(index))
+        with open(manifestpath, 'w') as dump:
+            json.dump(manifest, dump, sort_keys=True, indent=4)
+
+        store = os.path.join(sharddir, '.store')
+        commands.append(shardcommand(manifestpath, sharddir, store,
+                                     parameters_, quantitative))
+        directories.append(os.path.join(sharddir, str(index)))
+
+    if processes is None:
+        processes = defaults.DEFAULTS['max_multiprocessing']
+    pool = ThreadPool(processes)
+    returncodes = pool.map(subprocess.call, commands)
+    pool.close()
+    pool.join()
+
+    return mergeshards(directories, directory, quantitative, returncodes)
+
+
+def loadreport(directory, returncode=0):
+    '''
+    Loads the report for a shard, or returns a failed report if the
+    shard exited before writing one.
+    '''
+
+    path = os.path.join(directory, 'report.json')
+    if os.path.exists(path):
+        with open(path) as fileobj:
+            return json.load(fileobj)
+
+    return {
+        'completed': False,
+        'errors': ['Shard {0} exited with code {1}, without a report'.format(
+            os.path.basename(directory), returncode)],
+        'time': 0.,
+        'peak_rss': None,
+        'stages': []
+    }
+
+
+def mergeshards(directories, outdir, quantitative, returncodes=None):
+    '''
+    Merges the outputs of each completed shard, in row order, into
+    `outdir`, and writes the merged spreadsheet. Shards which crashed
+    are reported as failed, and are not merged.
+    '''
+
+    if returncodes is None:
+        returncodes = [0] * len(directories)
+    if not os.path.exists(outdir):
+        os.makedirs(outdir)
+
+    reports = [loadreport(d, c) for d, c in zip(directories, returncodes)]
+    completed = [d for d, r, c in zip(directories, reports, returncodes)
+        if r['completed'] and not c]
+
+    if completed:
+        merged = mergematched(completed, outdir)
+        mergespectra(completed, outdir, quantitative)
+        if quantitative:
+            mergetransitions(completed, outdir)
+
+        writer = openoffice.core.MatchedWriter.frommatched(merged)
+        writer()
+        shutil.copy(paths.FILES['spreadsheet'], outdir)
+
+    report = {
+        'completed': len(completed) == len(directories),
+        'failed': [d for d in directories if d not in completed],
+        'errors': [e for r in reports for e in r['errors']],
+        # shards run concurrently, the slowest bounds the wall time
+        'time': max(r['time'] for r in reports),
+        'peak_rss': max(r['peak_rss'] or 0 for r in reports),
+        'stages': [],
+        'shards': reports
+    }
+    with open(os.path.join(outdir, 'report.json'), 'w') as dump:
+        json.dump(report, dump, sort_keys=True, indent=4)
+
+    return report
+
+
+def shardpath(directory, key):
+    return os.path.join(directory, os.path.basename(paths.FILES[key]))
+
+
+def mergematched(directories, outdir):
+    '''Concatenates the matched DataTables from each shard'''
+
+    merged = matched.File.open(shardpath(directories[0], 'matched'))
+    for directory in directories[1:]:
+        shard = matched.File.open(shardpath(directory, 'matched'))
+        for table in shard:
+            merged.append(table)
+        shard.close()
+
+    merged.path = shardpath(outdir, 'matched')
+    merged.save()
+    return merged
+
+
+def mergespectra(directories, outdir, quantitative):
+    '''Copies the spectral row from each shard into a new dataset'''
+
+    rundata = run.RunDataset(quantitative)
+    rundata.new(shardpath(outdir, 'spectra'))
+
+    for index, directory in enumerate(directories):
+        shard = run.RunDataset(quantitative, shardpath(directory, 'spectra'),
+                               mode='r')
+        row = shard.spectra.getfilerow(0)
+        row.copy(newparent=rundata.spectra.group, newname=str(index),
+                 recursive=True)
+        shard.close()
+
+    rundata.close()
+
+
+def mergetransitions(directories, outdir):
+    '''Copies the transition file data and cache from each shard'''
+
+    path = shardpath(outdir, 'transition')
+    document = documents.TransitionsDocument.new(path, blank=True)
+
+    for index, directory in enumerate(directories):
+        shard = documents.TransitionsDocument.open(
+            shardpath(directory, 'transition'), mode='r')
+        if not index:
+            document.data['attrs'].update(shard.data['attrs'])
+
+        document.data['files'].append(shard.data['files'][0])
+        shard.cache[0].copy(newparent=document.cache.root,
+                            newname=str(index),
+                            recursive=True)
+        shard.close()
+
+    document.close(save=True)
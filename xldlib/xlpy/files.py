@@ -17,7 +17,7 @@ from xldlib import exception
 from xldlib.onstart.main import APP
 from xldlib.qt.objects import base
 from xldlib.resources.parameters import input_files
-from xldlib.utils import logger
+from xldlib.utils import logger, masstools
 from xldlib.utils.io_ import ziptools
 from xldlib.xlpy import matched, scan_linkers, wrappers
 
@@ -59,6 +59,7 @@ class FileRow(base.BaseObject):
         self.data = self.source.matched.newtable(files)
         self.spectra = self.source.rundata.spectra.addrow()
         self.linked = scan_linkers.Row(self)
+        self.masstable = masstools.MassTable()
 
         if self.source.quantitative:
             self.transitions = self.source.transitions.addrow()
@@ -130,7 +131,7 @@ class FileRow(base.BaseObject):
 class IntegratedFiles(base.BaseObject):
     '''Definitions for the sum of all XL Discoverer files submitted'''
 
-    def __init__(self):
+    def __init__(self, table=None):
         super(IntegratedFiles, self).__init__()
 
         self.offset = 0
@@ -140,7 +141,7 @@ class IntegratedFiles(base.BaseObject):
         self.source = weakref.proxy(self.app.discovererthread)
         self.parsematched = matched.ProcessMatchedData()
         self.parsespectra = None
-        self.setfiles()
+        self.setfiles(table)
 
     def __iter__(self):
         for index, row in enumerate(self.rows):
@@ -155,12 +156,20 @@ class IntegratedFiles(base.BaseObject):
 
     #      SETTERS
 
-    def setfiles(self):
-        '''Sets the key files and initializes the rows'''
-
-        files = input_files.INPUT_FILES.get_table(int(self.source.quantitative))
-        self.mode = files['current']
-        self.files = weakref.proxy(files[self.mode])
+    def setfiles(self, table=None):
+        '''
+        Sets the key files and initializes the rows, from the stored
+        input file configurations or from an `InputFilesTable` manifest.
+        '''
+
+        if table is None:
+            quantitative = int(self.source.quantitative)
+            files = input_files.INPUT_FILES.get_table(quantitative)
+            self.mode = files['current']
+            self.files = weakref.proxy(files[self.mode])
+        else:
+            self.mode = input_files.INPUT_FILE_TYPES(table.type)
+            self.files = table
         self._filechecker()
 
         self.source.rundata.mode = int(self.ishierarchical())
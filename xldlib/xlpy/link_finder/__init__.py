@@ -18,5 +18,6 @@ __all__ = [
     'expand',
     'indexing',
     'scan',
-    'sorting'
+    'sorting',
+    'subsetsum'
 ]
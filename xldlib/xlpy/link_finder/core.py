@@ -109,9 +109,7 @@ class SearchLinks(base.BaseObject):
             scan -- instance of ScanTuple from link_finder.scan
         '''
 
-        crosslinks = []
-        for scan, indexes in self.scans.iterpeptide(base_scan):
-            crosslinks.extend(self.scans.itercrosslinkers(scan, indexes))
+        crosslinks = self.scans.getlinks(base_scan)
 
         # check missing only after exhausting search, due to high "cost"
         # and the redundancy since the crosslink number is recalculated
@@ -10,15 +10,14 @@
 '''
 
 # load modules
-import itertools as it
-
-from collections import namedtuple
+from collections import Counter, namedtuple
 
 from xldlib.definitions import ZIP
 from xldlib.qt.objects import base
+from xldlib.resources.parameters import reports
 from xldlib.utils import logger, masstools
 
-from . import crosslinks, indexing, maker, search
+from . import crosslinks, indexing, maker, search, subsetsum
 
 
 # OBJECTS
@@ -27,7 +26,7 @@ from . import crosslinks, indexing, maker, search
 
 class Scan(namedtuple("Scan",
     "formula modifications start peptide "
-    "z precursor_mz precursor_z indexer")):
+    "z precursor_mz precursor_z indexer rows")):
     '''Subclass with facile repacking methods'''
 
     #    PUBLIC
@@ -36,7 +35,7 @@ class Scan(namedtuple("Scan",
         '''Repacks the scan for smaller index combinations'''
 
         data = {}
-        for column in MS3COLUMNS:
+        for column in REPACKED:
             data[column] = [getattr(self, column)[i] for i in rows]
         return self._replace(**data)
 
@@ -65,6 +64,23 @@ MS2COLUMNS = (
 
 COLUMNS = MS3COLUMNS + MS2COLUMNS
 
+# the matched data row indexes are repacked with the MS3 columns
+REPACKED = MS3COLUMNS + ('rows',)
+
+
+# DATA
+# ----
+
+# padding for the mass windows, since the subset sums are calculated
+# in a different order than the link masses
+TOLERANCE = 1e-6
+
+# multilinks are only reported without any of the following links
+CONFIDENT = (
+    'Standard',
+    'Low Confidence'
+)
+
 
 # FACTORY
 # -------
@@ -99,33 +115,114 @@ class ScanFactory(base.BaseObject):
             for index in [-2, -1]:
                 data[index] = data[index][0]
 
-            return Scan(*data, indexer=indexer)
+            rows = list(indexer.filtered)
+            return Scan(*data, indexer=indexer, rows=rows)
 
-    #    ITERATORS
+    #    PUBLIC
 
-    def iterpeptide(self, scan):
-        '''Sample all peptide combinations from the scan'''
+    def getlinks(self, scan):
+        '''
+        Finds all peptide combinations and crosslinker numbers with
+        a theoretical mass within the precursor mass windows. The mass
+        of a link is the sum of the peptide masses, with each link-end
+        removing a deadend, plus the mass for each crosslinker, so the
+        combinations are found by subset-sum search at each crosslinker
+        number. Multilinks are only searched if no standard or low
+        confidence links are found, since they are otherwise filtered.
+        '''
+
+        weights, linkends = self.getweights(scan)
+        sums = subsetsum.SubsetSums(weights)
+        linkmass = self.getlinkmass()
+        numbers = range(1, linkends + 1)
+
+        candidates = set()
+        for lower, upper in self._check.getwindows(scan):
+            for number in numbers:
+                offset = number * linkmass
+                masks = sums.between(lower - offset - TOLERANCE,
+                    upper - offset + TOLERANCE)
+                candidates.update((i, number) for i in masks.tolist())
+
+        links = list(self.itercandidates(scan, candidates))
+        confident = {reports.LINKNAMES[i] for i in CONFIDENT}
+        if any(i.name in confident for i in links):
+            return links
+
+        upper = self._check.getmultilinkmass(scan) + TOLERANCE
+        for number in numbers:
+            masks = sums.below(upper - number * linkmass)
+            candidates.update((i, number) for i in masks.tolist())
+        return list(self.itercandidates(scan, candidates))
+
+    #    GETTERS
+
+    def getweights(self, scan):
+        '''
+        Returns the mass of each peptide, less a deadend for each
+        link-end, and the total link-ends from all peptides.
+        '''
+
+        weights = []
+        linkends = 0
+        for index in range(len(scan.peptide)):
+            peptide = scan.repack((index,))
+            ends = self._link.ends(peptide, 0)
+            weights.append(self._link.crosslinkedmass.getpeptidemass(
+                ends, peptide.formula, peptide.modifications, peptide.rows))
+            linkends += sum(ends.link.values())
+
+        return weights, linkends
+
+    def getlinkmass(self):
+        '''Returns the mass added by each crosslinker, with all deadends'''
+
+        deadends = self._link.ends.maxlinkends(1)
+        ends = crosslinks.Ends(Counter(), deadends, 1)
+        return self._link.crosslinkedmass.getlinkmass(ends)
 
-        totalpeptides = len(scan.peptide)
-        peptiderange = set(range(1, totalpeptides + 1))
-        indexrange = range(totalpeptides)
+    #    ITERATORS
 
-        for peptidecount in peptiderange:
-            # sample all combinations of each scan
-            combinations = it.combinations(indexrange, peptidecount)
-            for indexes in combinations:
-                yield (scan.repack(indexes), indexes)
+    def itercandidates(self, scan, candidates):
+        '''
+        Checks each candidate (bitmask, crosslinker number) in the order
+        of peptide count, peptide indexes, then crosslinker number.
+        '''
+
+        grouped = {}
+        for mask, number in candidates:
+            if mask:
+                indexes = subsetsum.getindexes(mask)
+                grouped.setdefault(indexes, []).append(number)
+
+        links = []
+        for indexes in sorted(grouped, key=lambda i: (len(i), i)):
+            repacked = scan.repack(indexes)
+            numbers = self.combinations(repacked)
+            for number in sorted(grouped[indexes]):
+                if number in numbers:
+                    links.append((self._link(repacked, number), indexes))
+
+        for link in self.makecrosslinks(links):
+            yield link
 
     def itercrosslinkers(self, scan, localindexes):
         '''Sample all crosslinker combinations from the scan'''
 
+        links = []
         for crosslinkernumber in self.combinations(scan):
-            try:
-                link = self._link(scan, crosslinkernumber)
-            except:
-                import pdb; pdb.set_trace()
-            linkname = self._check(link)
+            links.append((self._link(scan, crosslinkernumber), localindexes))
+
+        for link in self.makecrosslinks(links):
+            yield link
+
+    #    HELPERS
+
+    def makecrosslinks(self, links):
+        '''Classifies the (link, localindexes) pairs in a single pass'''
 
+        linknames = self._check.classify([i for i, __ in links])
+        for (link, localindexes), linkname in ZIP(links, linknames):
             if linkname is not None:
                 # crosslink successfully found
                 yield self._maker(link, linkname, localindexes)
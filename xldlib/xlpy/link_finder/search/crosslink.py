@@ -27,14 +27,38 @@ from xldlib.utils import logger, masstools
 NEUTRON_MASS = 1.0033548378
 
 
-# CALLABLES
-# ---------
+# DATA
+# ----
+
+STANDARD = "Standard"
+LOW_CONFIDENCE = "Low Confidence"
+INCOMPLETE = "Incomplete"
+
+
+# HELPERS
+# -------
+
+
+def isinvalid(ends):
+    '''
+    Checks to ensure that all end values are above 0.
+    Returns True if there is invalid (negative) data.
+    :
+        end -- instance of EndTuple from link_finder.crosslinks
+    '''
+
+    def negative_values(obj):
+        '''Returns true if any negative ints in dictionary values'''
+
+        return any(i < 0 for i in obj.values())
+
+    return any(map(negative_values, (ends.link, ends.dead)))
+
 
-CALLABLES = [
-    ("isstandardlink", "Standard"),
-    ("islowconfidence", "Low Confidence"),
-    ("ismultilink", "Incomplete")
-]
+def ismultiplepeptides(peptides):
+    '''Returns if there are multiple, non-identical peptides'''
+
+    return len(peptides) > 1 and not all(i == peptides[0] for i in peptides)
 
 
 # CHECKER
@@ -45,7 +69,9 @@ CALLABLES = [
 class CheckLink(base.BaseObject):
     '''
     Determines whether a given pairing is a standard, lowconfidence,
-    or multilink, or none of the above.
+    or multilink, or none of the above. All candidate links from a
+    precursor are classified together, scoring each isotope and
+    mass error for all candidates as arrays.
     '''
 
     def __init__(self):
@@ -56,13 +82,7 @@ class CheckLink(base.BaseObject):
     def __call__(self, link):
         '''Check the given links name and type'''
 
-        theoreticalcharges = link.getcharges()
-
-        if not self._checkinvalid(link.ends):
-            for funname, linkname in CALLABLES:
-                fun = getattr(self, funname)
-                if fun(link, theoreticalcharges):
-                    return linkname
+        return self.classify([link])[0]
 
     #    SETTERS
 
@@ -76,96 +96,108 @@ class CheckLink(base.BaseObject):
         self.minimum_peptide_mass = defaults.DEFAULTS['minimum_peptide_mass']
         self.relaxcharges = defaults.DEFAULTS['relax_charges']
 
-    #    CHECKERS
+    #    PUBLIC
 
-    def isstandardlink(self, link, theoreticalcharges):
+    def classify(self, links):
         '''
-        Identifies whether a standard, high mass accuracy link occurs
-        by validating it occurs within a user-defined ppm threshold.
+        Returns the link name for each candidate link from a single
+        precursor scan, or None if the link is not identified. Adds
+        the ppm for each scored isotope to the link's ppm set.
         '''
 
-        # check expected charge -- if fully charged out, no deal
-        matchedcharge = any((
-            self.relaxcharges == 'standard',
-            link.scan.precursor_z in theoreticalcharges
-        ))
+        if not links:
+            return []
+
+        scan = links[0].scan
+        charge = scan.precursor_z
+        theoretical = np.array([i.mass.theoretical for i in links])
+        error = np.array([i.mass.error for i in links])
+        ppms = self.getppms(scan, theoretical)
+
+        charges = [i.getcharges() for i in links]
+        matchedcharge = np.array([charge in i for i in charges], dtype=bool)
+        lowercharge = np.array([any(j < charge for j in i) for i in charges],
+            dtype=bool)
+        valid = ~np.array([isinvalid(i.ends) for i in links], dtype=bool)
+        multiple = np.array([ismultiplepeptides(i.scan.peptide)
+            for i in links], dtype=bool)
+
+        # high mass accuracy links, within the ppm threshold
+        # of any isotope, forcing charge matching
+        standardcharge = matchedcharge | (self.relaxcharges == STANDARD)
+        inppm = np.abs(ppms) < self.ppmthreshold
+        standard = valid & standardcharge & inppm.any(axis=1)
+
+        # links outside the ppm window, within the mass threshold
+        lowchargematch = matchedcharge | (self.relaxcharges == LOW_CONFIDENCE)
+        inmass = np.abs(error) < self.massthreshold
+        lowconfidence = valid & ~standard & lowchargematch & inmass
+
+        # multi-links with a missing peptide: the mass error is the
+        # theoretical - experimental mass, so this must be > threshold
+        # daltons (not bidirectional), and the precursor charge must
+        # be above a theoretical charge
+        missing = (-error > self.minimum_peptide_mass) & multiple & lowercharge
+        incomplete = valid & ~standard & ~lowconfidence & missing
+
+        self.setppms(links, ppms, valid, standardcharge[:, None] & inppm)
+
+        names = np.full(len(links), None, dtype=object)
+        names[standard] = STANDARD
+        names[lowconfidence] = LOW_CONFIDENCE
+        names[incomplete] = INCOMPLETE
+        return names.tolist()
 
-        for isotope in range(self.isotopes):
-            # add isotope shift, recalculate mass
-            theoretical = link.mass.theoretical + (isotope * NEUTRON_MASS)
-            ppm = link.scan.getppm(theoretical)
-
-            link.ppm.set.add(ppm)
-            if abs(ppm) < self.ppmthreshold:
-                # interlink successfully identified
-                # force charge matching
-                if matchedcharge:
-                    return True
-
-        return False
+    #    SETTERS
 
-    def islowconfidence(self, link, theoreticalcharges):
+    def setppms(self, links, ppms, valid, matched):
         '''
-        Identifies whether a link outside the user specificed PPM window
-        was identified.
+        Adds the ppms for all isotopes scored for each link, which are
+        the isotopes up to the first matched isotope, or all isotopes.
         '''
 
-        # check expected charge -- if fully charged out, no deal
-        matchedcharge = any((
-            self.relaxcharges == 'Low Confidence',
-            link.scan.precursor_z in theoreticalcharges
-        ))
+        ends = np.where(matched.any(axis=1), matched.argmax(axis=1) + 1,
+            ppms.shape[1])
+        for index in np.flatnonzero(valid):
+            links[index].ppm.set.update(ppms[index, :ends[index]].tolist())
 
-        if matchedcharge:
-            if abs(link.mass.error) < self.massthreshold:
-                return True
+    #    GETTERS
 
-        return False
-
-    def ismultilink(self, link, theoreticalcharges):
+    def getwindows(self, scan):
         '''
-        Checks whether a multi-link with a missing peptide
-        could have been identified. Falls well outside link identification
-        mass range, a range the user specifies. The mass.error is
-        the theoretical - experimental mass, so this must be > threshold
-        daltons (not bidirectional).
+        Returns the (lower, upper) theoretical mass windows for standard
+        links at each isotope and for low confidence links.
         '''
 
-        # mass.error is theor - exper, so should be negative
-        if not -link.mass.error > self.minimum_peptide_mass:
-            return False
+        threshold = self.ppmthreshold * 1e-6
+        charge = scan.precursor_z
+        lower = masstools.mz(scan.precursor_mz / (1 + threshold), 0, charge)
+        upper = masstools.mz(scan.precursor_mz / (1 - threshold), 0, charge)
 
-        # check expected charge -- if the precursor charge is <= than
-        # all theoretical charges, impossible
-        if all(i >= link.scan.precursor_z for i in theoreticalcharges):
-            return False
+        windows = []
+        for isotope in range(self.isotopes):
+            shift = isotope * NEUTRON_MASS
+            windows.append((lower - shift, upper - shift))
 
-        # must have multiple peptides and peptides must not same
-        peptides = link.scan.peptide
-        if len(peptides) > 1:
-            if not all(i == peptides[0] for i in peptides):
-                return True
+        experimental = scan.getmz()
+        windows.append((experimental - self.massthreshold,
+            experimental + self.massthreshold))
+        return windows
 
-        return False
+    def getmultilinkmass(self, scan):
+        '''Returns the upper bound for the theoretical multilink mass'''
 
-    #    HELPERS
+        return scan.getmz() - self.minimum_peptide_mass
 
-    @staticmethod
-    def _checkinvalid(ends):
+    def getppms(self, scan, theoretical):
         '''
-        Checks to ensure that all end values are above 0.
-        Returns True if there is invalid (negative) data.
-        :
-            end -- instance of EndTuple from link_finder.crosslinks
+        Returns the ppm matrix for the theoretical masses at each
+        isotope, with a row per mass and a column per isotope.
         '''
 
-        def negative_values(obj):
-            '''Returns true if any negative ints in dictionary values'''
-
-            return any(i < 0 for i in obj.values())
-
-        return any(map(negative_values, (ends.link, ends.dead)))
-
+        shifts = np.arange(self.isotopes) * NEUTRON_MASS
+        masses = np.asarray(theoretical, dtype=float)[:, None] + shifts
+        return scan.getppm(masses)
 
 # OBJECTS
 # -------
@@ -224,7 +256,7 @@ class LinkFactory(base.BaseObject):
         '''Creates a mass tuple to store mass data associated with the link'''
 
         theoretical = self.crosslinkedmass.getpeptidemass(
-            ends, scan.formula, scan.modifications)
+            ends, scan.formula, scan.modifications, scan.rows)
         experimental = scan.getmz()
 
         return Mass(
@@ -0,0 +1,88 @@
+'''
+    XlPy/Link_Finder/subsetsum
+    __________________________
+
+    Meet-in-the-middle subset-sum search over the peptide masses
+    from a precursor scan. The subset sums for each half of the
+    peptides are enumerated separately, and the sums from the second
+    half are sorted, so all subsets within a mass window are found
+    by binary search, in O(2^(n/2) log 2^(n/2)) rather than O(2^n).
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules
+import numpy as np
+
+
+# HELPERS
+# -------
+
+
+def getsubsetsums(weights):
+    '''Returns the bitmasks and the sums for all subsets of the weights'''
+
+    count = len(weights)
+    masks = np.arange(1 << count, dtype=np.int64)
+    bits = (masks[:, None] >> np.arange(count)) & 1
+    return masks, bits.dot(np.asarray(weights, dtype=float))
+
+
+def getindexes(mask):
+    '''Returns the sorted indexes for the set bits in the bitmask'''
+
+    indexes = []
+    index = 0
+    while mask:
+        if mask & 1:
+            indexes.append(index)
+        mask >>= 1
+        index += 1
+    return tuple(indexes)
+
+
+# OBJECTS
+# -------
+
+
+class SubsetSums(object):
+    '''Sorted subset sums from two halves of the weights'''
+
+    def __init__(self, weights):
+        super(SubsetSums, self).__init__()
+
+        half = len(weights) // 2
+        self.lowmasks, self.lowsums = getsubsetsums(weights[:half])
+
+        masks, sums = getsubsetsums(weights[half:])
+        order = np.argsort(sums, kind='mergesort')
+        self.highmasks = masks[order] << half
+        self.highsums = sums[order]
+
+    #     PUBLIC
+
+    def between(self, lower, upper):
+        '''Returns the bitmasks for all subsets with lower <= sum <= upper'''
+
+        starts = np.searchsorted(self.highsums, lower - self.lowsums, 'left')
+        ends = np.searchsorted(self.highsums, upper - self.lowsums, 'right')
+        return self.combine(starts, ends)
+
+    def below(self, upper):
+        '''Returns the bitmasks for all subsets with sum < upper'''
+
+        ends = np.searchsorted(self.highsums, upper - self.lowsums, 'left')
+        return self.combine(np.zeros_like(ends), ends)
+
+    #     HELPERS
+
+    def combine(self, starts, ends):
+        '''Combines each low subset with the [start, end) high subsets'''
+
+        lengths = ends - starts
+        lowmasks = np.repeat(self.lowmasks, lengths)
+        offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        positions = np.arange(lowmasks.size) - offsets
+        positions += np.repeat(starts, lengths)
+        return lowmasks | self.highmasks[positions]
@@ -8,6 +8,11 @@
     Crosslinker fragments are ignored since they do not correspond
     to the linked peptide with the intact, cross-linker bridge.
 
+    The formulas for all rows are calculated at once: the residue
+    element counts are summed by cumulative sums over the concatenated
+    peptide sequences, and each modification is looked up from a
+    table of element-count vectors.
+
     :copyright: (c) 2015 The Regents of the University of California.
     :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
 '''
@@ -18,11 +23,202 @@ from __future__ import division
 # load modules/submodules
 import operator as op
 
+import numpy as np
+import six
+
+from xldlib import chemical
+from xldlib.chemical.building_blocks import AMINOACIDS
+from xldlib.definitions import ZIP
 from xldlib.onstart.main import APP
 from xldlib.utils import logger, masstools
 from xldlib.xlpy import wrappers
 
 
+# CONSTANTS
+# ---------
+
+WATER_FORMULA = 'H2 O'
+
+
+# HELPERS
+# -------
+
+
+def getresiduetable():
+    '''
+    Returns the element-count vector for each residue, indexed by the
+    character code, and a mask for the recognized residues.
+    '''
+
+    size = len(chemical.formula.ISOTOPE_KEYS)
+    table = np.zeros((256, size), dtype=np.int64)
+    known = np.zeros(256, dtype=bool)
+    for letter, aminoacid in AMINOACIDS.items():
+        vector = chemical.getformula(aminoacid.formula).tovector()
+        for code in {ord(letter.upper()), ord(letter.lower())}:
+            table[code] = vector
+            known[code] = True
+
+    return table, known
+
+
+def getcodes(peptides):
+    '''
+    Returns the concatenated character codes and the start offset of
+    each peptide, or None if the peptides are not ASCII strings.
+    '''
+
+    if not all(isinstance(i, six.string_types) for i in peptides):
+        return None, None
+
+    try:
+        joined = ''.join(peptides).encode('ascii')
+    except UnicodeError:
+        return None, None
+
+    codes = np.frombuffer(joined, dtype=np.uint8)
+    lengths = np.fromiter((len(i) for i in peptides), dtype=np.int64,
+        count=len(peptides))
+    starts = np.cumsum(lengths) - lengths
+    return codes, starts
+
+
+def sumsegments(values, starts, size):
+    '''
+    Sums the rows of `values` over consecutive segments beginning at
+    `starts`, using cumulative sums.
+    '''
+
+    cumulative = np.zeros((values.shape[0] + 1, values.shape[1]),
+        dtype=values.dtype)
+    np.cumsum(values, axis=0, out=cumulative[1:])
+    ends = np.append(starts[1:], size)
+    return cumulative[ends] - cumulative[starts]
+
+
+# OBJECTS
+# -------
+
+
+class ModificationTable(object):
+    '''
+    Element-count vectors for the modifications at a single position,
+    memoized by the modification names for a search engine.
+    '''
+
+    def __init__(self, engine):
+        super(ModificationTable, self).__init__()
+
+        self.engine = engine
+        self.index = {}
+        self.vectors = []
+
+    def __getitem__(self, names):
+        '''Returns the row for the modification names, adding it if new'''
+
+        key = tuple(names)
+        index = self.index.get(key)
+        if index is None:
+            molecule = masstools.getpositionformula(names, self.engine)
+            formula = chemical.Formula.frommolecule(molecule)
+            index = self.index[key] = len(self.vectors)
+            self.vectors.append(formula.tovector())
+
+        return index
+
+    #     GETTERS
+
+    def getmatrix(self):
+        '''Returns the (modifications x isotopes) element-count matrix'''
+
+        size = len(chemical.formula.ISOTOPE_KEYS)
+        if not self.vectors:
+            return np.zeros((0, size), dtype=np.int64)
+        return np.vstack(self.vectors)
+
+
+class FormulaCalculator(object):
+    '''Calculates the peptide formulas for matched data tables'''
+
+    def __init__(self):
+        super(FormulaCalculator, self).__init__()
+
+        self.residues, self.known = getresiduetable()
+        self.water = chemical.getformula(WATER_FORMULA).tovector()
+        self.tables = {}
+
+    def __call__(self, peptides, modifications, engine):
+        '''Returns the formula for each peptide and modification pair'''
+
+        columns, counts = self.getcounts(peptides, modifications, engine)
+        return self.getformulas(columns, counts)
+
+    #     GETTERS
+
+    def getcounts(self, peptides, modifications, engine):
+        '''
+        Returns the isotope indexes with non-zero counts, and the
+        (rows x indexes) element-count matrix.
+        '''
+
+        rows, indexes = self.getmodifications(modifications, engine)
+        matrix = self.gettable(engine).getmatrix()
+
+        mask = self.residues.any(0) | self.water.astype(bool) | matrix.any(0)
+        columns = np.flatnonzero(mask)
+
+        counts = np.zeros((len(peptides), columns.size), dtype=np.int64)
+        counts += self.water[columns]
+
+        codes, starts = getcodes(peptides)
+        if codes is None or not self.known[codes].all():
+            # unrecognized residues, calculate each peptide separately
+            for index, peptide in enumerate(peptides):
+                formula = chemical.getformula(peptide=peptide)
+                counts[index] = formula.tovector()[columns]
+        elif len(peptides):
+            residues = self.residues[:, columns][codes]
+            counts += sumsegments(residues, starts, codes.size)
+
+        if rows.size:
+            np.add.at(counts, rows, matrix[:, columns][indexes])
+
+        return columns, counts
+
+    def getmodifications(self, modifications, engine):
+        '''Returns the row and modification table index for each position'''
+
+        table = self.gettable(engine)
+        rows = []
+        indexes = []
+        for row, modification in enumerate(modifications):
+            for names in modification.byposition().values():
+                rows.append(row)
+                indexes.append(table[names])
+
+        return np.array(rows, dtype=np.int64), np.array(indexes, dtype=np.int64)
+
+    def gettable(self, engine):
+        '''Returns the modification table for the engine'''
+
+        key = id(engine)
+        if key not in self.tables:
+            self.tables[key] = ModificationTable(engine)
+        return self.tables[key]
+
+    @staticmethod
+    def getformulas(columns, counts):
+        '''Returns the interned formula for each row of element counts'''
+
+        if not counts.size:
+            return [chemical.Formula()] * len(counts)
+
+        unique, inverse = np.unique(counts, axis=0, return_inverse=True)
+        columns = columns.tolist()
+        formulas = [chemical.Formula(ZIP(columns, i)) for i in unique.tolist()]
+        return [formulas[i] for i in inverse.reshape(-1)]
+
+
 # DATA PROCESSING
 # ---------------
 
@@ -33,13 +229,16 @@ from xldlib.xlpy import wrappers
 def calculateformulas(columns=('peptide', 'modifications')):
     '''
     Calculates the formula for each of the modification/peptide pairs,
-    ignoring all crosslinker modifications.
+    ignoring all crosslinker modifications. The formulas are compact,
+    interned `chemical.Formula` instances, calculated for all rows of
+    each matched data table at once.
     '''
 
     source = APP.discovererthread
+    calculator = FormulaCalculator()
 
     for row in source.files:
         engine = row.engines['matched']
-        for peptide, mod in row.data.iterrows(columns):
-            formula = masstools.getpeptideformula(peptide, mod, engine)
-            row.data['matched']['formula'].append(formula)
+        peptides, modifications = (row.data['matched'][i] for i in columns)
+        formulas = calculator(peptides, modifications, engine)
+        row.data['matched']['formula'].extend(formulas)
@@ -11,7 +11,6 @@
 
 # lod modules
 import os
-import xml.sax
 
 from xldlib.utils import logger
 from . import mime
@@ -29,14 +28,12 @@ class ParseXml(base.MatchedPeptideBase):
     def __init__(self, row):
         super(ParseXml, self).__init__(row)
 
-        self.handler = pepxml.PepXmlHandler(row)
-        self.parser = xml.sax.make_parser()
-        self.parser.setContentHandler(self.handler)
+        self.handler = pepxml.PepXmlReader(row)
 
     def __call__(self):
         '''On start'''
 
-        self.parser.parse(self.fileobj)
+        self.handler.parse(self.fileobj)
         self.fileobj.close()
 
         self.setids()
@@ -66,7 +63,7 @@ class ParseMime(base.MatchedPeptideBase):
     def __init__(self, row):
         super(ParseMime, self).__init__(row)
 
-        self.mime = mime.MimeParser(row)
+        self.mime = mime.MimeParser(row, self.fileobj)
 
     def __call__(self):
         '''On start'''
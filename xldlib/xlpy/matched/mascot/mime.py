@@ -5,18 +5,20 @@
     Mascot's native data format (.dat files) is a MIME format, with data
     in sections that can easily be split to key-value pairs.
 
+    The file is memory-mapped and the byte offsets of each MIME section
+    are indexed from the boundaries, so only the sections which are
+    processed are decoded, and only the title is read from each query.
+
     :copyright: (c) 2015 The Regents of the University of California.
     :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
 '''
 
-# load future
-from __future__ import print_function
-
 # load modules
 import ast
 import copy
-import sys
+import mmap
 
+from xldlib import exception
 from xldlib.definitions import re, unquote
 from xldlib.general import mapping, sequence
 from xldlib.objects import matched
@@ -26,8 +28,7 @@ from xldlib.utils import decorators, logger, masstools
 from .. import scan_titles, sequence_variants
 
 # load objects/functions
-from collections import OrderedDict
-from email.parser import Parser
+from collections import namedtuple, OrderedDict
 
 # This comprises a basic parser for the Mascot .dat file
 
@@ -64,6 +65,172 @@ TERMINI = {
     'N_term': 'nterm'
 }
 
+# memoized (peptide, variable modification string) pairs
+MODIFICATION_CACHE_SIZE = 100000
+
+# bytes to search for the multipart boundary in the file header
+HEADER_SIZE = 4096
+
+CONTENT_TYPE = 'application/x-mascot'
+
+# sections with handlers, all others (unimod, enzyme, decoys...) are skipped
+SECTIONS = frozenset([
+    'parameters',
+    'masses',
+    'summary',
+    'peptides',
+    'proteins'
+])
+
+# OBJECTS
+# -------
+
+Section = namedtuple("Section", "name content start end")
+
+
+# INDEX
+# -----
+
+
+class SectionIndex(object):
+    '''
+    Byte-offset index of the sections within a memory-mapped, multipart
+    MIME file. The payload for each section is only read on request.
+    '''
+
+    def __init__(self, fileobj):
+        super(SectionIndex, self).__init__()
+
+        self.mmap = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        self.sections = list(self.getsections(self.getboundary()))
+
+    def __iter__(self):
+        return iter(self.sections)
+
+    def __len__(self):
+        return len(self.sections)
+
+    #     PUBLIC
+
+    def close(self):
+        self.mmap.close()
+
+    def getpayload(self, section):
+        '''Returns the decoded payload for the section'''
+
+        return self.decode(self.mmap[section.start:section.end])
+
+    def getvalue(self, section, key):
+        '''
+        Returns the value for `key` from the "key=value" lines of the
+        section, without reading the remaining payload.
+        '''
+
+        # the payload always follows the blank line ending the headers
+        needle = b'\n' + key.encode('ascii') + b'='
+        index = self.mmap.find(needle, section.start - 1, section.end)
+        if index == -1:
+            return None
+
+        start = index + len(needle)
+        end = self.mmap.find(b'\n', start, section.end)
+        if end == -1:
+            end = section.end
+        return self.decode(self.mmap[start:end].rstrip(b'\r'))
+
+    #     GETTERS
+
+    def getboundary(self):
+        '''Returns the multipart boundary from the file header'''
+
+        header = self.mmap[:HEADER_SIZE]
+        index = header.find(b'boundary=')
+        if index == -1:
+            raise AssertionError("Mascot .dat file has no MIME boundary")
+
+        boundary = header[index + len(b'boundary='):].splitlines()[0]
+        return boundary.split(b';')[0].strip().strip(b'"')
+
+    def getsections(self, boundary):
+        '''Yields each section, from the offsets of the boundaries'''
+
+        delimiter = b'--' + boundary
+        position = self.find(delimiter, 0)
+        while position != -1:
+            # closing delimiter, "--boundary--"
+            end = position + len(delimiter)
+            if self.mmap[end:end + 2] == b'--':
+                break
+
+            headerstart = self.mmap.find(b'\n', end) + 1
+            if not headerstart:
+                break
+            bodystart, name, content = self.getheaders(headerstart)
+
+            position = self.find(delimiter, bodystart)
+            bodyend = len(self.mmap) if position == -1 else position
+            yield Section(name, content, bodystart, self.strip(bodyend))
+
+    def getheaders(self, position):
+        '''Returns the payload start, name and content type of a section'''
+
+        name = content = None
+        while True:
+            end = self.mmap.find(b'\n', position)
+            if end == -1:
+                end = len(self.mmap)
+            line = self.decode(self.mmap[position:end].rstrip(b'\r'))
+            position = end + 1
+            if not line:
+                break
+
+            key, _, value = line.partition(':')
+            if key.strip().lower() == 'content-type':
+                content, name = self.parsecontent(value)
+
+        return min(position, len(self.mmap)), name, content
+
+    #     HELPERS
+
+    def find(self, delimiter, position):
+        '''Finds the next delimiter at the start of a line'''
+
+        position = self.mmap.find(delimiter, position)
+        while position > 0 and self.mmap[position - 1:position] != b'\n':
+            position = self.mmap.find(delimiter, position + 1)
+        return position
+
+    def strip(self, position):
+        '''Removes the line break preceding the boundary'''
+
+        if self.mmap[position - 1:position] == b'\n':
+            position -= 1
+            if self.mmap[position - 1:position] == b'\r':
+                position -= 1
+        return position
+
+    @staticmethod
+    def parsecontent(value):
+        '''
+        Returns the content type and name from the header value
+        :
+            application/x-Mascot; name="parameters"
+                -> ('application/x-mascot', 'parameters')
+        '''
+
+        parts = value.split(';')
+        name = None
+        for part in parts[1:]:
+            key, _, param = part.partition('=')
+            if key.strip().lower() == 'name':
+                name = param.strip().strip('"')
+
+        return parts[0].strip().lower(), name
+
+    @staticmethod
+    def decode(value):
+        return value.decode('utf-8', 'replace')
+
 
 # HELPERS
 # -------
@@ -144,6 +311,7 @@ class Modifications(base.BaseObject):
 
         self.constant_modifications = {}
         self.variable_modifications = sequence.ExtendableList()
+        self.cache = mapping.LruDict(MODIFICATION_CACHE_SIZE)
 
     @decorators.overloaded
     def __call__(self, payload):
@@ -191,6 +359,7 @@ class Modifications(base.BaseObject):
         mass = float(mass)
 
         self.variable_modifications[index] = [mass, name]
+        self.cache.clear()
 
     def set_constantmod(self, residues, mass_name):
         '''
@@ -212,6 +381,7 @@ class Modifications(base.BaseObject):
             mass = float(mass)
             # ignore mass temporarily
             self.constant_modifications[residue] = name
+        self.cache.clear()
 
     #     PROCESS
 
@@ -225,10 +395,7 @@ class Modifications(base.BaseObject):
         '''
 
         modifications = copy.deepcopy(matched.MODIFICATION_TEMPLATE)
-        for name, position in self.get_constant_modifications(peptide):
-            modifications['certain'][name].append(position)
-
-        for name, position in self.get_variable_modifications(
+        for name, position in self.get_positions(peptide,
             variable_modification_string):
             modifications['certain'][name].append(position)
 
@@ -236,6 +403,22 @@ class Modifications(base.BaseObject):
 
     #     GETTERS
 
+    def get_positions(self, peptide, variable_modification_string):
+        '''
+        Returns the constant and variable (name, position) pairs,
+        memoized since the same peptides are matched by many queries
+        '''
+
+        key = (peptide, variable_modification_string)
+        if key in self.cache:
+            return self.cache[key]
+
+        positions = list(self.get_constant_modifications(peptide))
+        positions.extend(self.get_variable_modifications(
+            variable_modification_string))
+        self.cache[key] = positions = tuple(positions)
+        return positions
+
     def get_constant_modifications(self, peptide):
         '''Returns an iterator for all the constant modifications'''
 
@@ -340,6 +523,7 @@ class QueriesToScans(base.BaseObject):
 # REGEXP
 # ------
 PEPTIDE_QUERY = re.compile(r"^q(?P<query>\d*)_p(?P<rank>\d*)$")
+QUERY_SECTION = re.compile(r"^query\d+$")
 
 
 # MIME
@@ -367,20 +551,38 @@ class MimeParser(base.BaseObject):
     def __call__(self):
         '''On start'''
 
-        self.process_messages()
+        try:
+            self.process_messages()
+        finally:
+            self.messages.close()
         self.process_scans()
 
     def process_messages(self):
-        '''Processes all the data from each MIME message to dict'''
+        '''Processes all the data from each indexed MIME section to dict'''
 
-        for message in self.messages:
-            content = message.get_content_type()
-            if content == 'application/x-mascot':
+        for section in self.messages:
+            if section.content != CONTENT_TYPE:
+                continue
+
+            name = section.name
+            if name in SECTIONS:
                 # {'parameters', 'masses'}
-                name = message.get_param('name')
-                payload = self.todict(message.get_payload())
-                # redundant number of queries, ignore so far
-                getattr(self, name, self.query)(payload, name)
+                payload = self.todict(self.messages.getpayload(section))
+                getattr(self, name)(payload, name)
+
+            elif name is not None and QUERY_SECTION.match(name):
+                self.process_query(section)
+
+    def process_query(self, section):
+        '''Processes a query section, only reading the title'''
+
+        # the variable mod strings for the query would index the
+        # query-specific mods, rather than the delta mods
+        if self.messages.getvalue(section, 'IT_MODS'):
+            raise AssertionError(exception.CODES['027'].format(section.name))
+
+        title = self.messages.getvalue(section, 'title')
+        self.query({'title': title}, section.name)
 
     def process_scans(self):
         '''
@@ -531,11 +733,6 @@ class MimeParser(base.BaseObject):
             Ions1=182.200000:395.8,
         '''
 
-        if 'IT_MODS' in payload:
-            print("Variable mods added for a specific query", file=sys.stderr)
-            # not sure if it starts with delta1 or like, delta5
-            import pdb, sys; pdb.Pdb(stdout=sys.__stdout__).set_trace()
-
         query = name[len('query'):]
         title = unquote(payload['title'])
         match = self.title_formatter(title)
@@ -550,10 +747,9 @@ class MimeParser(base.BaseObject):
     #     SETTERS
 
     def set_messages(self, fileobj):
-        '''Creates a MIME parser from the file object to parse the data'''
+        '''Indexes the MIME sections from the file object'''
 
-        headers = Parser().parse(fileobj)
-        self.messages = headers.walk()
+        self.messages = SectionIndex(fileobj)
 
     #     HELPERS
 
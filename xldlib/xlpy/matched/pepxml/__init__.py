@@ -9,7 +9,7 @@
     :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
 '''
 
-from .core import PepXmlHandler
+from .core import PepXmlHandler, PepXmlReader
 
 __all__ = [
     'core',
@@ -5,13 +5,20 @@
     Main parser for pepXML, toggleable with various search engine
     specifications.
 
+    The streaming reader uses `iterparse`, clearing each spectrum
+    query once processed, and stores the scans within the matched
+    data in fixed-size chunks, so memory use is independent of the
+    file size.
+
     :copyright: (c) 2015 The Regents of the University of California.
     :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
 '''
 
 # load modules/submodules
+import xml.etree.cElementTree as cET
 import xml.sax
 
+from xldlib.resources.parameters import defaults
 from xldlib.utils import logger
 
 from . import mascot, protein_prospector, proteome_discoverer
@@ -30,14 +37,30 @@ MODULES = {
     'Proteome Discoverer': proteome_discoverer
 }
 
+EVENTS = ('start', 'end')
+
+
+# HELPERS
+# -------
+
+
+def getname(tag):
+    '''Removes the XML namespace from an element tag'''
+
+    if tag[0] == '{':
+        return tag.rsplit('}', 1)[1]
+    return tag
+
 
 # HANDLERS
 # --------
 
 
-@logger.init('matched', 'DEBUG')
-class PepXmlHandler(xml.sax.handler.ContentHandler):
-    '''xml.sax parser for the pepXML file formats'''
+class PepXmlElements(object):
+    '''
+    Dispatches pepXML elements to the search-engine specific Start
+    and End handlers, shared by the SAX and the streaming parsers.
+    '''
 
     # BUGS
     # ----
@@ -45,8 +68,8 @@ class PepXmlHandler(xml.sax.handler.ContentHandler):
     # so need to ensure proper one is selected
     _search_summary = False
 
-    def __init__(self, row):
-        xml.sax.ContentHandler.__init__(self)
+    def setengine(self, row):
+        '''Sets the Start and End handlers for the matched search engine'''
 
         self.row = row
 
@@ -102,5 +125,81 @@ class PepXmlHandler(xml.sax.handler.ContentHandler):
             self._search_summary = False
 
         elif name == 'spectrum_query':
-            self.row.data.newscan(self._scan)
+            self.storescan(self._scan)
             self._scan = None
+
+    #     HELPERS
+
+    def storescan(self, scan):
+        self.row.data.newscan(scan)
+
+
+@logger.init('matched', 'DEBUG')
+class PepXmlHandler(PepXmlElements, xml.sax.handler.ContentHandler):
+    '''xml.sax parser for the pepXML file formats'''
+
+    def __init__(self, row):
+        xml.sax.ContentHandler.__init__(self)
+
+        self.setengine(row)
+
+
+@logger.init('matched', 'DEBUG')
+class PepXmlReader(PepXmlElements):
+    '''
+    Streaming pepXML parser, which buffers the parsed scans and
+    stores them in the matched data every `chunksize` scans.
+    '''
+
+    def __init__(self, row, chunksize=None):
+        super(PepXmlReader, self).__init__()
+
+        self.setengine(row)
+
+        if chunksize is None:
+            chunksize = defaults.DEFAULTS['pepxml_chunk_size']
+        self.chunksize = chunksize
+        self.scans = []
+
+    #     PUBLIC
+
+    def parse(self, fileobj):
+        '''Parses the pepXML file, clearing each processed spectrum query'''
+
+        parents = []
+        for event, element in cET.iterparse(fileobj, events=EVENTS):
+            name = getname(element.tag)
+            if event == 'start':
+                parents.append(element)
+                self.startElement(name, element.attrib)
+            else:
+                parents.pop()
+                self.endElement(name)
+                if name == 'spectrum_query':
+                    self.clear(element, parents)
+
+        self.flush()
+
+    def flush(self):
+        '''Stores all the buffered scans in the matched data'''
+
+        if self.scans:
+            self.row.data.newscans(self.scans)
+            self.scans = []
+
+    #     HELPERS
+
+    def storescan(self, scan):
+        '''Buffers the scan, storing the buffer if full'''
+
+        self.scans.append(scan)
+        if len(self.scans) >= self.chunksize:
+            self.flush()
+
+    @staticmethod
+    def clear(element, parents):
+        '''Removes the processed element and its children from the tree'''
+
+        element.clear()
+        if parents:
+            parents[-1].remove(element)
@@ -15,7 +15,8 @@ from collections import defaultdict
 
 from xldlib import exception
 from xldlib.chemical import proteins
-from xldlib.definitions import re
+from xldlib.definitions import ZIP
+from xldlib.objects import protein
 from xldlib.qt.objects import base
 from xldlib.resources.parameters import defaults
 from xldlib.utils import logger
@@ -29,33 +30,37 @@ from . import remove
 
 def get_cterm(protease):
     '''
-    Returns a regex pattern matching the N-terminal side of the
-    peptide since the cut-specificity N-terminal is unknown if it
-    cuts C-terminal of the cut site.
+    Returns a function checking the N-terminal side of the peptide
+    since the cut-specificity N-terminal is unknown if it cuts
+    C-terminal of the cut site.
     '''
 
-    cut = ''.join(protease.enzyme.cut)
-    # add in setting for N-term or N-term w/ Met-loss due to
-    # high percentage of Methionine loss
-    cut_sites = r'(?P<cut>^|^M|[{}])'.format(cut)
-    cut_regex = cut_sites + r'{peptide}'
+    cut = frozenset(protease.enzyme.cut)
 
-    return cut_regex
+    def iscut(sequence, start, length):
+        # add in setting for N-term or N-term w/ Met-loss due to
+        # high percentage of Methionine loss
+        if not start or (start == 1 and sequence[0] == 'M'):
+            return True
+        return sequence[start - 1] in cut
+
+    return iscut
 
 
 def get_nterm(protease):
     '''
-    Returns a regex pattern matching the C-terminal side of the
-    peptide since the cut-specificity C-terminal is unknown if it
-    cuts N-terminal of the cut site.
+    Returns a function checking the C-terminal side of the peptide
+    since the cut-specificity C-terminal is unknown if it cuts
+    N-terminal of the cut site.
     '''
 
-    cut = ''.join(protease.enzyme.cut)
-    cut_sites = r'(?:$|[{0}])'.format(cut)
-    # have a 0-length match group 1 in front
-    cut_regex = r'(?P<cut>){peptide}' + cut_sites
+    cut = frozenset(protease.enzyme.cut)
+
+    def iscut(sequence, start, length):
+        end = start + length
+        return end == len(sequence) or sequence[end] in cut
 
-    return cut_regex
+    return iscut
 
 
 def getsequences(proteins):
@@ -68,7 +73,11 @@ def getsequences(proteins):
 
 @logger.init('matched', 'DEBUG')
 class PeptideStart(base.BaseObject):
-    '''Calculates the peptide starts for a given data holder'''
+    '''
+    Calculates the peptide starts for a given data holder, from a
+    suffix array over the protein sequences, which is built once
+    per protein database and cached on disk.
+    '''
 
     # DEFAULTS
     # --------
@@ -79,32 +88,57 @@ class PeptideStart(base.BaseObject):
         super(PeptideStart, self).__init__(parent)
 
         self.sequences = sequences
+        self.index = None
 
     @logger.call('matched', 'debug')
     def __call__(self, row, protease):
         '''Add all the starts to the current data holder'''
 
         if protease.enzyme.side == proteins.TERMINI['N']:
-            cut = get_nterm(protease)
+            iscut = get_nterm(protease)
         else:
-            cut = get_cterm(protease)
-        row.data['matched']['start'][:] = self.getstarts(row, cut)
+            iscut = get_cterm(protease)
+        row.data['matched']['start'][:] = self.getstarts(row, iscut)
 
-    def getstarts(self, row, cut_regex):
-        '''Sequentially indexes the start positions within the sequence'''
+    #     GETTERS
 
-        for rowdata in row.data.iterrows(('peptide', 'id'), asdict=True):
+    def getindex(self):
+        '''Returns the protein index, loading it on first use'''
+
+        if self.index is None:
+            self.index = protein.ProteinIndex.fromcache(self.sequences)
+        return self.index
+
+    def getstarts(self, row, iscut):
+        '''Indexes the start positions, memoized by peptide and ID'''
+
+        matched = row.data['matched']
+        memo = {}
+        for key in ZIP(matched['peptide'], matched['id']):
             try:
-                sequence = self.sequences[rowdata['id']]
-                regex = cut_regex.format(peptide=rowdata['peptide'])
-                match = re.search(regex, sequence)
-                offset = self.offset + len(match.group('cut'))
+                start = memo[key]
+            except KeyError:
+                start = memo[key] = self.getstart(key[0], key[1], iscut)
+            except TypeError:
+                start = self.getstart(key[0], key[1], iscut)
+            yield start
 
-                yield match.start() + offset
+    def getstart(self, peptide, id_, iscut):
+        '''Returns the first start position at a cut site, or NaN'''
 
-            except (KeyError, AttributeError):
-                # sequence does not match determined, or sequence no in db
-                yield float("nan")
+        try:
+            sequence = self.sequences[id_]
+            starts = self.getindex().getstarts(peptide, id_)
+        except (KeyError, TypeError):
+            # sequence not in db
+            return float("nan")
+
+        for start in starts:
+            if iscut(sequence, start, len(peptide)):
+                return start + self.offset
+
+        # sequence does not match determined
+        return float("nan")
 
 
 KEYS = (
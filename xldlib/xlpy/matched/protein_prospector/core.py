@@ -13,7 +13,6 @@
 import codecs
 import copy
 import six
-import xml.sax
 
 from xldlib.definitions import re
 from xldlib.objects import matched
@@ -36,15 +35,13 @@ class ParseXml(base.MatchedPeptideBase):
     def __init__(self, row):
         super(ParseXml, self).__init__(row)
 
-        self.handler = pepxml.PepXmlHandler(row)
-        self.parser = xml.sax.make_parser()
-        self.parser.setContentHandler(self.handler)
+        self.handler = pepxml.PepXmlReader(row)
 
     @logger.call('matched', 'debug')
     def __call__(self):
         '''On start'''
 
-        self.parser.parse(self.fileobj)
+        self.handler.parse(self.fileobj)
         self.fileobj.close()
 
         self.setids()
@@ -95,10 +95,7 @@ class DownloadGenes(base.BaseObject):
         self.protein_model.setTable('depricated')
         self.protein_model.select()
 
-        proteins = copy.copy(self.ids)
-        proteins.difference_update(self.proteins.mapping['depricated'])
-        proteins.difference_update(self.proteins.mapping['proteins'])
-
+        proteins = self.getmissing(self.ids, 'depricated', 'proteins')
         for protein in proteins:
             self.protein_model.adddepricated(protein)
 
@@ -112,12 +109,19 @@ class DownloadGenes(base.BaseObject):
             return UniProtQuery([], [])
 
         # grab the to-fetch proteins, and the subtract the local proteins
-        proteins = copy.copy(self.ids)
-        proteins.difference_update(self.proteins.mapping['depricated'])
-        ids = getids(proteins)
-        ids.difference_update(self.proteins.mapping['proteins'])
+        proteins = self.getmissing(self.ids, 'depricated')
+        ids = self.getmissing(getids(proteins), 'proteins')
 
         mnemonics = getids(proteins, resources.MNEMONIC_REGEX)
-        mnemonics.difference_update(self.proteins.mapping['proteins'])
+        mnemonics = self.getmissing(mnemonics, 'proteins')
 
         return UniProtQuery(list(ids), list(mnemonics))
+
+    def getmissing(self, ids, *tables):
+        '''
+        Returns the IDs not within any of the lookup tables, querying
+        each ID rather than iterating over the tables.
+        '''
+
+        lookups = [self.proteins.mapping[i] for i in tables]
+        return {i for i in ids if not any(i in j for j in lookups)}
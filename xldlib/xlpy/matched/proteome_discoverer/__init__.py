@@ -15,5 +15,5 @@
 '''
 
 __all__ = [
-    'base', 'core', 'mods', 'pepxml', 'sqlite'
+    'base', 'core', 'mods', 'msf', 'pepxml', 'sqlite'
 ]
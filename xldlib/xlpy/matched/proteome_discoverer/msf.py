@@ -0,0 +1,348 @@
+'''
+    XlPy/matched/Proteome_Discoverer/msf
+    ____________________________________
+
+    Reads the peptide hits, spectra, scores, proteins and modification
+    rows from Proteome Discoverer MSF files, either with a query per
+    table, or in bulk with set-based JOIN queries.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules
+from __future__ import division
+
+from xldlib.definitions import ZIP
+from xldlib.general import mapping, sequence
+from xldlib.resources.parameters import defaults
+from xldlib.utils import masstools
+
+# load objects/functions
+from collections import OrderedDict
+
+
+# CONSTANTS
+# ---------
+
+# rows fetched from the cursor per batch in the bulk extraction
+BATCH_SIZE = 10000
+
+
+# DATA
+# ----
+
+# the last score and protein for each peptide, which are indexed
+# for the joins, matching the per-table reader, where later rows
+# overwrite the earlier ones
+TEMPORARY_TABLES = OrderedDict([
+    ('BulkScores', "SELECT PeptideID, ScoreValue FROM PeptideScores "
+        "WHERE rowid IN (SELECT MAX(rowid) FROM PeptideScores "
+        "GROUP BY PeptideID)"),
+    ('BulkProteins', "SELECT PeptideID, ProteinID FROM PeptidesProteins "
+        "WHERE rowid IN (SELECT MAX(rowid) FROM PeptidesProteins "
+        "GROUP BY PeptideID)"),
+])
+
+PEPTIDE_COLUMNS = (
+    'peptide_id',
+    'spectrum_id',
+    'peptide',
+    'rank',
+    'num',
+    'z',
+    'mass',
+    'score',
+    'description'
+)
+
+PEPTIDE_QUERY = (
+    "SELECT p.PeptideID, p.SpectrumID, p.Sequence, p.SearchEngineRank, "
+    "s.ScanNumbers, s.Charge, s.Mass, sc.ScoreValue, a.Description "
+    "FROM Peptides p "
+    "LEFT JOIN SpectrumHeaders s ON s.SpectrumID = p.SpectrumID "
+    "LEFT JOIN BulkScores sc ON sc.PeptideID = p.PeptideID "
+    "LEFT JOIN BulkProteins pp ON pp.PeptideID = p.PeptideID "
+    "LEFT JOIN ProteinAnnotations a ON a.ProteinID = pp.ProteinID "
+    "ORDER BY p.rowid;"
+)
+
+# joining the peptides drops the mods with undefined peptide IDs
+INTERNAL_COLUMNS = ('peptide_id', 'mod_id', 'position')
+
+INTERNAL_QUERY = (
+    "SELECT m.PeptideID, m.AminoAcidModificationID, m.Position "
+    "FROM PeptidesAminoAcidModifications m "
+    "JOIN Peptides p ON p.PeptideID = m.PeptideID "
+    "ORDER BY m.rowid;"
+)
+
+TERMINAL_COLUMNS = ('peptide_id', 'mod_id')
+
+TERMINAL_QUERY = (
+    "SELECT m.PeptideID, m.TerminalModificationID "
+    "FROM PeptidesTerminalModifications m "
+    "JOIN Peptides p ON p.PeptideID = m.PeptideID "
+    "ORDER BY m.rowid;"
+)
+
+
+# HELPERS
+# -------
+
+
+def getprotein(description):
+    '''
+    Returns the UniProt ID and protein name from the description
+        getprotein('>sp|P62894|CYC_BOVIN') -> ('P62894', 'CYC_BOVIN')
+    '''
+
+    id_, name = description.split('|')[1:]
+    return id_, name
+
+
+def getmz(mass, charge):
+    '''Returns the m/z from the singly-charged mass of the peptide'''
+
+    return masstools.mz(mass, charge, 1)
+
+
+# EXTRACTORS
+# ----------
+
+
+class BulkExtractor(object):
+    '''
+    Extracts the peptide hits and mods from an MSF file with set-based
+    JOIN queries, reading the rows in batches into columnar arrays.
+    '''
+
+    def __init__(self, cursor, batchsize=BATCH_SIZE):
+        super(BulkExtractor, self).__init__()
+
+        self.cursor = cursor
+        self.batchsize = batchsize
+
+    def __call__(self):
+        '''Returns the peptide, internal and terminal mod columns'''
+
+        self.create_tables()
+        try:
+            peptides = self.getcolumns(PEPTIDE_QUERY, PEPTIDE_COLUMNS)
+            internal = self.getcolumns(INTERNAL_QUERY, INTERNAL_COLUMNS)
+            terminal = self.getcolumns(TERMINAL_QUERY, TERMINAL_COLUMNS)
+        finally:
+            self.drop_tables()
+
+        return peptides, internal, terminal
+
+    # ------------------
+    #       MAIN
+    # ------------------
+
+    def create_tables(self):
+        '''Creates the indexed temporary tables, without writing the file'''
+
+        for name, query in TEMPORARY_TABLES.items():
+            self.cursor.execute("CREATE TEMP TABLE {0} AS {1};".format(
+                name, query))
+            self.cursor.execute("CREATE INDEX temp.{0}Index ON {0} "
+                "(PeptideID);".format(name))
+
+    def drop_tables(self):
+        for name in TEMPORARY_TABLES:
+            self.cursor.execute("DROP TABLE IF EXISTS temp.{};".format(name))
+
+    def getcolumns(self, query, names):
+        '''Returns {name: Column} from the query results'''
+
+        columns = OrderedDict((i, sequence.Column()) for i in names)
+        for rows in self.fetchbatches(query):
+            for column, values in ZIP(columns.values(), ZIP(*rows)):
+                column.extend(values)
+
+        return columns
+
+    def fetchbatches(self, query):
+        '''Yields the query results in batches of `batchsize` rows'''
+
+        self.cursor.execute(query)
+        while True:
+            rows = self.cursor.fetchmany(self.batchsize)
+            if not rows:
+                break
+            yield rows
+
+
+class MSFReader(object):
+    '''
+    Reads the peptide hits, grouped by spectrum ID, and the internal
+    and terminal modification rows for the read peptides.
+
+    The per-table reader issues a query per MSF table, while the
+    bulk reader uses `BulkExtractor`, and both produce the same data.
+    '''
+
+    def __init__(self, cursor):
+        super(MSFReader, self).__init__()
+
+        self.cursor = cursor
+
+        self.peptide_to_spectrum = {}
+        self.peptides = mapping.OrderedRecursiveDict()
+        self.proteins = {}
+        # (peptide_id, mod_id, position) and (peptide_id, mod_id) rows
+        self.internal = []
+        self.terminal = []
+
+    def __call__(self, bulk=None):
+        '''Reads the MSF file, in bulk if `msf_bulk_extraction` is set'''
+
+        if bulk is None:
+            bulk = defaults.DEFAULTS['msf_bulk_extraction']
+
+        if bulk:
+            self.read_bulk()
+        else:
+            self.read_tables()
+
+    #     PUBLIC
+
+    def read_bulk(self):
+        '''Reads all peptide hits in a single pass of JOIN queries'''
+
+        peptides, internal, terminal = BulkExtractor(self.cursor)()
+
+        self.set_peptides(peptides)
+        self.internal = list(ZIP(*internal.values()))
+        self.terminal = list(ZIP(*terminal.values()))
+
+    def read_tables(self):
+        '''Reads the peptide hits with a separate query per table'''
+
+        self.init_spectrum()
+        self.add_spectrum()
+        self.add_scores()
+        self.set_proteins()
+        self.add_proteins()
+        self.add_mods()
+
+    # ------------------
+    #        BULK
+    # ------------------
+
+    def set_peptides(self, columns):
+        '''Sets the peptide, spectral, score and protein data from columns'''
+
+        for (peptide_id, spectrum_id, peptide, rank, num, charge,
+             mass, score, description) in ZIP(*columns.values()):
+            self.peptide_to_spectrum[peptide_id] = spectrum_id
+            spectrum = self.peptides[spectrum_id]
+            entry = spectrum[peptide_id]
+            entry['peptide'] = peptide
+            entry['rank'] = rank
+
+            if num is not None:
+                spectrum['num'] = num
+                spectrum['z'] = charge
+                spectrum['m/z'] = getmz(mass, charge)
+
+            if score is not None:
+                entry['score'] = score
+                entry['ev'] = 10 ** (-score / 10)
+
+            if description is not None:
+                entry['id'], entry['name'] = getprotein(description)
+
+    # ------------------
+    #       TABLES
+    # ------------------
+
+    def init_spectrum(self):
+        '''Sets the peptides with a SpectrumID as a key reference'''
+
+        columns = "PeptideID, SpectrumID, Sequence, SearchEngineRank"
+        self.cursor.execute("SELECT {} FROM Peptides;".format(columns))
+        # Spectrum ID is the unique spectral identifier
+        # Peptide ID is the unique peptide identifier
+        # Sequence is the peptide sequence, ex: "KATNE"
+        for peptide_id, spectrum_id, sequence_, rank in self.cursor:
+            self.peptide_to_spectrum[peptide_id] = spectrum_id
+            entry = self.peptides[spectrum_id][peptide_id]
+            entry['peptide'] = sequence_
+            entry['rank'] = rank
+
+    def add_spectrum(self):
+        '''Adds the spectral data, which includes the m/zs and charge states'''
+
+        columns = "SpectrumID, ScanNumbers, Charge, Mass"
+        self.cursor.execute("SELECT {} FROM SpectrumHeaders;".format(columns))
+        # num is the scan number associated with the spectral ID
+        # charge is the charge state of the peptide
+        # mass is the singly-charged mass of the peptide
+        for spectrum_id, num, charge, mass in self.cursor:
+            if spectrum_id in self.peptides:
+                spectrum = self.peptides[spectrum_id]
+                spectrum['num'] = num
+                spectrum['z'] = charge
+                spectrum['m/z'] = getmz(mass, charge)
+
+    def add_scores(self):
+        '''
+        Adds the score and calculates the EV from the score
+        :
+            score == -10*log(ev, 10)
+        '''
+
+        columns = "PeptideID, ScoreValue"
+        self.cursor.execute("SELECT {} FROM PeptideScores;".format(columns))
+        for peptide_id, score in self.cursor:
+            if peptide_id in self.peptide_to_spectrum:
+                entry = self.getentry(peptide_id)
+                entry['score'] = score
+                # need to calculate the p-value, or expectation value
+                entry['ev'] = 10 ** (-score / 10)
+
+    def set_proteins(self):
+        '''Creates a {ProteinID: (UniProt ID: Protein Name)} holder'''
+
+        columns = 'ProteinID, Description'
+        table = "ProteinAnnotations"
+        self.cursor.execute("SELECT {0} FROM {1};".format(columns, table))
+
+        for protein_id, description in self.cursor:
+            self.proteins[protein_id] = getprotein(description)
+
+    def add_proteins(self):
+        '''Adds the protein names and IDs to each entry'''
+
+        columns = "PeptideID, ProteinID"
+        self.cursor.execute("SELECT {} FROM PeptidesProteins;".format(columns))
+
+        for peptide_id, protein_id in self.cursor:
+            if peptide_id in self.peptide_to_spectrum:
+                entry = self.getentry(peptide_id)
+                entry['id'], entry['name'] = self.proteins[protein_id]
+
+    def add_mods(self):
+        '''Stores the modification rows for the read peptides'''
+
+        # for some weird reason, the mods can have peptide IDs which don't
+        # exist otherwise, causing errors. Not decoys, nothing.
+        columns = "PeptideID, AminoAcidModificationID, Position"
+        table = "PeptidesAminoAcidModifications"
+        self.cursor.execute("SELECT {} FROM {};".format(columns, table))
+        self.internal = [i for i in self.cursor
+            if i[0] in self.peptide_to_spectrum]
+
+        columns = "PeptideID, TerminalModificationID"
+        table = "PeptidesTerminalModifications"
+        self.cursor.execute("SELECT {} FROM {};".format(columns, table))
+        self.terminal = [i for i in self.cursor
+            if i[0] in self.peptide_to_spectrum]
+
+    #     HELPERS
+
+    def getentry(self, peptide_id):
+        spectrum_id = self.peptide_to_spectrum[peptide_id]
+        return self.peptides[spectrum_id][peptide_id]
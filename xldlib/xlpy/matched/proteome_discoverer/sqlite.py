@@ -12,20 +12,19 @@
 # load modules
 from __future__ import division, print_function
 
-import copy
 import sqlite3
 import sys
 
-from models import params
 from xldlib import exception
 from xldlib.definitions import re
 from xldlib.general import mapping
+from xldlib.objects import matched
 from xldlib import chemical
 
 # load objects/functions
 from .base import ProteomeDiscovererUtils
 from .mods import MONOMERS, TERMINAL_MODS
-from ..core import get_engine
+from .msf import MSFReader
 
 
 class SQLiteUtils(ProteomeDiscovererUtils):
@@ -181,7 +180,7 @@ class MSFParser(SQLiteUtils):
         super(MSFParser, self).__init__()
 
         self.data = parent.data
-        self.engine = get_engine(self.data)
+        self.engine = parent.engine
         self.source = parent.source
         self.fragments = parent.fragments
 
@@ -190,47 +189,29 @@ class MSFParser(SQLiteUtils):
 
         self.peptide_to_spectrum = {}
         self.peptides = mapping.OrderedRecursiveDict()
-        self.proteins = {}
 
         # all mods are defined internally within the file
         mods = ProteomeDiscovererMods(self.cursor, self.engine)
-        # need to convert to the namedtuple format
-        params.tupleize(mods)
         self.mod_ids = mods.ids
         self.engine['mods'].update(mods)
 
-    def run(self):
+    def run(self, bulk=None):
         '''On start'''
 
-        self.init_spectrum()
+        reader = MSFReader(self.cursor)
+        reader(bulk)
+        self.peptide_to_spectrum = reader.peptide_to_spectrum
+        self.peptides = reader.peptides
 
         self.fetch_enzyme()
         self.set_file()
-        self.add_spectrum()
-        self.add_scores()
-        self.add_mods()
+        self.add_mods(reader)
         self.add_ppms()
-        self.set_proteins()
-        self.add_proteins()
 
     # ------------------
     #       MAIN
     # ------------------
 
-    def init_spectrum(self):
-        '''Sets the peptides with a SpectrumID as a key reference'''
-
-        columns = "PeptideID, SpectrumID, Sequence, SearchEngineRank"
-        self.cursor.execute("SELECT {} FROM Peptides;".format(columns))
-        # Spectrum ID is the unique spectral identifier
-        # Peptide ID is the unique peptide identifier
-        # Sequence is the peptide sequence, ex: "KATNE"
-        for peptide_id, spectrum_id, sequence, rank in self.cursor:
-            self.peptide_to_spectrum[peptide_id] = spectrum_id
-            entry = self.peptides[spectrum_id][peptide_id]
-            entry['peptide'] = sequence
-            entry['rank'] = rank
-
     def fetch_enzyme(self):
         '''Extracts the proteolytic enzyme for the peptide search'''
 
@@ -256,50 +237,14 @@ class MSFParser(SQLiteUtils):
         for entry in self.peptides.values():
             entry['fraction'] = self._fraction
 
-    def add_spectrum(self):
-        '''Adds the spectral data, which includes the m/zs and charge states'''
-
-        columns = "SpectrumID, ScanNumbers, Charge, Mass"
-        self.cursor.execute("SELECT {} FROM SpectrumHeaders;".format(columns))
-        # Spectrum ID is the unique spectral identifier
-        # num is the scan number associated with the spectral ID
-        # charge is the charge state of the peptide
-        # mass is the singly-charged mass of the peptide
-        for spectrum_id, num, charge, mass in self.cursor:
-            # peptide_ids = self.spectrum[spectrum_id]
-
-            self.peptides[spectrum_id]['num'] = num
-            self.peptides[spectrum_id]['z'] = charge
-            # mz = masstools.mz(mass - params.PROTON_MASS, charge, 0)
-            self.peptides[spectrum_id]['m/z'] = mz
-
-    def add_scores(self):
-        '''
-        Adds the score and calculates the EV from the score
-        :
-            score == -10*log(ev, 10)
-        '''
-
-        columns = "PeptideID, ScoreValue"
-        self.cursor.execute("SELECT {} FROM PeptideScores;".format(columns))
-        # Peptide ID is the unique peptide identifier, which
-        # is for each peptide hit from the spectral ID
-        # Score is the - 10 * log(p-value, 10)
-        for peptide_id, score in self.cursor:
-            expect = 10 ** (-score / 10)
-            spectrum_id = self.peptide_to_spectrum[peptide_id]
-
-            entry = self.peptides[spectrum_id][peptide_id]
-            entry['score'] = score
-            # need to calculate the p-value, or expectation value
-            entry['ev'] = expect
-
-    def add_mods(self):
-        '''Finds all the target mods from the IDs and adds them to a holder'''
+    def add_mods(self, reader):
+        '''Adds the read mods by name to a holder for each peptide'''
 
         self._mod_templates()
-        self._internal_mods()
-        self._terminal_mods()
+        for peptide_id, mod_id, position in reader.internal:
+            self._add_internal(peptide_id, mod_id, position)
+        for peptide_id, mod_id in reader.terminal:
+            self._add_terminal(peptide_id, mod_id)
 
     def add_ppms(self):
         '''Calculates the PPMs from the mods and peptides for each entry'''
@@ -314,82 +259,39 @@ class MSFParser(SQLiteUtils):
             hit['formula'] = formula = self.calculate_formula(peptide, mod)
             hit['ppm'] = self.calculate_ppm(formula, mod, exper, charge)
 
-    def set_proteins(self):
-        '''Creates a {ProteinID: (UniProt ID: Protein Name)} holder'''
-
-        columns = 'ProteinID, Description'
-        table = "ProteinAnnotations"
-        self.cursor.execute("SELECT {0} FROM {1};".format(columns, table))
-
-        for protein_id, description in self.cursor:
-            # description == '>sp|P62894|CYC_BOVIN Cytochrome ...'
-            id_, name = description.split('|')[1:]
-            self.proteins[protein_id] = (id_, name)
-
-    def add_proteins(self):
-        '''Adds the protein names and IDs to each entry'''
-
-        columns = "PeptideID, ProteinID"
-        self.cursor.execute("SELECT {} FROM PeptidesProteins;".format(columns))
-
-        for peptide_id, protein_id in self.cursor:
-            spectrum_id = self.peptide_to_spectrum[peptide_id]
-            entry = self.peptides[spectrum_id][peptide_id]
-            id_, name = self.proteins[protein_id]
-
-            entry['id'] = id_
-            entry['name'] = name
-
     # ------------------
     #      UTILS
     # ------------------
 
     #      MODS
 
-    def _internal_mods(self):
-        '''Adds all the internal modifications to the mod holders'''
-
-        columns = "PeptideID, AminoAcidModificationID, Position"
-        table = "PeptidesAminoAcidModifications"
-        self.cursor.execute("SELECT {} FROM {};".format(columns, table))
-
-        for peptide_id, mod_id, position in self.cursor:
-            spectrum_id = self.peptide_to_spectrum.get(peptide_id)
-            modname = self.mod_ids[mod_id]
+    def _mod_templates(self):
+        '''Sets the mod template holders for each peptide ID'''
 
-            # for some weird reason, the mods can have peptide IDs which don't
-            # exist otherwise, causing errors. Not decoys, nothing.
-            if spectrum_id is not None:
-                mods = self.peptides[spectrum_id][peptide_id]['mods']
-                mods['certain'].setdefault(modname, [])
-                mods['certain'][modname].append(position)
+        for peptide_id, spectrum_id in self.peptide_to_spectrum.items():
+            hit = self.peptides[spectrum_id][peptide_id]
+            hit.setdefault('mods', matched.Modification.new())
 
-    def _terminal_mods(self):
-        '''Adds all the N-/C-terminal modifications to the mod holders'''
+    def _add_internal(self, peptide_id, mod_id, position):
+        '''Adds an internal modification to the peptide's mod holder'''
 
-        columns = "PeptideID, TerminalModificationID"
-        table = "PeptidesTerminalModifications"
-        self.cursor.execute("SELECT {} FROM {};".format(columns, table))
-        for peptide_id, mod_id in self.cursor:
-            spectrum_id = self.peptide_to_spectrum.get(peptide_id)
+        spectrum_id = self.peptide_to_spectrum[peptide_id]
+        mods = self.peptides[spectrum_id][peptide_id]['mods']
 
-            # for some weird reason, the mods can have peptide IDs which don't
-            # exist otherwise, causing errors. Not decoys, nothing.
-            if spectrum_id is not None:
-                mods = self.peptides[spectrum_id][peptide_id]['mods']
+        modname = self.mod_ids[mod_id]
+        mods['certain'].setdefault(modname, [])
+        mods['certain'][modname].append(position)
 
-                modname = self.mod_ids[mod_id]
-                mods['certain'].setdefault(modname, [])
-                if self.engine['nterm'] in self.engine['mods'][modname][1]:
-                    mods['certain'][modname].append(self.engine['nterm'])
+    def _add_terminal(self, peptide_id, mod_id):
+        '''Adds an N-/C-terminal modification to the peptide's mod holder'''
 
-                else:
-                    mods['certain'][modname].append(self.engine['cterm'])
+        spectrum_id = self.peptide_to_spectrum[peptide_id]
+        mods = self.peptides[spectrum_id][peptide_id]['mods']
 
-    def _mod_templates(self):
-        '''Sets the mod template holders for each peptide ID'''
+        modname = self.mod_ids[mod_id]
+        mods['certain'].setdefault(modname, [])
+        if self.engine['nterm'] in self.engine['mods'][modname][1]:
+            mods['certain'][modname].append(self.engine['nterm'])
 
-        template = params.TEMPLATES['mods']
-        for peptide_id, spectrum_id in self.peptide_to_spectrum.items():
-            hit = self.peptides[spectrum_id][peptide_id]
-            hit.setdefault('mods', copy.deepcopy(template))
+        else:
+            mods['certain'][modname].append(self.engine['cterm'])
@@ -43,8 +43,7 @@ def deleterows(f):
 
     def decorator(self, *args, **kwds):
         f(self, *args, **kwds)
-        for row in self.deleterows[::-1]:
-            self.row.data.deleterow(row)
+        self.row.data.deleterows(self.deleterows[::-1])
         del self.deleterows[:]
 
     decorator.__name__ = f.__name__
@@ -107,7 +106,10 @@ class RemoveIds(base.BaseObject):
     def decoys(self):
         '''Remove decoys, false ids during search for scoring'''
 
-        decoys = set(list(self.proteins.mapping['decoys']))
+        # query each unique ID, rather than iterating the decoy table
+        lookup = self.proteins.mapping['decoys']
+        decoys = {i for i in set(self.row.data['matched']['id'])
+            if i in lookup}
         decoys.update(self.row.engines['matched'].defaults.decoys)
 
         rows = self.row.data.findrows('id', decoys)
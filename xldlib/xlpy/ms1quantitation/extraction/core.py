@@ -46,6 +46,7 @@ def parsems1():
         cls = PARSERS[engine.name][engine.tostr()]
         parser = cls(row, group, fileobj)
         parser()
+        group.flush()
 
 
 def extractscans():
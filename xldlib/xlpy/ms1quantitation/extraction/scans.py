@@ -11,41 +11,52 @@
 # load modules
 import weakref
 
-from collections import defaultdict, namedtuple
+from collections import namedtuple
 
 import numpy as np
+from scipy import sparse
 
-from xldlib.definitions import ZIP
 from xldlib.qt.objects import base
 from xldlib.resources.parameters import defaults
-from xldlib.utils import logger
+from xldlib.utils import logger, math_
 
 
 # OBJECTS
 # -------
 
-Scan = namedtuple("Scan", "rows mzs intensity")
+Scan = namedtuple("Scan", "retentiontime mzs intensity")
 
 
-class DimensionTemplate(list):
-    '''List with a defined dimension for a single side'''
+class WindowIndex(object):
+    '''
+    Interval index over the retention time windows for each labels
+    group. The windows are sorted by their start, and since no window
+    is wider than the widest window, only a contiguous run of the
+    sorted windows can contain a given retention time.
+    '''
+
+    def __init__(self, starts, ends):
+        super(WindowIndex, self).__init__()
 
-    def __init__(self, dimensions, template=None):
-        super(DimensionTemplate, self).__init__()
+        starts = np.asarray(starts, dtype=float)
+        ends = np.asarray(ends, dtype=float)
 
-        self.dimensions = dimensions
-        if template is None:
-            template = [0.] * self.dimensions
-        self.template = template
+        self.order = np.argsort(starts, kind='mergesort')
+        self.starts = starts[self.order]
+        self.ends = ends[self.order]
+        self.width = (ends - starts).max() if starts.size else 0.
 
-    def newrow(self):
-        self.append(self.template[:])
+    def __call__(self, retentiontime):
+        '''Returns the indexes of windows with start < rt < end'''
+
+        lower = np.searchsorted(self.starts, retentiontime - self.width)
+        upper = np.searchsorted(self.starts, retentiontime)
+        active = self.ends[lower:upper] > retentiontime
+        return self.order[lower:upper][active]
 
 
 # DATA
 # ----
-# full range of mass spectra
-BINS = np.arange(50, 2000, 50)
 
 EXTENDABLES = (
     'mz',
@@ -60,46 +71,18 @@ EXTENDABLES = (
 # -------
 
 
-def groupspectra(scan):
+def getaggregator(groups, columns):
     '''
-    Groups scans within a certain m/z window that were found deconvoluted
-    from the self.mzs array previously.
+    Returns a sparse matrix which sums the `columns` values for each
+    group, so the hierarchical sums are a single mat-vec product.
+    Repeated indexes within a group are summed, as by `sum()`.
     '''
 
-    mzs = defaultdict(list)
-    intensities = defaultdict(list)
-
-    for row, mz, intensity in ZIP(*scan):
-        mzs[row].append(mz)
-        intensities[row].append(intensity)
-
-    return mzs, intensities
-
-
-def digitizebins(array, positions, reshape=False):
-    '''Digitizes the array based on a series of bins'''
-
-    array = np.array(array)
-
-    out = {}
-    # digitizer is 1 indexed, apparently...
-    for index in range(BINS.size+1):
-        value = array[positions == index]
-        if reshape:
-            value = value.reshape((-1, 1))
-        out[index] = value
-
-    return out
-
-
-def digitizelist(lst, positions):
-    '''Digitizes the given list to a defaultdict'''
-
-    out = defaultdict(list)
-    for index, position in enumerate(positions):
-        out[position].append(lst[index])
-
-    return out
+    rows = [row for row, group in enumerate(groups) for __ in group]
+    cols = [col for group in groups for col in group]
+    data = np.ones(len(cols))
+    shape = (len(groups), columns)
+    return sparse.coo_matrix((data, (rows, cols)), shape=shape).tocsr()
 
 
 # EXTRACTION
@@ -108,7 +91,17 @@ def digitizelist(lst, positions):
 
 @logger.init('quantitative', 'DEBUG')
 class ChromatogramExtractor(base.BaseObject):
-    '''Extracts ion chromatograms from a given MS1 scan's spectral data.'''
+    '''
+    Extracts ion chromatograms from a given MS1 scan's spectral data.
+    Scan peaks are matched to the sorted transition m/z values by
+    their ppm tolerance windows, and the isotope intensities summed
+    to the charges, crosslinks and labels with sparse matrices.
+
+    If `windowed_extraction` is set, each scan is only matched to the
+    transitions within the retention time window of their labels
+    group, including the scans directly flanking the window. Scans are
+    therefore extracted once the following scan is known.
+    '''
 
     def __init__(self, row):
         super(ChromatogramExtractor, self).__init__()
@@ -121,157 +114,184 @@ class ChromatogramExtractor(base.BaseObject):
         self.setcharges()
         self.setcrosslinks()
         self.setlabels()
+        self.setintervals()
         self.file = []
 
         self.counter = 0
+        self.previous = None
+        self.pending = None
 
     def __call__(self, retentiontime, mzs, intensity):
+        '''Processes the previous scan once the next scan is known'''
+
+        if self.pending is not None:
+            self.extract(self.pending, retentiontime)
+        self.pending = Scan(retentiontime, mzs, intensity)
+
+    #     PUBLIC
+
+    def extract(self, scan, next_retentiontime=None):
         '''Processes the spectral data and appends the retentiontime'''
 
-        self.retentiontime.append(retentiontime)
-        for name in EXTENDABLES:
-            getattr(self, name).newrow()
+        self.retentiontime.append(scan.retentiontime)
 
-        scans = self.getmzwindow(mzs, intensity)
-        for index, scan in scans:
-            groupedmzs, groupedintensities = groupspectra(scan)
-            self.setscandata(index, groupedmzs, groupedintensities)
+        retentiontimes = (self.previous, scan.retentiontime,
+            next_retentiontime)
+        active = self.getactive(retentiontimes)
+        mz, isotopes = self.getisotopedata(scan.mzs, scan.intensity, active)
+        charges = self.chargematrix.dot(isotopes)
+        crosslinks = self.crosslinkmatrix.dot(charges)
+        labels = self.labelmatrix.dot(crosslinks)
 
-        self.setchargedata()
-        self.setcrosslinkdata()
-        self.setlabeldata()
-        self.file.append(sum(self.labels[-1]))
+        values = (mz, isotopes, charges, crosslinks, labels)
+        for name, value in zip(EXTENDABLES, values):
+            getattr(self, name).append(value)
+        self.file.append(labels.sum())
+        self.previous = scan.retentiontime
 
         # dump memory data to PyTables
         self.counter += 1
         if not (self.counter % self.source.transitions.iorows):
-            self.spectratotables()
+            self.dumptables()
 
     #    SETTERS
 
     def setisotopes(self):
-        '''Creates a compact array for vectorized functions from the mzs'''
+        '''Sets the sorted m/z values and tolerance windows to match'''
 
-        self.mzs = self.row.transitions.getattr('massorder')
-        positions = np.digitize(self.mzs, BINS)
-        self.binned_mzs = digitizebins(self.mzs, positions, reshape=True)
-        self.indexes = digitizelist(range(len(self.mzs)), positions)
+        self.mzs = np.array(self.row.transitions.getattr('massorder'),
+            dtype=float)
+        self.lower = self.mzs * (1 - self.ppm_threshold)
+        self.upper = self.mzs * (1 + self.ppm_threshold)
 
-        dimensions = len(self.mzs)
-        self.mz = DimensionTemplate(dimensions, template=self.mzs)
-        self.intensity = DimensionTemplate(dimensions)
+        self.mz = []
+        self.intensity = []
         self.retentiontime = []
 
     def setcharges(self):
-        '''Sets the charge lookups for quick processing'''
+        '''Sets the isotope to charge aggregation matrix'''
 
-        self.chargeindexes = []
+        indexes = []
         for charge in self.row.transitions.iter_charge():
-            indexes = [i.getattr('isotope_index') for i in charge]
-            self.chargeindexes.append(indexes)
+            indexes.append([i.getattr('isotope_index') for i in charge])
 
-        self.charge = DimensionTemplate(len(self.chargeindexes))
+        self.chargematrix = getaggregator(indexes, self.mzs.size)
+        self.charge = []
 
     def setcrosslinks(self):
-        '''Sets the crosslink lookups for quick processing'''
+        '''Sets the charge to crosslink aggregation matrix'''
 
-        self.crosslinkindexes = []
+        indexes = []
         for crosslink in self.row.transitions.iter_crosslink():
-            indexes = [i.getattr('charge_index') for i in crosslink]
-            self.crosslinkindexes.append(indexes)
+            indexes.append([i.getattr('charge_index') for i in crosslink])
 
-        self.crosslink = DimensionTemplate(len(self.crosslinkindexes))
+        columns = self.chargematrix.shape[0]
+        self.crosslinkmatrix = getaggregator(indexes, columns)
+        self.crosslink = []
 
     def setlabels(self):
-        '''Sets the labels lookups for quick processing'''
+        '''Sets the crosslink to labels aggregation matrix'''
 
-        self.labelindexes = []
+        indexes = []
         for labels in self.row.transitions.iter_labels():
-            indexes = [i.getattr('crosslink_index') for i in labels]
-            self.labelindexes.append(indexes)
+            indexes.append([i.getattr('crosslink_index') for i in labels])
 
-        self.labels = DimensionTemplate(len(self.labelindexes))
+        columns = self.crosslinkmatrix.shape[0]
+        self.labelmatrix = getaggregator(indexes, columns)
+        self.labels = []
 
     def setparameters(self):
         '''Binds the default parameters to the class for quick lookups'''
 
         self.ppm_threshold = defaults.DEFAULTS['ppm_threshold'] * 1e-6
         self.minus = defaults.DEFAULTS['minus_time_window']
-        self.plus = defaults.DEFAULTS['minus_time_window']
-
-    def setscandata(self, binned_index, groupedmzs, groupedintensities):
-        '''Adds in all the scan data from the grouped scans'''
-
-        # grab our binned indexes
-        indexes = self.indexes[binned_index]
-
-        # add all the matched data
-        for index, mz in groupedmzs.items():
-            value_index = indexes[index]
-            intensity = groupedintensities[index]
+        self.plus = defaults.DEFAULTS['plus_time_window']
+        self.windowed = defaults.DEFAULTS['windowed_extraction']
+        # the stored flag, not the setting, defines the extracted scans
+        self.row.transitions.setattr('windowed_extraction', self.windowed)
 
-            self.mz[-1][value_index] = np.average(mz, weights=intensity)
-            self.intensity[-1][value_index] = np.sum(intensity)
+    def setintervals(self):
+        '''Sets the retention time windows and the isotopes per labels'''
 
-    def setchargedata(self):
-        '''Updates the charge data for the holder'''
-
-        for index, isotopes in enumerate(self.chargeindexes):
-            value = sum(self.intensity[-1][i] for i in isotopes)
-            self.charge[-1][index] = value
-
-    def setcrosslinkdata(self):
-        '''Updates the charge data for the holder'''
-
-        for index, charges in enumerate(self.crosslinkindexes):
-            value = sum(self.charge[-1][i] for i in charges)
-            self.crosslink[-1][index] = value
+        starts = []
+        ends = []
+        for labels in self.row.transitions.iter_labels():
+            rts = labels.getattr('precursor_rt')
+            starts.append(min(rts) - self.minus)
+            ends.append(max(rts) + self.plus)
 
-    def setlabeldata(self):
-        '''Updates the charge data for the holder'''
+        self.starts = np.array(starts, dtype=float)
+        self.ends = np.array(ends, dtype=float)
+        self.windows = WindowIndex(self.starts, self.ends)
 
-        for index, crosslinks in enumerate(self.labelindexes):
-            value = sum(self.crosslink[-1][i] for i in crosslinks)
-            self.labels[-1][index] = value
+        matrix = self.labelmatrix.dot(self.crosslinkmatrix)
+        self.labelisotopes = matrix.dot(self.chargematrix).tocsr()
 
     def set_windows(self):
         '''Sets the start and the end windows for group'''
 
         rt = np.array(getattr(self.row.transitions.cache, 'retentiontime')())
-        for labels in self.row.transitions.iter_labels():
-            rts = labels.getattr('precursor_rt')
-            start = min(rts) - self.minus
-            end = max(rts) + self.plus
-
+        labels = self.row.transitions.iter_labels()
+        for group, start, end in zip(labels, self.starts, self.ends):
             indexes, = np.where((start < rt) & (end > rt))
-            labels.setattr('window_start', indexes[0] - 1)
-            labels.setattr('window_end', indexes[-1] + 1)
+            group.setattr('window_start', max(indexes[0] - 1, 0))
+            group.setattr('window_end', min(indexes[-1] + 1, rt.size - 1))
 
     #    GETTERS
 
-    def getmzwindow(self, mzs, intensity):
+    def getactive(self, retentiontimes):
         '''
-        Filters the scan mz values based on the min and max of the
-        transition window, to filter for only those in the crosslinker
-        window.
+        Returns the isotope indexes for all labels groups with a window
+        containing any of the retention times, or None if unwindowed.
         '''
 
-        # use binning to allow scan extraction in roughly O(n) time,
-        # where n is the size of the mzs, and m is the size of the query
-        # otherwise, scales as O(n*m) time
-        positions = np.digitize(mzs, BINS)
-        binned_mzs = digitizebins(mzs, positions)
-        binned_intensity = digitizebins(intensity, positions)
+        if not self.windowed:
+            return None
 
-        # np.digitize 1-indexes everything, so has to be BINS.size+1
-        for index in range(BINS.size+1):
-            diff = abs(binned_mzs[index] - self.binned_mzs[index])
-            ppm = diff / self.binned_mzs[index]
-            rows, cols = np.where(ppm <= self.ppm_threshold)
+        groups = [self.windows(i) for i in retentiontimes if i is not None]
+        groups = np.unique(np.concatenate(groups))
+        return np.unique(self.labelisotopes[groups].indices)
 
-            mzs = binned_mzs[index][cols]
-            intensity = binned_intensity[index][cols]
-            yield index, Scan(rows, mzs, intensity)
+    def getisotopedata(self, mzs, intensity, active=None):
+        '''
+        Returns the intensity-weighted m/z and the summed intensity of
+        the scan peaks within the ppm threshold of each transition m/z.
+        Each window is found by binary search over the sorted peaks, so
+        the scan is matched in O(m log n) time, rather than O(n*m).
+        Only the `active` isotope indexes are matched, if provided.
+        '''
+
+        mzs = np.asarray(mzs, dtype=float)
+        intensity = np.asarray(intensity, dtype=float)
+        order = np.argsort(mzs, kind='mergesort')
+        mzs = mzs[order]
+        intensity = intensity[order]
+
+        if active is None:
+            active = slice(None)
+        lower = self.lower[active]
+        upper = self.upper[active]
+
+        starts = np.searchsorted(mzs, lower, side='left')
+        ends = np.searchsorted(mzs, upper, side='right')
+        owners, peaks = math_.expandranges(starts, ends)
+
+        size = lower.size
+        weights = intensity[peaks]
+        totals = np.bincount(owners, weights=weights, minlength=size)
+        weighted = np.bincount(owners, weights=mzs[peaks] * weights,
+            minlength=size)
+
+        # unmatched or inactive transitions keep the theoretical m/z
+        mz = self.mzs.copy()
+        isotopes = np.zeros(self.mzs.size)
+        isotopes[active] = totals
+
+        matched = (ends > starts) & (totals > 0)
+        values = mz[active]
+        values[matched] = weighted[matched] / totals[matched]
+        mz[active] = values
+        return mz, isotopes
 
     #    HELPERS
 
@@ -282,6 +302,14 @@ class ChromatogramExtractor(base.BaseObject):
         to PyTables arrays.
         '''
 
+        if self.pending is not None:
+            self.extract(self.pending)
+            self.pending = None
+        self.dumptables()
+
+    def dumptables(self):
+        '''Appends the extracted rows to the PyTables arrays'''
+
         for name in ('retentiontime', 'file') + EXTENDABLES:
             lst = getattr(self, name)
             arr = getattr(self.row.transitions.cache, name)()
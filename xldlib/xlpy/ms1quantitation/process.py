@@ -25,9 +25,9 @@ from xldlib.xlpy import wrappers
 
 
 def calculatesignalnoise(hdf5group):
-    '''Calculates the average noise over the entire chromatogam'''
+    '''Calculates the average noise over the extracted chromatogam'''
 
-    y = hdf5group.intensity()
+    y = hdf5group.extracted_intensity()
     baseline = xic_picking.calculate_baseline(y)
     hdf5group.setattr('baseline', baseline)
 
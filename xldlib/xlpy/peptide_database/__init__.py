@@ -11,6 +11,6 @@
 
 __all__ = [
     'combinations', 'core', 'decoy',
-    'enzyme', 'hdf5', 'mods', 'mowse'
+    'enzyme', 'hdf5', 'index', 'mods', 'mowse'
     # 'sequencing'
 ]
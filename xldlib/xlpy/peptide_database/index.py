@@ -0,0 +1,275 @@
+'''
+    XlPy/Peptide_Database/index
+    ___________________________
+
+    Mass-sorted, memory-mapped peptide index. The peptide records are
+    stored as fixed-width binary records in insertion order, and a
+    sorted mass array with the record offsets for each mass allows
+    O(log n) mass tolerance window queries.
+
+    The index is built in a streaming fashion: records are appended
+    to disk in chunks, each chunk's (mass, offset) pairs are sorted
+    into a run, and the runs are merged block-wise, so the memory
+    use is bounded by the chunk size rather than the database size.
+
+    The index is standalone: the legacy `PeptideDatabase` cannot be
+    imported, and the MOWSE database bins unmodified peptides by
+    coarse mass, so no search path produces an index yet. Any
+    peptide source can be streamed into a `PeptideIndexWriter`.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+
+    >>> dtype = [('id', 'S11'), ('peptide', 'S10')]
+    >>> with PeptideIndexWriter(path, dtype) as writer:
+    ...     writer.append(1000.5, (b'P46406', b'PEPTIDEK'))
+    >>> index = PeptideIndex(path)
+    >>> index.window(1000.5, 5)['peptide']
+    array([b'PEPTIDEK'], dtype='|S10')
+'''
+
+# load modules
+import json
+import os
+
+import numpy as np
+
+from xldlib.resources.parameters import defaults
+
+__all__ = [
+    'PeptideIndex',
+    'PeptideIndexWriter'
+]
+
+
+# CONSTANTS
+# ---------
+
+# increment when the index layout changes
+VERSION = 1
+
+RECORDS = 'records.bin'
+MASSES = 'masses.npy'
+OFFSETS = 'offsets.npy'
+# written last, so an index is only valid once the metadata exists
+METADATA = 'index.json'
+
+RUN = 'run-{0}.{1}.npy'
+
+# (mass, offset) pairs read per run during each merge pass
+MERGE_BLOCK = 1 << 16
+
+
+# HELPERS
+# -------
+
+
+def getdtype(descr):
+    '''Returns the record dtype from the JSON-serialized description'''
+
+    return np.dtype([tuple(i) for i in descr])
+
+
+def mergeruns(runs, masses, offsets, blocksize=MERGE_BLOCK):
+    '''
+    Merges the sorted (mass, offset) runs into the output arrays.
+    Each pass reads a block from every run, and writes every value
+    up to the smallest last mass of an incomplete block, so at least
+    one block is fully consumed per pass.
+    '''
+
+    positions = [0] * len(runs)
+    written = 0
+    while runs:
+        blocks = []
+        threshold = np.inf
+        for (runmasses, __), position in zip(runs, positions):
+            block = np.asarray(runmasses[position:position + blocksize])
+            blocks.append(block)
+            if block.size and position + block.size < runmasses.size:
+                threshold = min(threshold, block[-1])
+
+        merged = []
+        for index, block in enumerate(blocks):
+            count = np.searchsorted(block, threshold, 'right')
+            start = positions[index]
+            merged.append((block[:count], runs[index][1][start:start + count]))
+            positions[index] += count
+
+        mass = np.concatenate([i[0] for i in merged])
+        if not mass.size:
+            return
+        offset = np.concatenate([i[1] for i in merged])
+
+        # stable, so equal masses keep their insertion order
+        order = np.argsort(mass, kind='mergesort')
+        masses[written:written + mass.size] = mass[order]
+        offsets[written:written + mass.size] = offset[order]
+        written += mass.size
+
+
+# OBJECTS
+# -------
+
+
+class PeptideIndexWriter(object):
+    '''
+    Streaming writer for a peptide index, which appends the records
+    and sorted mass runs to disk every `chunksize` records, and merges
+    the runs upon `close`.
+    '''
+
+    def __init__(self, path, dtype, chunksize=None):
+        super(PeptideIndexWriter, self).__init__()
+
+        if chunksize is None:
+            chunksize = defaults.DEFAULTS['peptide_index_chunk_size']
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.chunksize = chunksize
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+        self.remove(METADATA)
+        self.records = open(os.path.join(path, RECORDS), 'wb')
+
+        self.count = 0
+        self.runs = []
+        self.masses = []
+        self.buffer = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    #     PUBLIC
+
+    def append(self, mass, record):
+        '''Appends the record, with fields in the order of the dtype'''
+
+        self.masses.append(mass)
+        self.buffer.append(tuple(record))
+        if len(self.buffer) >= self.chunksize:
+            self.flush()
+
+    def flush(self):
+        '''Writes the buffered records and their sorted mass run'''
+
+        if not self.buffer:
+            return
+
+        np.array(self.buffer, dtype=self.dtype).tofile(self.records)
+        masses = np.array(self.masses, dtype=np.float64)
+        offsets = np.arange(self.count, self.count + masses.size)
+        order = np.argsort(masses, kind='mergesort')
+
+        run = len(self.runs)
+        paths = (self.getpath(RUN.format(run, 'masses')),
+            self.getpath(RUN.format(run, 'offsets')))
+        np.save(paths[0], masses[order])
+        np.save(paths[1], offsets[order])
+        self.runs.append(paths)
+
+        self.count += masses.size
+        self.masses = []
+        self.buffer = []
+
+    def close(self):
+        '''Merges the sorted runs and writes the index metadata'''
+
+        if self.records is None:
+            return
+
+        self.flush()
+        self.records.close()
+        self.records = None
+
+        masses = np.lib.format.open_memmap(self.getpath(MASSES),
+            mode='w+', dtype=np.float64, shape=(self.count,))
+        offsets = np.lib.format.open_memmap(self.getpath(OFFSETS),
+            mode='w+', dtype=np.int64, shape=(self.count,))
+        runs = [tuple(np.load(i, mmap_mode='r') for i in paths)
+            for paths in self.runs]
+        mergeruns(runs, masses, offsets)
+        masses.flush()
+        offsets.flush()
+        del masses, offsets, runs
+
+        for paths in self.runs:
+            for path in paths:
+                os.remove(path)
+        self.runs = []
+
+        metadata = {
+            'version': VERSION,
+            'count': self.count,
+            'dtype': np.lib.format.dtype_to_descr(self.dtype)
+        }
+        with open(self.getpath(METADATA), 'w') as f:
+            json.dump(metadata, f)
+
+    #     HELPERS
+
+    def getpath(self, name):
+        return os.path.join(self.path, name)
+
+    def remove(self, name):
+        path = self.getpath(name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class PeptideIndex(object):
+    '''
+    Read-only, memory-mapped peptide index, which only reads the
+    metadata on opening, so whole-proteome indexes open instantly.
+    '''
+
+    def __init__(self, path):
+        super(PeptideIndex, self).__init__()
+
+        with open(os.path.join(path, METADATA)) as f:
+            metadata = json.load(f)
+        if metadata['version'] != VERSION:
+            raise ValueError("Unsupported peptide index version")
+
+        self.path = path
+        self.dtype = getdtype(metadata['dtype'])
+        self.count = metadata['count']
+
+        self.masses = np.load(os.path.join(path, MASSES), mmap_mode='r')
+        self.offsets = np.load(os.path.join(path, OFFSETS), mmap_mode='r')
+        if self.count:
+            self.records = np.memmap(os.path.join(path, RECORDS),
+                dtype=self.dtype, mode='r', shape=(self.count,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+
+    def __len__(self):
+        return self.count
+
+    #     GETTERS
+
+    def between(self, lower, upper):
+        '''Returns the [start, end) mass-sorted range for lower <= mass <= upper'''
+
+        start = np.searchsorted(self.masses, lower, 'left')
+        end = np.searchsorted(self.masses, upper, 'right')
+        return int(start), int(end)
+
+    def getrecords(self, start, end):
+        '''Returns the records for the [start, end) mass-sorted range'''
+
+        return self.records[np.asarray(self.offsets[start:end])]
+
+    def getmasses(self, start, end):
+        return np.asarray(self.masses[start:end])
+
+    def window(self, mass, ppm):
+        '''Returns the records within a ppm mass tolerance of the mass'''
+
+        tolerance = mass * ppm * 1e-6
+        return self.getrecords(*self.between(mass - tolerance,
+            mass + tolerance))
@@ -15,7 +15,7 @@ from __future__ import division
 # load modules
 from xldlib.qt.objects import base
 from xldlib.resources.parameters import defaults
-from xldlib.utils import logger
+from xldlib.utils import logger, math_
 
 # load objects/functions
 from collections import defaultdict
@@ -68,16 +68,30 @@ class Ms1Linker(base.BaseObject):
 
         self.num = defaultdict(list)
         for index, num in enumerate(self.row.data['matched']["precursor_num"]):
+            if math_.isnull(num):
+                # missing scans, as None or NaN, are not linked
+                num = None
             self.num[num].append(index)
         self.group.setscans()
+        self.index = self.group.getscanindex()
 
     def setlinkedscans(self):
-        '''Links each precursor scan to each MS1-level scan'''
+        '''
+        Links each precursor scan to each MS1-level scan, finding
+        the parent MS1 scans in a single pass over the scan index.
+        '''
+
+        nums = [i for i in self.num if i is not None]
+        parents = self.index.getparents(nums, self.steps)
 
         self.linkedscans = {}
-        for num in self.num:
-            ms1 = self.getms1scan(num)
-            self.linkedscans[num] = ms1
+        if None in self.num:
+            self.linkedscans[None] = self.getnull()
+        for num, parent in zip(nums, parents.tolist()):
+            if parent == -1:
+                self.linkedscans[num] = self.getnull()
+            else:
+                self.linkedscans[num] = self.getms1data(parent)
 
     def setmatcheddata(self):
         '''Sets the MS1 scan data for the matched data'''
@@ -100,9 +114,15 @@ class Ms1Linker(base.BaseObject):
             num -- product scan number
         '''
 
-        for ms1num in self.group.findscan(num):
-            ms1scan = self.group.getscan(str(ms1num))
-            return tuple(ms1scan.getattrs(('num', 'retention_time')))
+        ms1num = self.index.getparent(num, self.steps)
+        if ms1num is None:
+            return self.getnull()
+        return self.getms1data(ms1num)
+
+    def getms1data(self, ms1num):
+        ms1scan = self.group.getscan(str(ms1num))
+        return tuple(ms1scan.getattrs(('num', 'retention_time')))
 
+    def getnull(self):
         self.error = True
         return None, None
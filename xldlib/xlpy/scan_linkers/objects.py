@@ -9,12 +9,9 @@
 '''
 
 # load modules
-import multiprocessing
-
 from collections import defaultdict
-from functools import partial
 
-from xldlib.definitions import MAP, ZIP
+from xldlib.definitions import ZIP
 from xldlib.qt.objects import base
 from xldlib.resources.parameters import defaults
 from xldlib.utils import logger
@@ -49,33 +46,19 @@ class Row(base.BaseObject):
         self.precursor = self.row.spectra.getgroup('precursor')
         self.product = self.row.spectra.getgroup('product')
 
-        self.setpool()
-
     def __call__(self, productnum):
         '''Appends the precursor and product scans to the row'''
 
-        try:
-            if productnum not in self.prod:
-                product = self.product.getscan(str(productnum))
-                for num, mz in self.find(productnum, product):
-                    self.prec[num].append((productnum, mz))
-                    self.prod[productnum].append(num)
-        except KeyError:
-            self.error = True
+        self.link([productnum])
 
     #     SETTERS
 
-    def setpool(self):
-        '''Sets the pool/map for precursor scan linking'''
+    def setlinked(self, productnum, precursors):
+        '''Stores the (precursor_num, precursor_mz) pairs for the product'''
 
-        # multiprocessing is ~50% slower than using a single core.
-        if self.checkprecursor and defaults.DEFAULTS['use_multiprocessing']:
-            cores = defaults.DEFAULTS['max_multiprocessing']
-            self.pool = multiprocessing.Pool(processes=cores)
-            self.mapper = self.pool.imap
-
-        elif self.checkprecursor:
-            self.mapper = MAP
+        for num, mz in precursors:
+            self.prec[num].append((productnum, mz))
+            self.prod[productnum].append(num)
 
     #     PUBLIC
 
@@ -85,16 +68,42 @@ class Row(base.BaseObject):
         for index, num in enumerate(self.row.data['matched'][key]):
             self.index[num].append(index)
 
+    def link(self, productnums):
+        '''
+        Links the product scans to their precursor scans. Products
+        without a listed precursor, which must be validated by the
+        precursor m/z, are matched together in a single vectorized pass.
+        '''
+
+        unlisted = []
+        seen = set(self.prod)
+        for productnum in productnums:
+            if productnum in seen:
+                continue
+            seen.add(productnum)
+
+            try:
+                product = self.product.getscan(str(productnum))
+            except KeyError:
+                self.error = True
+                continue
+
+            if product.hasattr("precursor_num") or not self.checkprecursor:
+                self.setlinked(productnum, self.find(productnum, product))
+            else:
+                unlisted.append((productnum, product))
+
+        if unlisted:
+            self.findmatching(unlisted)
+
     def find(self, num, product):
         '''
-        Searches scans starting from the nearest precursor, and including
-        all with a 1-scan difference.
+        Returns the precursor listed in the product scan header, or the
+        nearest preceding precursor scan.
         '''
 
         if product.hasattr("precursor_num"):
             return [product.getattrs(['precursor_num', 'precursor_mz'])]
-        elif self.checkprecursor:
-            return self.findmatching(num, product)
         else:
             return self.findserial(num, product)
 
@@ -107,30 +116,30 @@ class Row(base.BaseObject):
         except StopIteration:
             pass
 
-    def findmatching(self, num, product):
+    def findmatching(self, products):
         '''
-        Returns all precursor scans with a matching product parent ion
-        in the precursor m/z list.
+        Links each product to all sequential precursor scans containing
+        the product parent ion. All candidate precursor scans are merged
+        into a sorted m/z index, which is searched for every product
+        at once, rather than scanning each precursor peaklist per product.
         '''
 
-        precursor_mz = product.getattr('precursor_mz')
-        nums = list(self.precursor.findscan(num))
+        candidates = [list(self.precursor.findscan(i)) for i, __ in products]
+        nums = sorted({j for i in candidates for j in i})
         mzs = (self.precursor.getscan(str(i)).mz[:] for i in nums)
+        index = process.PrecursorIndex(nums, mzs)
 
-        target = self.gettarget(precursor_mz)
-        result = self.mapper(target, mzs)
+        precursor_mzs = [i.getattr('precursor_mz') for __, i in products]
+        matches = index.match(precursor_mzs, self.ppmthreshold, candidates)
 
-        for precursor_num, bool_ in ZIP(nums, result):
-            if bool_:
-                yield precursor_num, precursor_mz
+        offset = 0
+        for (productnum, __), mz, numbers in ZIP(products, precursor_mzs,
+            candidates):
+            bools = matches[offset:offset + len(numbers)]
+            offset += len(numbers)
+            self.setlinked(productnum, ((i, mz) for i, bool_ in
+                ZIP(numbers, bools) if bool_))
 
     def delevel(self):
         if self.row.ishierarchical():
             self.row.spectra.delevel()
-
-    #     GETTERS
-
-    def gettarget(self, precursor_mz):
-        return partial(process.matchingprecursor,
-            precursor_mz,
-            self.ppmthreshold)
@@ -73,8 +73,7 @@ class ScanLinker(base.BaseObject):
         '''
 
         self.row.linked.delevel()
-        for num in self.row.data['matched']['num']:
-            self.row.linked(num)
+        self.row.linked.link(self.row.data['matched']['num'])
 
         self.row.data.setnull()
         self.setlinkeddata()
@@ -2,7 +2,8 @@
     XlPy/Scan_Linkers/process
     _________________________
 
-    Handler for a multiprocessing example with a pool map.
+    Vectorized matching of product precursor m/z values to the peaks
+    within candidate precursor scans.
 
     :copyright: (c) 2015 The Regents of the University of California.
     :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
@@ -14,9 +15,11 @@ from __future__ import division
 # load modules
 import numpy as np
 
+from xldlib.utils import math_
 
-# PARALLELIZATION
-# ---------------
+
+# HELPERS
+# -------
 
 
 def matchingprecursor(precursor_mz, ppmthreshold, mz):
@@ -25,3 +28,63 @@ def matchingprecursor(precursor_mz, ppmthreshold, mz):
     ppm = abs(mz - precursor_mz) / precursor_mz
     indexes, = np.where(ppm < ppmthreshold)
     return bool(indexes.size)
+
+
+# INDEX
+# -----
+
+
+class PrecursorIndex(object):
+    '''
+    Sorted m/z values from all candidate precursor scans within a
+    file, with the owning scan of each m/z value.
+    '''
+
+    def __init__(self, nums, mzs):
+        super(PrecursorIndex, self).__init__()
+
+        self.nums = np.asarray(nums)
+        mzs = [np.asarray(i, dtype=float) for i in mzs]
+        lengths = [i.size for i in mzs]
+        owners = np.repeat(np.arange(len(mzs), dtype=np.int32), lengths)
+
+        if mzs:
+            values = np.concatenate(mzs)
+        else:
+            values = np.empty(0, dtype=float)
+
+        order = np.argsort(values, kind='mergesort')
+        self.mz = values[order]
+        self.owners = owners[order]
+
+    def match(self, precursor_mzs, ppmthreshold, candidates):
+        '''
+        Returns a boolean array over the flattened candidate scans, for
+        whether each candidate contains a peak within `ppmthreshold`
+        of the product's precursor m/z.
+
+        Args:
+            precursor_mzs (np.ndarray):     precursor m/z per product
+            ppmthreshold (float):           fractional mass tolerance
+            candidates (list):              candidate scan numbers per
+                                            product, all within `nums`
+        '''
+
+        precursor_mzs = np.asarray(precursor_mzs, dtype=float)
+        window = precursor_mzs * ppmthreshold
+        start = np.searchsorted(self.mz, precursor_mzs - window, 'right')
+        end = np.searchsorted(self.mz, precursor_mzs + window, 'left')
+        end = np.maximum(start, end)
+
+        # product and precursor pairs with a matching peak
+        products, positions = math_.expandranges(start, end)
+        hits = products * self.nums.size + self.owners[positions]
+
+        lengths = [len(i) for i in candidates]
+        products = np.repeat(np.arange(len(candidates)), lengths)
+        flattened = np.fromiter((j for i in candidates for j in i),
+            dtype=self.nums.dtype, count=sum(lengths))
+        owners = np.searchsorted(self.nums, flattened)
+        keys = products * self.nums.size + owners
+
+        return np.in1d(keys, hits)
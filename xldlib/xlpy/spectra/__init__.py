@@ -12,12 +12,16 @@
 from .parse import parsespectra
 
 __all__ = [
+    'binary',
+    'cache',
     'link',
     'mgf',
     'mz5',
     'mzdata',
     'mzml',
     'mzxml',
+    'numpress',
+    'offsets',
     'parse',
     'pava',
     'scan_parser'
@@ -0,0 +1,93 @@
+'''
+    XlPy/Spectra/binary
+    ___________________
+
+    Decodes base64-encoded peak lists from the XML spectral formats
+    directly into NumPy arrays.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules
+import base64
+import zlib
+
+import numpy as np
+
+from xldlib.resources.parameters import defaults
+
+from . import numpress
+
+
+# CONSTANTS
+# ---------
+
+FLOAT_TYPES = {
+    32: 'f4',
+    64: 'f8'
+}
+
+# peak lists are always returned as native 64-bit floats
+NATIVE = np.dtype(np.float64)
+
+
+# HELPERS
+# -------
+
+
+def getdtype(precision, byteorder='little'):
+    '''Returns the NumPy dtype for the binary array, IE, '<f8'.'''
+
+    byte = defaults.DEFAULTS['byte_order'][byteorder]
+    if byte == '!':
+        byte = '>'
+    return np.dtype(byte + FLOAT_TYPES[precision])
+
+
+def decompress(data, compression=None):
+    '''Decodes and decompresses the base64 string to a bytes object'''
+
+    data = base64.b64decode(data)
+    if compression == 'zlib':
+        try:
+            return zlib.decompress(data)
+        except zlib.error:
+            return b''
+    return data
+
+
+# DECODING
+# --------
+
+
+def decode(data, precision=64, compression=None, byteorder='little',
+    compressor=None):
+    '''
+    Decodes a base64 binary array to a NumPy array without unpacking
+    values to Python floats. `np.frombuffer` shares memory with the
+    decompressed bytes, so native 64-bit arrays are zero-copy, while
+    32-bit or byte-swapped arrays need a single vectorized cast.
+
+    Args:
+        data (str):             base64 encoded binary data
+        precision (int):        float precision, 32 or 64
+        compression (str):      None or 'zlib'
+        byteorder (str):        'little', 'big' or 'network'
+        compressor (str):       None or MS-Numpress scheme, see
+                                `numpress.DECODERS`
+    Returns (np.ndarray):       float64 array
+    '''
+
+    data = decompress(data, compression)
+    if not data:
+        return np.array([], dtype=NATIVE)
+    elif compressor is not None:
+        return numpress.DECODERS[compressor](data)
+
+    dtype = getdtype(precision, byteorder)
+    count = len(data) // dtype.itemsize
+    array = np.frombuffer(data, dtype=dtype, count=count)
+    if array.dtype != NATIVE:
+        array = array.astype(NATIVE)
+    return array
@@ -0,0 +1,307 @@
+'''
+    XlPy/Spectra/cache
+    __________________
+
+    Persistent cache for parsed spectral data. Parsed file rows are
+    stored as individual HDF5 files, keyed by the content hash of the
+    raw scan files, the parser version, and any settings which change
+    the parsed scans. The least recently used files are evicted once
+    the cache exceeds the maximum size.
+
+    The digest and byte-offset memos for the raw scan files count
+    towards the cache size, and each cached file row records its
+    memos, so they are evicted together.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules
+import hashlib
+import json
+import os
+
+import tables as tb
+
+from xldlib.objects import pytables
+from xldlib.qt.objects import base
+from xldlib.resources import paths
+from xldlib.resources.parameters import defaults
+from xldlib.utils import logger
+
+from . import offsets
+
+# CONSTANTS
+# ---------
+
+# increment when the parsed output changes, invalidating cached rows
+VERSION = 1
+
+SUFFIX = '.h5'
+DIGEST_SUFFIX = '.digest'
+MEMO_SUFFIXES = (DIGEST_SUFFIX, offsets.CACHE_SUFFIX)
+
+ROW = 'row'
+# root attribute with the memo names for the raw scan files
+MEMOS = 'memos'
+
+BLOCK_SIZE = 1 << 20
+
+# settings which determine the stored scans and peak lists
+SETTINGS = (
+    'check_precursor',
+    'ms1_scan_level',
+    'precursor_scan_level',
+    'product_scan_level',
+    'precursor_scan_steps',
+    'byte_order',
+    'spectral_layout'
+)
+
+
+# HELPERS
+# -------
+
+
+def getmemopath(path):
+    '''
+    Returns the path to the digest memo, keyed by the absolute path,
+    size and modification time of the file.
+    '''
+
+    stat = os.stat(path)
+    memo = '{0}:{1}:{2}'.format(os.path.abspath(path),
+        stat.st_size, stat.st_mtime)
+    memo = hashlib.sha1(memo.encode('utf-8')).hexdigest()
+    return os.path.join(paths.DIRS['cache'], memo + DIGEST_SUFFIX)
+
+
+def getdigest(path, blocksize=BLOCK_SIZE):
+    '''
+    Returns the SHA1 digest of the file contents. The digest is memoized
+    by the absolute path, size and modification time of the file.
+    '''
+
+    memopath = getmemopath(path)
+    if os.path.exists(memopath):
+        with open(memopath, 'r') as f:
+            digest = f.read().strip()
+        # mark as recently used
+        touch(memopath)
+        return digest
+
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            digest.update(block)
+    digest = digest.hexdigest()
+
+    try:
+        with open(memopath, 'w') as f:
+            f.write(digest)
+    except (IOError, OSError):
+        pass
+    return digest
+
+
+def touch(path):
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def getentries(directory):
+    '''Returns the (mtime, size, path) for each cached file row and memo'''
+
+    for name in os.listdir(directory):
+        if name.endswith((SUFFIX,) + MEMO_SUFFIXES):
+            path = os.path.join(directory, name)
+            stat = os.stat(path)
+            yield stat.st_mtime, stat.st_size, path
+
+
+def readmemos(path):
+    '''Returns the memo paths stored with the cached file row'''
+
+    try:
+        with tb.open_file(path, 'r') as cached:
+            memos = json.loads(getattr(cached.root._v_attrs, MEMOS, '[]'))
+    except (IOError, OSError, ValueError, tb.HDF5ExtError):
+        return []
+
+    directory = os.path.dirname(path)
+    return [os.path.join(directory, i) for i in memos]
+
+
+def evict(limit, directory=None):
+    '''
+    Removes the least recently used cached file rows and memos until
+    the cache is at most `limit` bytes, removing the memos of each
+    file row with the row. Returns the removed paths.
+    '''
+
+    if directory is None:
+        directory = paths.DIRS['cache']
+
+    entries = sorted(getentries(directory))
+    sizes = {path: filesize for __, filesize, path in entries}
+    size = sum(sizes.values())
+    removed = []
+    for __, __, path in entries:
+        if size <= limit:
+            break
+        elif path not in sizes:
+            # memo already removed with its file row
+            continue
+
+        items = [path]
+        if path.endswith(SUFFIX):
+            items.extend(i for i in readmemos(path) if i in sizes)
+        for item in items:
+            try:
+                os.remove(item)
+            except OSError:
+                continue
+            size -= sizes.pop(item)
+            removed.append(item)
+    return removed
+
+
+@pytables.silence_naturalname
+def copyrow(source, target):
+    '''
+    Copies the cached scan levels into the existing file row group,
+    preserving the groups and tables already bound to the file row.
+    The only pre-existing children are the empty columnar scan tables.
+    '''
+
+    for name, level in source._v_groups.items():
+        if name not in target._v_groups:
+            level._f_copy(newparent=target, recursive=True)
+            continue
+
+        destination = target._v_groups[name]
+        level._v_attrs._f_copy(destination)
+        for childname, child in level._v_children.items():
+            if childname in destination._v_children:
+                existing = destination._v_children[childname]
+                existing.append(child.read())
+                existing.flush()
+            else:
+                child._f_copy(newparent=destination, recursive=True)
+
+
+# CACHE
+# -----
+
+
+@logger.init('scans', level='DEBUG')
+class SpectralCache(base.BaseObject):
+    '''
+    Loads and stores the parsed spectra for a file row. If only a
+    subset of scans are parsed, the scan numbers are part of the key.
+    '''
+
+    def __init__(self, row, nums=None, source=None):
+        super(SpectralCache, self).__init__()
+
+        self.row = row
+        if source is None:
+            source = self.app.discovererthread
+        self.source = source
+
+        self.key = self.getkey(nums)
+        self.memos = self.getmemos()
+        self.path = os.path.join(paths.DIRS['cache'], self.key + SUFFIX)
+
+    #     PUBLIC
+
+    @logger.call('scans', level='DEBUG')
+    def load(self):
+        '''Copies the cached scans into the file row, returning if cached'''
+
+        if not os.path.exists(self.path):
+            return False
+
+        try:
+            cached = tb.open_file(self.path, 'r')
+        except (IOError, OSError, tb.HDF5ExtError):
+            return False
+
+        with cached:
+            copyrow(cached.root._v_groups[ROW], self.row.spectra.group)
+
+        # mark as recently used
+        touch(self.path)
+        return True
+
+    @logger.call('scans', level='DEBUG')
+    def save(self):
+        '''Stores the parsed file row, then evicts to the maximum size'''
+
+        group = self.row.spectra.group
+        group._v_file.flush()
+
+        temp = '{0}.{1}'.format(self.path, os.getpid())
+        try:
+            with tb.open_file(temp, 'w') as cached:
+                self.copy(group, cached.root)
+                setattr(cached.root._v_attrs, MEMOS, json.dumps(self.memos))
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            os.rename(temp, self.path)
+        except (IOError, OSError, tb.HDF5ExtError):
+            if os.path.exists(temp):
+                os.remove(temp)
+            return
+
+        evict(defaults.DEFAULTS['spectral_cache_size'] * 2**20)
+
+    #     GETTERS
+
+    def getfiles(self):
+        '''Returns the raw scan file paths, excluding the MS1 scans'''
+
+        keys = self.row.spectra.keys(ignore=self.row.spectra.ms1)
+        return [self.row.files[i] for i in keys]
+
+    def getmemos(self):
+        '''Returns the digest and offset memo names for the raw files'''
+
+        memos = []
+        for path in self.getfiles():
+            memos.append(os.path.basename(getmemopath(path)))
+            memos.append(os.path.basename(offsets.getcachepath(path)))
+        return memos
+
+    def getkey(self, nums=None):
+        '''Returns the hexdigest for the raw files, parsers and settings'''
+
+        files = []
+        for key in self.row.spectra.keys(ignore=self.row.spectra.ms1):
+            engine = self.row.engines[key]
+            path = self.row.files[key]
+            files.append((key, engine.name, engine.tostr(), getdigest(path)))
+
+        if nums is not None:
+            nums = sorted(int(i) for i in nums)
+
+        document = {
+            'version': VERSION,
+            'files': files,
+            'settings': {k: defaults.DEFAULTS[k] for k in SETTINGS},
+            'quantitative': bool(self.source.quantitative),
+            'fingerprinting': bool(self.source.fingerprinting),
+            'reporterions': bool(self.source.reporterions),
+            'nums': nums
+        }
+        dump = json.dumps(document, sort_keys=True)
+        return hashlib.sha1(dump.encode('utf-8')).hexdigest()
+
+    #     HELPERS
+
+    @staticmethod
+    @pytables.silence_naturalname
+    def copy(group, root):
+        group._f_copy(newparent=root, newname=ROW, recursive=True)
@@ -16,12 +16,7 @@
 # License can be found in licenses/mMass.txt
 
 # load modules
-import base64
-import struct
 import xml.sax
-import zlib
-
-import numpy as np
 
 from xldlib.definitions import re, ZIP
 from xldlib.qt.objects import base
@@ -29,19 +24,37 @@ from xldlib.resources.parameters import defaults
 from xldlib.utils import decorators, logger
 from xldlib.xlpy.tools import peak_picking
 
+from . import binary, offsets
+
 # load objects/functions
 from collections import namedtuple
 
 
 # OBJECTS
 # -------
-BinaryData = namedtuple("BinaryData", "data precision compression")
+BinaryData = namedtuple("BinaryData",
+    "data precision compression numpress")
 
 
 # REGEXP
 # ------
 MZML_SCAN = re.compile(r'scan=([0-9]+)')
 
+# COMPRESSION
+# -----------
+
+NUMPRESS = {
+    'MS-Numpress linear prediction compression': ('linear', None),
+    'MS-Numpress positive integer compression': ('pic', None),
+    'MS-Numpress short logged float compression': ('slof', None),
+    'MS-Numpress linear prediction compression followed by zlib '
+    'compression': ('linear', 'zlib'),
+    'MS-Numpress positive integer compression followed by zlib '
+    'compression': ('pic', 'zlib'),
+    'MS-Numpress short logged float compression followed by zlib '
+    'compression': ('slof', 'zlib'),
+}
+
 
 # HELPERS
 # -------
@@ -239,35 +252,13 @@ class End(base.BaseObject):
         return False
 
     def get_decoded_scans(self, group, mzs, intensity):
-        '''Unpacks m/z-int base64 encoded data to lists.'''
-
-        for index, binarydata in enumerate((mzs, intensity)):
-            data = self.get_decoded_b64(binarydata)
-            if not data:
-                yield np.array([])
-                continue
-
-            # unpack struct
-            prec = ['f', 'd'][binarydata.precision == 64]
-            byte = defaults.DEFAULTS['byte_order']['little']
-            count = len(data) // struct.calcsize(byte + prec)
-            values = struct.unpack(byte + prec*count, data)
-            yield np.array(values)
-
-    @staticmethod
-    def get_decoded_b64(binarydata):
-        '''Decodes the for a given scan and returns the peak lists'''
-
-        if binarydata.precision == 64:
-            data = base64.b64decode(binarydata.data)
-        else:
-            data = base64.b32decode(binarydata.data)
+        '''Decodes the m/z-int base64 encoded data to arrays.'''
 
-        if binarydata.compression == 'zlib':
-            try:
-                return zlib.decompress(data)
-            except zlib.error:
-                return ''
+        for binarydata in (mzs, intensity):
+            yield binary.decode(binarydata.data,
+                binarydata.precision,
+                binarydata.compression,
+                compressor=binarydata.numpress)
 
 
 # HANDLER
@@ -358,6 +349,7 @@ class RunHandler(xml.sax.handler.ContentHandler):
         self._tmp_binary_data = None
         self._tmp_precision = None
         self._tmp_compression = None
+        self._tmp_numpress = None
         self._tmp_array_type = None
 
     def set_binary_data(self, attrs):
@@ -374,6 +366,10 @@ class RunHandler(xml.sax.handler.ContentHandler):
             self._tmp_compression = 'zlib'
         elif name == 'no compression':
             self._tmp_compression = None
+        elif name in NUMPRESS:
+            self._tmp_numpress, compression = NUMPRESS[name]
+            if compression is not None:
+                self._tmp_compression = compression
         # array type
         elif name == 'm/z array':
             self._tmp_array_type = 'mzArray'
@@ -386,7 +382,8 @@ class RunHandler(xml.sax.handler.ContentHandler):
         '''Process the binary data elements when they end'''
 
         data = ''.join(self._tmp_binary_data)
-        values = BinaryData(data, self._tmp_precision, self._tmp_compression)
+        values = BinaryData(data, self._tmp_precision,
+            self._tmp_compression, self._tmp_numpress)
 
         if self._tmp_array_type == 'mzArray':
             self.mz = values
@@ -397,6 +394,7 @@ class RunHandler(xml.sax.handler.ContentHandler):
         self._tmp_binary_data = None
         self._tmp_precision = None
         self._tmp_compression = None
+        self._tmp_numpress = None
 
 
 # PARSER
@@ -427,3 +425,74 @@ class ParseXml(base.BaseObject):
         parser.parse(self.fileobj)
 
         self.fileobj.close()
+
+
+@logger.init('scans', level='DEBUG')
+class ParseIndexedXml(base.BaseObject):
+    '''
+    Random-access parser for mzML files, which seeks to and decodes
+    only the requested scans from the spectrum offset index.
+    '''
+
+    def __init__(self, path, group):
+        super(ParseIndexedXml, self).__init__()
+
+        self.fileobj = open(path, 'rb')
+        self.group = group
+        self.source = self.app.discovererthread
+
+        self.index = offsets.OffsetIndex(path, self.fileobj)
+        self.handler = RunHandler(self.group)
+        self.parsed = set()
+        self.rebuilt = False
+
+    @logger.raise_error
+    def __call__(self, nums):
+        '''Parses all indexed scans from nums which are not yet parsed'''
+
+        # sort to read the file sequentially
+        for num in sorted(set(nums) - self.parsed):
+            if num in self.index:
+                self.parsescan(num)
+
+    #     PUBLIC
+
+    def parsescan(self, num):
+        '''Seeks to and parses a single spectrum element'''
+
+        spectrum = self.index.getspectrum(num)
+        if spectrum is None and not self.rebuilt:
+            # the indexList offsets are stale, find them from the file
+            self.rebuilt = True
+            self.index.rebuild()
+            if num in self.index:
+                spectrum = self.index.getspectrum(num)
+
+        if spectrum is not None:
+            xml.sax.parseString(spectrum, self.handler)
+            self.parsed.add(num)
+
+    def close(self):
+        self.group.flush()
+        self.fileobj.close()
+
+    #     GETTERS
+
+    def isindexed(self):
+        return bool(self.index)
+
+    def getlast(self):
+        '''Returns the last scan number, which sets the run gradient'''
+
+        return max(self.index)
+
+    def getprecursors(self, nums):
+        '''Returns the precursor scan numbers listed in the scan headers'''
+
+        precursors = set()
+        for num in nums:
+            scan = self.group.get(str(num))
+            if scan is not None and scan.hasattr('precursor_num'):
+                precursors.add(scan.getattr('precursor_num'))
+        precursors.discard(None)
+        return precursors
@@ -9,21 +9,18 @@
 '''
 
 # load modules
-import base64
-import struct
 import xml.sax
-import zlib
 
 from collections import namedtuple
 
-import numpy as np
-
 from xldlib.definitions import re, ZIP
 from xldlib.qt.objects import base
 from xldlib.resources.parameters import defaults
 from xldlib.utils import decorators, logger
 from xldlib.xlpy.tools import peak_picking
 
+from . import binary
+
 
 # OBJECTS
 # -------
@@ -216,34 +213,15 @@ class End(base.BaseObject):
         return False
 
     def get_decoded_scans(self, group, binarydata):
-        '''Unpacks m/z-int base64 encoded data to lists.'''
+        '''Decodes the interleaved m/z-int base64 data to arrays.'''
 
-        data = self.get_decoded_b64(binarydata)
-        if not data:
-            return np.array([]), np.array([])
-
-        prec = ['f', 'd'][binarydata.precision == 64]
-        byte = defaults.DEFAULTS['byte_order'][binarydata.byteorder]
-        count = len(data) // struct.calcsize(byte + prec)
-        values = struct.unpack(byte + prec*count, data)
+        values = binary.decode(binarydata.data,
+            binarydata.precision,
+            binarydata.compression,
+            binarydata.byteorder)
 
         return values[::2], values[1::2]
 
-    @staticmethod
-    def get_decoded_b64(binarydata):
-        '''Decodes the for a given scan and returns the peak lists'''
-
-        if binarydata.precision == 64:
-            data = base64.b64decode(binarydata.data)
-        else:
-            data = base64.b32decode(binarydata.data)
-
-        if binarydata.compression == 'zlib':
-            try:
-                return zlib.decompress(data)
-            except zlib.error:
-                return ''
-
 
 # HANDLER
 # -------
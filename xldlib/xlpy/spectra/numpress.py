@@ -0,0 +1,158 @@
+'''
+    XlPy/Spectra/numpress
+    _____________________
+
+    Decoders for the MS-Numpress compression schemes used within mzML
+    binary data arrays:
+        linear -- linear prediction of fixed-point m/z or retention times
+        pic -- positive integer compression of rounded intensities
+        slof -- short logged float compression of intensities
+
+    Specification and reference implementation:
+        https://github.com/ms-numpress/ms-numpress
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load future
+from __future__ import division
+
+# load modules
+import numpy as np
+
+
+# CONSTANTS
+# ---------
+
+# fixed point is stored as a big-endian IEEE754 double
+FIXED_POINT = np.dtype('>f8')
+FIXED_POINT_SIZE = 8
+
+# linear prediction stores the first two values as 4-byte unsigned ints
+LINEAR_START = np.dtype('<u4')
+LINEAR_HEADER = FIXED_POINT_SIZE + 2 * LINEAR_START.itemsize
+
+SLOF_VALUE = np.dtype('<u2')
+
+INT_NIBBLES = 8
+
+
+# HELPERS
+# -------
+
+
+def getnibbles(data, offset=0):
+    '''Splits each byte into the high and then the low half-byte'''
+
+    bytes_ = np.frombuffer(data, dtype=np.uint8, offset=offset)
+    nibbles = np.empty(2 * bytes_.size, dtype=np.uint8)
+    nibbles[::2] = bytes_ >> 4
+    nibbles[1::2] = bytes_ & 0x0f
+    return nibbles
+
+
+def decodeints(nibbles):
+    '''
+    Decodes the variable-length, half-byte integer encoding. Each
+    integer starts with a head nibble, for which values <= 8 count the
+    number of leading zero nibbles, and values > 8 count the leading
+    0xf nibbles of a negative integer (head - 8). The remaining nibbles
+    follow, least-significant first.
+
+    Returns (np.ndarray):   decoded 32-bit integers as int64
+    '''
+
+    values = []
+    append = values.append
+    nibbles = nibbles.tolist()
+    length = len(nibbles)
+    index = 0
+    while index < length:
+        head = nibbles[index]
+        index += 1
+        if index == length and head == 0:
+            # trailing padding for an odd number of half-bytes
+            break
+
+        if head <= 8:
+            leading = head
+            value = 0
+        else:
+            leading = head - 8
+            # set the leading nibbles to 0xf and sign-extend
+            value = (0xffffffff << (4 * (INT_NIBBLES - leading))) & 0xffffffff
+
+        for shift in range(INT_NIBBLES - leading):
+            value |= nibbles[index] << (4 * shift)
+            index += 1
+
+        if value & 0x80000000:
+            value -= 0x100000000
+        append(value)
+
+    return np.array(values, dtype=np.int64)
+
+
+def getfixedpoint(data):
+    return float(np.frombuffer(data[:FIXED_POINT_SIZE], FIXED_POINT)[0])
+
+
+# DECODERS
+# --------
+
+
+def decode_linear(data):
+    '''
+    Decodes linear prediction compression. Each value is predicted
+    from the two prior values, x[i] = 2*x[i-1] - x[i-2] + r[i],
+    so the residuals are the second differences of the fixed-point
+    integers, which are restored with two cumulative sums.
+    '''
+
+    if len(data) < FIXED_POINT_SIZE:
+        raise ValueError("Corrupt MS-Numpress linear data")
+    elif len(data) == FIXED_POINT_SIZE:
+        return np.array([], dtype=np.float64)
+
+    fixedpoint = getfixedpoint(data)
+    count = (min(len(data), LINEAR_HEADER) - FIXED_POINT_SIZE) // 4
+    start = np.frombuffer(data, LINEAR_START, count, FIXED_POINT_SIZE)
+    start = start.astype(np.int64)
+    if count < 2:
+        return start / fixedpoint
+
+    residuals = decodeints(getnibbles(data, LINEAR_HEADER))
+    # first difference, then the integer sequence, from the seed values
+    differences = np.empty(residuals.size + 1, dtype=np.int64)
+    differences[0] = start[1] - start[0]
+    differences[1:] = residuals
+    ints = np.empty(residuals.size + 2, dtype=np.int64)
+    ints[0] = start[0]
+    ints[1:] = start[0] + np.cumsum(np.cumsum(differences))
+
+    return ints / fixedpoint
+
+
+def decode_pic(data):
+    '''Decodes positive integer compression'''
+
+    return decodeints(getnibbles(data)).astype(np.float64)
+
+
+def decode_slof(data):
+    '''Decodes short logged float compression, x = exp(v / fp) - 1'''
+
+    if len(data) < FIXED_POINT_SIZE:
+        raise ValueError("Corrupt MS-Numpress slof data")
+
+    fixedpoint = getfixedpoint(data)
+    values = np.frombuffer(data, SLOF_VALUE, offset=FIXED_POINT_SIZE)
+    return np.exp(values / fixedpoint) - 1
+
+
+DECODERS = {
+    'linear': decode_linear,
+    'pic': decode_pic,
+    'slof': decode_slof
+}
@@ -0,0 +1,249 @@
+'''
+    XlPy/Spectra/offsets
+    ____________________
+
+    Byte-offset index for the spectra within an mzML file, allowing
+    random access to individual scans. Indexed mzML files store the
+    offsets in a trailing `<indexList>`, otherwise, the offsets are
+    found from a single pass over the file and cached.
+
+    :copyright: (c) 2015 The Regents of the University of California.
+    :license: GNU GPL, see licenses/GNU GPLv3.txt for more details.
+'''
+
+# load modules
+import hashlib
+import json
+import os
+
+from xldlib.definitions import re
+from xldlib.resources import paths
+
+# load objects/functions
+from collections import OrderedDict
+
+
+# CONSTANTS
+# ---------
+
+BLOCK_SIZE = 1 << 20
+
+# the `<indexListOffset>` is within the last few hundred bytes
+TAIL_SIZE = 4096
+
+SPECTRUM_START = b'<spectrum '
+SPECTRUM_END = b'</spectrum>'
+
+CACHE_SUFFIX = '.offsets'
+
+# REGEXP
+# ------
+
+INDEX_LIST_OFFSET = re.compile(br'<indexListOffset>\s*([0-9]+)\s*<')
+SPECTRUM_INDEX = re.compile(br'<index\s+name="spectrum"\s*>(.*?)</index>',
+    re.DOTALL)
+OFFSET = re.compile(br'<offset\s+idRef="([^"]*)"[^>]*>\s*([0-9]+)\s*<')
+SPECTRUM_ID = re.compile(br'<spectrum\s[^>]*?\bid="([^"]*)"')
+SCAN = re.compile(br'scan=([0-9]+)')
+
+
+# HELPERS
+# -------
+
+
+def getnum(spectrum_id):
+    '''Extracts the scan number from a nativeID, see `mzml.Start`'''
+
+    match = SCAN.search(spectrum_id)
+    if match:
+        return int(match.group(1))
+
+
+def getcachepath(path):
+    '''
+    Returns the path to the cached offsets, keyed by the absolute path,
+    size and modification time of the mzML file.
+    '''
+
+    stat = os.stat(path)
+    key = '{0}:{1}:{2}'.format(os.path.abspath(path),
+        stat.st_size, stat.st_mtime)
+    name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(paths.DIRS['cache'], name + CACHE_SUFFIX)
+
+
+# READERS
+# -------
+
+
+def readindexlist(fileobj):
+    '''
+    Reads the spectrum offsets from the `<indexList>` of an indexedmzML
+    file. Returns None if the file is not indexed or a spectrum cannot
+    be matched to a scan number.
+    '''
+
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(max(0, size - TAIL_SIZE))
+    match = INDEX_LIST_OFFSET.search(fileobj.read())
+    if match is None or int(match.group(1)) >= size:
+        return None
+
+    fileobj.seek(int(match.group(1)))
+    match = SPECTRUM_INDEX.search(fileobj.read())
+    if match is None:
+        return None
+
+    offsets = OrderedDict()
+    for spectrum_id, offset in OFFSET.findall(match.group(1)):
+        num = getnum(spectrum_id)
+        if num is None:
+            return None
+        offsets[num] = int(offset)
+    return offsets
+
+
+def buildindex(fileobj, blocksize=BLOCK_SIZE):
+    '''
+    Finds the offsets of all `<spectrum>` start elements with a single
+    pass over the file, reading `blocksize` bytes at a time. Returns
+    None if a spectrum cannot be matched to a scan number.
+    '''
+
+    offsets = OrderedDict()
+    fileobj.seek(0)
+    position = 0
+    buf = b''
+    while True:
+        block = fileobj.read(blocksize)
+        buf += block
+        start = 0
+        while True:
+            index = buf.find(SPECTRUM_START, start)
+            if index == -1:
+                break
+            match = SPECTRUM_ID.match(buf, index)
+            if match is None:
+                # start tag is truncated by the block boundary
+                break
+
+            num = getnum(match.group(1))
+            if num is None:
+                return None
+            offsets[num] = position + index
+            start = match.end()
+
+        if not block:
+            return offsets
+
+        # keep any partial start tag for the next block
+        if index == -1:
+            start = max(start, len(buf) - len(SPECTRUM_START))
+        else:
+            start = index
+        position += start
+        buf = buf[start:]
+
+
+# INDEX
+# -----
+
+
+class OffsetIndex(OrderedDict):
+    '''
+    Maps scan numbers to the byte offset of the `<spectrum>` element.
+    Offsets from the `<indexList>` are validated on read, and if
+    invalid, the index is rebuilt from the file.
+    '''
+
+    def __init__(self, path, fileobj):
+        super(OffsetIndex, self).__init__()
+
+        self.path = path
+        self.fileobj = fileobj
+        self.cachepath = getcachepath(path)
+
+        self.load()
+
+    #     PUBLIC
+
+    def load(self):
+        '''Loads the offsets, from the indexList, the cache or the file'''
+
+        offsets = readindexlist(self.fileobj)
+        if offsets is None:
+            offsets = self.readcache()
+        if offsets is None:
+            offsets = self.build()
+        self.setoffsets(offsets)
+
+    def build(self):
+        '''Builds the offsets from the file and caches the result'''
+
+        offsets = buildindex(self.fileobj)
+        if offsets is not None:
+            self.writecache(offsets)
+        return offsets
+
+    def rebuild(self):
+        '''Rebuilds the index after an invalid offset'''
+
+        self.setoffsets(self.build())
+
+    def getspectrum(self, num, blocksize=BLOCK_SIZE):
+        '''
+        Returns the raw `<spectrum>` element for the scan number,
+        or None if the offset does not point to the scan.
+        '''
+
+        self.fileobj.seek(self[num])
+        buf = b''
+        start = 0
+        while True:
+            block = self.fileobj.read(blocksize)
+            if not block:
+                return None
+            buf += block
+            index = buf.find(SPECTRUM_END, start)
+            if index != -1:
+                break
+            start = max(0, len(buf) - len(SPECTRUM_END))
+
+        match = SPECTRUM_ID.match(buf)
+        if match is None or getnum(match.group(1)) != num:
+            return None
+        return buf[:index + len(SPECTRUM_END)]
+
+    #     SETTERS
+
+    def setoffsets(self, offsets):
+        self.clear()
+        if offsets is not None:
+            self.update(offsets)
+
+    #       I/O
+
+    def readcache(self):
+        '''Reads the cached offsets, returning None if unavailable'''
+
+        try:
+            with open(self.cachepath, 'r') as f:
+                offsets = OrderedDict((int(k), v) for k, v in json.load(f))
+            # mark as recently used, for the spectral cache eviction
+            os.utime(self.cachepath, None)
+            return offsets
+        except (IOError, OSError, ValueError, TypeError):
+            return None
+
+    def writecache(self, offsets):
+        '''Atomically writes the offsets to avoid partial reads'''
+
+        path = '{0}.{1}'.format(self.cachepath, os.getpid())
+        try:
+            with open(path, 'w') as f:
+                json.dump(list(offsets.items()), f)
+            os.rename(path, self.cachepath)
+        except (IOError, OSError):
+            if os.path.exists(path):
+                os.remove(path)
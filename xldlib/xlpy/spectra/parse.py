@@ -19,10 +19,11 @@ import weakref
 
 from xldlib.onstart.main import APP
 from xldlib.qt.objects import base
+from xldlib.resources.parameters import defaults
 from xldlib.utils import logger
 from xldlib.xlpy import wrappers
 
-from . import link, mgf, mzml, mzxml
+from . import cache, link, mgf, mzml, mzxml
 
 
 # PARSERS
@@ -66,12 +67,57 @@ class SpectralParser(base.BaseObject):
     def __call__(self):
         '''On start, initiate parsers sequentially'''
 
+        randomaccess = self.israndomaccess()
+        spectralcache = self.getcache(randomaccess)
+        if spectralcache is None or not spectralcache.load():
+            if randomaccess:
+                self.parseindexed()
+            else:
+                self.parsestream()
+
+            if spectralcache is not None:
+                spectralcache.save()
+
+        self.setgradient()
+
+    #     PARSERS
+
+    def parsestream(self):
+        '''Parses every scan from each file sequentially'''
+
         for key, group in self.row.spectra.items(ignore=self.row.spectra.ms1):
             fileobj = open(self.row.files[key], 'r')
             parser = self.getparser(fileobj, key, group)
             parser()
-
-        self.setgradient()
+            group.flush()
+
+    def parseindexed(self):
+        '''
+        Parses only the matched product scans, the scans within their
+        precursor windows and any precursor scans listed in the product
+        scan headers, by seeking to the indexed spectra. For hierarchical
+        files, the precursor and product parsers are the same instance.
+        '''
+
+        parsers = self.getindexedparsers()
+        if not all(i.isindexed() for i in parsers.values()):
+            for parser in parsers.values():
+                parser.close()
+            self.parsestream()
+            return
+
+        keys = list(self.row.spectra.keys(ignore=self.row.spectra.ms1))
+        precursor = parsers[keys[0]]
+        product = parsers[keys[-1]]
+
+        nums = set(self.row.data['matched']['num'])
+        product(nums)
+        precursor(self.getwindows(nums) | product.getprecursors(nums))
+
+        for parser in parsers.values():
+            # the final scan sets the run gradient
+            parser({parser.getlast()})
+            parser.close()
 
     #     SETTERS
 
@@ -88,6 +134,45 @@ class SpectralParser(base.BaseObject):
 
     #     GETTERS
 
+    def israndomaccess(self):
+        '''
+        Determines whether only the matched scans are needed, which can
+        be parsed from indexed mzML files. Unmatched scans are required
+        for MS1 quantitation and peptide mass fingerprinting.
+        '''
+
+        if self.source.quantitative or self.source.fingerprinting:
+            return False
+        keys = self.row.spectra.keys(ignore=self.row.spectra.ms1)
+        return all(self.row.engines[i].name == 'mzml' for i in keys)
+
+    def getcache(self, randomaccess):
+        '''Returns the parsed spectra cache, keyed by the parsed scans'''
+
+        if defaults.DEFAULTS['cache_spectra']:
+            nums = None
+            if randomaccess:
+                nums = self.row.data['matched']['num']
+            return cache.SpectralCache(self.row, nums)
+
+    def getindexedparsers(self):
+        '''Returns the random-access parsers, one per spectral group'''
+
+        parsers = {}
+        for key, group in self.row.spectra.items(ignore=self.row.spectra.ms1):
+            parsers[key] = mzml.ParseIndexedXml(self.row.files[key], group)
+        return parsers
+
+    @staticmethod
+    def getwindows(nums):
+        '''Returns all scan numbers searched by `ScanLevel.findscan`'''
+
+        steps = defaults.DEFAULTS['precursor_scan_steps']
+        windows = set()
+        for num in nums:
+            windows.update(range(num - steps + 1, num))
+        return windows
+
     def getparser(self, fileobj, key, group):
         '''Finds the child Parser class and initiates an instance.'''
 